@@ -0,0 +1,110 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'viewer'))
+
+import multiprocessing as mp
+import fractions
+import pickle
+import random
+import numpy as np
+import pytest
+import av
+import hl2ss
+
+
+#------------------------------------------------------------------------------
+# Synthetic Stream
+#------------------------------------------------------------------------------
+
+_FRAMES = 25
+_GOP = 10
+
+
+def _encode(profile, frames, gop):
+    width  = hl2ss.Parameters_RM_VLC.WIDTH
+    height = hl2ss.Parameters_RM_VLC.HEIGHT
+    name   = 'libx265' if (profile == 'hevc') else 'libx264'
+    params = 'keyint={gop}:min-keyint={gop}:bframes=0'.format(gop=gop)
+
+    codec = av.CodecContext.create(name, 'w')
+    codec.width = width
+    codec.height = height
+    codec.pix_fmt = 'yuv420p'
+    codec.time_base = fractions.Fraction(1, hl2ss.Parameters_RM_VLC.FPS)
+    codec.options = {'x265-params' : params + ':log-level=0'} if (profile == 'hevc') else {'x264-params' : params}
+
+    base = np.random.default_rng(0).integers(0, 256, (height, width), dtype=np.uint8)
+    packets = []
+    for index in range(0, frames):
+        frame = av.VideoFrame.from_ndarray(np.roll(base, 4 * index, axis=1), format='gray8').reformat(format='yuv420p')
+        frame.pts = index
+        packets.extend(bytes(packet) for packet in codec.encode(frame))
+    packets.extend(bytes(packet) for packet in codec.encode(None))
+
+    # Server payloads: h264 starts with an access unit delimiter, RM VLC metadata at the end
+    aud = b'\x00\x00\x00\x01\x09\x10' if (profile == 'h264') else b''
+    return [aud + packet + bytes(hl2ss._MetadataSize.RM_VLC) for packet in packets]
+
+
+@pytest.fixture(scope='module', params=['hevc', 'h264'])
+def stream(request):
+    profile = hl2ss.VideoProfile.H265_MAIN if (request.param == 'hevc') else hl2ss.VideoProfile.H264_MAIN
+    try:
+        payloads = _encode(request.param, _FRAMES, _GOP)
+    except Exception as e:
+        pytest.skip(f'{request.param} encoder not available: {e}')
+    codec = hl2ss.decode_rm_vlc(profile)
+    reference = [codec.decode(payload).image for payload in payloads]
+    assert all(image is not None for image in reference)
+    return profile, payloads, reference
+
+
+def _lazy_frames(profile, payloads):
+    codec = hl2ss.decode_rm_vlc(profile, lazy=True)
+    return [codec.decode(payload) for payload in payloads]
+
+
+def _orders():
+    sequential = list(range(0, _FRAMES))
+    return {'sequential' : sequential, 'reverse' : sequential[::-1], 'random' : random.Random(0).sample(sequential, _FRAMES)}
+
+
+#------------------------------------------------------------------------------
+# Tests
+#------------------------------------------------------------------------------
+
+@pytest.mark.parametrize('order', ['sequential', 'reverse', 'random'])
+def test_lazy_order_matches_eager(stream, order):
+    profile, payloads, reference = stream
+    frames = _lazy_frames(profile, payloads)
+    for index in _orders()[order]:
+        assert np.array_equal(frames[index].image, reference[index]), index
+
+
+def _load_frames(queue, result):
+    result.put([pickle.loads(data).image for data in iter(queue.get, None)])
+
+
+def test_lazy_pickle_across_processes(stream):
+    profile, payloads, reference = stream
+    frames = _lazy_frames(profile, payloads)
+    order = _orders()['reverse']
+    queue = mp.Queue()
+    result = mp.Queue()
+    process = mp.Process(target=_load_frames, args=(queue, result))
+    process.start()
+    for index in order:
+        queue.put(pickle.dumps(frames[index]))
+    queue.put(None)
+    images = result.get()
+    process.join()
+    for index, image in zip(order, images):
+        assert np.array_equal(image, reference[index]), index
+
+
+def test_lazy_pickle_memoryview_payloads(stream):
+    profile, payloads, reference = stream
+    frames = _lazy_frames(profile, [memoryview(payload) for payload in payloads])
+    for index in _orders()['reverse']:
+        assert np.array_equal(pickle.loads(pickle.dumps(frames[index])).image, reference[index]), index
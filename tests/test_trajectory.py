@@ -0,0 +1,68 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'viewer'))
+
+import numpy as np
+import pytest
+import hl2ss_3dcv
+
+
+def _pose(angle, position):
+    c = np.cos(angle)
+    s = np.sin(angle)
+    pose = np.eye(4, 4, dtype=np.float32)
+    pose[0, 0] = c
+    pose[0, 2] = -s
+    pose[2, 0] = s
+    pose[2, 2] = c
+    pose[3, :3] = position
+    return pose
+
+
+@pytest.fixture
+def samples():
+    timestamps = 1000 + 333 * np.arange(40, dtype=np.int64)
+    poses = np.stack([_pose(0.05 * i, [0.01 * i, 0.02 * i, -0.01 * i]) for i in range(0, 40)])
+    return timestamps, poses
+
+
+def test_sampled_timestamps_return_sampled_poses(samples):
+    timestamps, poses = samples
+    trajectory = hl2ss_3dcv.trajectory(timestamps, poses)
+    result, valid = trajectory.get_poses(timestamps)
+    assert valid.all()
+    assert np.allclose(result, poses, atol=1e-5)
+
+
+def test_midpoint_interpolation(samples):
+    timestamps, poses = samples
+    trajectory = hl2ss_3dcv.trajectory(timestamps, poses)
+    pose = trajectory.get_pose((timestamps[4] + timestamps[5]) // 2)
+    assert pose is not None
+    assert np.allclose(pose, _pose(0.05 * 4.5, [0.045, 0.09, -0.045]), atol=1e-3)
+
+
+def test_invalid_pose_splits_trajectory(samples):
+    timestamps, poses = samples
+    poses = poses.copy()
+    poses[20] = 0
+    trajectory = hl2ss_3dcv.trajectory(timestamps, poses)
+
+    # Exact timestamps of the valid neighbours of the invalid pose
+    result, valid = trajectory.get_poses([timestamps[19], timestamps[21]])
+    assert valid.all()
+    assert np.allclose(result, poses[[19, 21]], atol=1e-5)
+
+    # Between the neighbours, and at the invalid pose itself
+    _, valid = trajectory.get_poses([timestamps[19] + 1, timestamps[20], timestamps[21] - 1])
+    assert not valid.any()
+    assert trajectory.get_gaps().tolist() == [[timestamps[19], timestamps[21]]]
+
+
+def test_max_gap_keeps_endpoints(samples):
+    timestamps, poses = samples
+    keep = np.r_[0:10, 30:40]
+    trajectory = hl2ss_3dcv.trajectory(timestamps[keep], poses[keep], max_gap=1000)
+    _, valid = trajectory.get_poses([timestamps[9], timestamps[15], timestamps[30], timestamps[39], timestamps[39] + 1, timestamps[0] - 1])
+    assert valid.tolist() == [True, False, True, True, False, False]
@@ -0,0 +1,271 @@
+import argparse
+
+parser = argparse.ArgumentParser(description='HL2SS Multiplexer Benchmark Tool. Receives several streams using one hl2ss_mp process pair per port or a single hl2ss_sx multiplexer thread and reports startup time, process count, CPU time, and received frame rates.')
+parser.add_argument('--host', help='HL2 IP address (e.g. 192.168.1.7). If omitted, a local emulator serving synthetic raw packets is used.', default=None)
+parser.add_argument('--ports', help='Comma separated stream ports (e.g. 3800,3801,3802,3803,3805,3806,3807,3808,3812)', default='3800,3801,3802,3803,3805,3806,3807,3808,3812')
+parser.add_argument('--duration', help='Measurement duration in seconds', type=float, default=10.0)
+parser.add_argument('--model', help='Model to benchmark', choices=['mp', 'sx', 'both'], default='both')
+args = parser.parse_args()
+
+import sys
+
+sys.path.append('../viewer')
+
+import multiprocessing as mp
+import threading as mt
+import socket
+import struct
+import time
+import os
+import hl2ss
+import hl2ss_lnm
+import hl2ss_mx
+import hl2ss_mp
+import hl2ss_sx
+
+
+#------------------------------------------------------------------------------
+# Emulator
+#------------------------------------------------------------------------------
+
+def emulator_parameters(port):
+    if (port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return (hl2ss.Parameters_RM_VLC.PIXELS + 24, hl2ss.Parameters_RM_VLC.FPS)
+    if (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return (hl2ss.Parameters_RM_DEPTH_AHAT.PIXELS * 4 + 8, hl2ss.Parameters_RM_DEPTH_AHAT.FPS)
+    if (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return (hl2ss.Parameters_RM_DEPTH_LONGTHROW.PIXELS * 4 + 8, hl2ss.Parameters_RM_DEPTH_LONGTHROW.FPS)
+    if (port == hl2ss.StreamPort.RM_IMU_ACCELEROMETER):
+        return (hl2ss.Parameters_RM_IMU_ACCELEROMETER.BATCH_SIZE * 32, 12)
+    if (port == hl2ss.StreamPort.RM_IMU_GYROSCOPE):
+        return (hl2ss.Parameters_RM_IMU_GYROSCOPE.BATCH_SIZE * 32, 24)
+    if (port == hl2ss.StreamPort.RM_IMU_MAGNETOMETER):
+        return (hl2ss.Parameters_RM_IMU_MAGNETOMETER.BATCH_SIZE * 32, 5)
+    if (port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return (((1920 * 1080 * 3) // 2) + 80, 30)
+    if (port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return (4 + (9 + 6 + 2 * 26 * 9) * 4, hl2ss.Parameters_SI.SAMPLE_RATE)
+    return (4096, 30)
+
+
+def emulator_serve(connection, port, event_stop):
+    size, fps = emulator_parameters(port)
+    pose = 0 if (port == hl2ss.StreamPort.SPATIAL_INPUT) else 64
+    packet = bytearray(struct.pack('<QI', 0, size)) + bytearray(size) + bytearray(pose)
+    connection.settimeout(0.5)
+    try:
+        connection.recv(4096)
+    except socket.timeout:
+        pass
+    connection.setblocking(True)
+    timestamp = 0
+    start = time.perf_counter()
+    try:
+        while (not event_stop.is_set()):
+            struct.pack_into('<Q', packet, 0, timestamp)
+            connection.sendall(packet)
+            timestamp += hl2ss.TimeBase.HUNDREDS_OF_NANOSECONDS // fps
+            delay = start + (timestamp / hl2ss.TimeBase.HUNDREDS_OF_NANOSECONDS) - time.perf_counter()
+            if (delay > 0):
+                time.sleep(delay)
+    except:
+        pass
+    connection.close()
+
+
+def emulator_listen(port, event_stop):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(('127.0.0.1', port))
+    server.listen()
+    server.settimeout(0.1)
+    while (not event_stop.is_set()):
+        try:
+            connection, _ = server.accept()
+        except socket.timeout:
+            continue
+        mt.Thread(target=emulator_serve, args=(connection, port, event_stop), daemon=True).start()
+    server.close()
+
+
+def emulator_run(ports, event_stop, event_ready):
+    threads = [mt.Thread(target=emulator_listen, args=(port, event_stop)) for port in ports]
+    for thread in threads:
+        thread.start()
+    event_ready.set()
+    for thread in threads:
+        thread.join()
+
+
+#------------------------------------------------------------------------------
+# Models
+#------------------------------------------------------------------------------
+
+def create_rx(host, port):
+    if (port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return hl2ss_lnm.rx_rm_vlc(host, port, profile=hl2ss.VideoProfile.RAW, decoded=False)
+    if (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return hl2ss_lnm.rx_rm_depth_ahat(host, port, profile_ab=hl2ss.VideoProfile.RAW, decoded=False)
+    if (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return hl2ss_lnm.rx_rm_depth_longthrow(host, port, decoded=False)
+    if (port in [hl2ss.StreamPort.RM_IMU_ACCELEROMETER, hl2ss.StreamPort.RM_IMU_GYROSCOPE, hl2ss.StreamPort.RM_IMU_MAGNETOMETER]):
+        return hl2ss_lnm.rx_rm_imu(host, port, decoded=False)
+    if (port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return hl2ss_lnm.rx_pv(host, port, profile=hl2ss.VideoProfile.RAW, decoded_format=None)
+    if (port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return hl2ss_lnm.rx_si(host, port, decoded=False)
+    return None
+
+
+def cpu_time():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def count_processes(exclude):
+    if (not os.path.isdir('/proc')):
+        return len(mp.active_children()) + 1 - len(exclude)
+    parents = dict()
+    for name in os.listdir('/proc'):
+        try:
+            with open(os.path.join('/proc', name, 'stat'), 'r') as f:
+                parents[int(name)] = int(f.read().rsplit(')', 1)[1].split()[1])
+        except:
+            pass
+    tree = {os.getpid()}
+    size = 0
+    while (len(tree) != size):
+        size = len(tree)
+        tree.update([pid for pid, ppid in parents.items() if ((ppid in tree) and (pid not in exclude))])
+    return len(tree)
+
+
+def mp_drain(sink, event_stop, counts, port):
+    frame_stamp = sink.get_frame_stamp() + 1
+    while (not event_stop.is_set()):
+        sink.acquire()
+        state, _, _ = sink.get_buffered_frame(frame_stamp)
+        if (state == hl2ss_mx.Status.OK):
+            frame_stamp += 1
+            counts[port] += 1
+        elif (state == hl2ss_mx.Status.DISCARDED):
+            frame_stamp = sink.get_frame_stamp() + 1
+
+
+def run_mp(host, ports, duration, exclude):
+    start = time.perf_counter()
+    cpu = cpu_time()
+
+    producer = hl2ss_mp.producer()
+    consumer = hl2ss_mp.consumer()
+    sinks = dict()
+
+    for port in ports:
+        producer.configure(port, create_rx(host, port))
+        producer.initialize(port, source_kind=hl2ss_mx.SourceKind.MP, default_sink_semaphore=...)
+        producer.start(port)
+        sinks[port] = consumer.get_default_sink(producer, port)
+        sinks[port].get_attach_response()
+
+    for port in ports:
+        while (sinks[port].get_buffered_frame(-1)[0] != hl2ss_mx.Status.OK):
+            sinks[port].acquire()
+
+    startup = time.perf_counter() - start
+    processes = count_processes(exclude)
+    counts = {port : 0 for port in ports}
+    event_stop = mt.Event()
+    threads = [mt.Thread(target=mp_drain, args=(sinks[port], event_stop, counts, port)) for port in ports]
+
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    event_stop.set()
+    for port in ports:
+        sinks[port].release()
+    for thread in threads:
+        thread.join()
+
+    for port in ports:
+        sinks[port].detach()
+        producer.stop(port)
+
+    return (startup, processes, cpu_time() - cpu, counts)
+
+
+class counter:
+    def __init__(self):
+        self.count = 0
+        self.event = mt.Event()
+
+    def __call__(self, data):
+        if (data is not None):
+            self.count += 1
+            self.event.set()
+
+
+def run_sx(host, ports, duration, exclude):
+    start = time.perf_counter()
+    cpu = cpu_time()
+
+    counters = {port : counter() for port in ports}
+    client = hl2ss_sx.multiplexer()
+    for port in ports:
+        client.configure(port, create_rx(host, port), counters[port])
+    client.open()
+
+    for port in ports:
+        counters[port].event.wait()
+
+    startup = time.perf_counter() - start
+    processes = count_processes(exclude)
+    base = {port : counters[port].count for port in ports}
+
+    time.sleep(duration)
+    counts = {port : counters[port].count - base[port] for port in ports}
+    client.close()
+
+    return (startup, processes, cpu_time() - cpu, counts)
+
+
+def report(name, startup, processes, cpu, counts, duration):
+    print(f'[{name}] startup {startup:.3f} s, processes {processes}, cpu {cpu:.2f} s ({100 * cpu / (duration + startup):.1f}% of one core)')
+    for port, count in counts.items():
+        print(f'[{name}]   {hl2ss.get_port_name(port)}: {count / duration:.1f} packets/s')
+
+
+#------------------------------------------------------------------------------
+# Main
+#------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    ports = [int(port) for port in args.ports.split(',')]
+    host = args.host
+
+    if (host is None):
+        host = '127.0.0.1'
+        event_stop = mp.Event()
+        event_ready = mp.Event()
+        emulator = mp.Process(target=emulator_run, args=(ports, event_stop, event_ready))
+        emulator.start()
+        event_ready.wait()
+        exclude = {emulator.pid}
+    else:
+        emulator = None
+        exclude = set()
+
+    if ((emulator is None) and (hl2ss.StreamPort.PERSONAL_VIDEO in ports)):
+        hl2ss_lnm.start_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
+
+    if (args.model in ['mp', 'both']):
+        report('hl2ss_mp', *run_mp(host, ports, args.duration, exclude), args.duration)
+
+    if (args.model in ['sx', 'both']):
+        report('hl2ss_sx', *run_sx(host, ports, args.duration, exclude), args.duration)
+
+    if ((emulator is None) and (hl2ss.StreamPort.PERSONAL_VIDEO in ports)):
+        hl2ss_lnm.stop_subsystem_pv(host, hl2ss.StreamPort.PERSONAL_VIDEO)
+
+    if (emulator is not None):
+        event_stop.set()
+        emulator.join()
@@ -0,0 +1,18 @@
+import argparse
+
+parser = argparse.ArgumentParser(description='HL2SS Frame Extraction Tool. Decodes video or depth data recorded with hl2ss_io on a process pool and writes one image per frame named by timestamp.')
+parser.add_argument('-I', '--input', required=True, help='Input bin file (e.g., ./data/personal_video.bin)')
+parser.add_argument('-O', '--output', required=True, help='Output directory (e.g., ./data/personal_video)')
+parser.add_argument('--format', help='Image format for PV and RM VLC frames (depth is always 16-bit png)', choices=['png', 'jpg'], default='png')
+parser.add_argument('--workers', help='Number of worker processes (default: number of cores)', type=int, default=None)
+parser.add_argument('--min_frames', help='Minimum number of frames per task, tasks always hold whole GOPs', type=int, default=30)
+args = parser.parse_args()
+
+import sys
+
+sys.path.append('../viewer')
+
+import hl2ss_ds
+
+if __name__ == '__main__':
+    hl2ss_ds.extract_frames(args.input, args.output, args.format, args.workers, args.min_frames, progress=True)
@@ -0,0 +1,16 @@
+import argparse
+
+parser = argparse.ArgumentParser(description='HL2SS Index Tool. Rebuilds the seek index (.idx) of bin files recorded with hl2ss_io by scanning packet headers.')
+parser.add_argument('-I', '--input', action='append', required=True, help='Input bin files (e.g., -I ./data/personal_video.bin -I ./data/microphone.bin)')
+args = parser.parse_args()
+
+import sys
+
+sys.path.append('../viewer')
+
+import hl2ss_io
+
+for filename in args.input:
+    for segment in hl2ss_io.get_segments(filename):
+        index = hl2ss_io.rebuild_index(segment)
+        print(f'{segment}: {len(index)} packets, {int(index["keyframe"].sum())} keyframes')
@@ -12,4 +12,4 @@ sys.path.append('../viewer')
 
 import hl2ss_ds
 
-hl2ss_ds.unpack_to_mp4(args.input, args.output)
+hl2ss_ds.unpack_to_mp4(args.input, args.output, progress=True)
@@ -0,0 +1,15 @@
+import argparse
+
+parser = argparse.ArgumentParser(description='HL2SS bin2npy Tool. Unpacks RM IMU, Spatial Input, or Extended Eye Tracker data recorded with hl2ss_io into one numpy array per field.')
+parser.add_argument('-I', '--input', required=True, help='Input bin file (e.g., ./data/spatial_input.bin)')
+parser.add_argument('-O', '--output', required=True, help='Output directory of npy files or npz file (e.g., ./data/spatial_input)')
+parser.add_argument('--format', help='Output format', choices=['npy', 'npz'], default='npy')
+args = parser.parse_args()
+
+import sys
+
+sys.path.append('../viewer')
+
+import hl2ss_ds
+
+hl2ss_ds.unpack_to_columns(args.input, args.output, args.format)
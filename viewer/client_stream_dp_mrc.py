@@ -80,13 +80,12 @@ if __name__ == '__main__':
         elif (data.payload.kind == hl2ss_dp.StreamKind.VIDEO):
             print(f'got video packet at {data.timestamp} (key_frame={data.payload.key_frame})')
             video_buffer.append(data)
-            frames = video_buffer.get()
             if (sync_to_audio):
-                index = hl2ss_mx.get_nearest_packet(frames, player.get_timestamp(), hl2ss_mx.TimePreference.PREFER_PAST)
+                index = hl2ss_mx.get_nearest_packet(video_buffer, player.get_timestamp(), hl2ss_mx.TimePreference.PREFER_PAST)
             else:
                 index = -1
             if (index is not None):
-                cv2.imshow('Video', frames[index].payload.sample)
+                cv2.imshow('Video', video_buffer[index].payload.sample)
             cv2.waitKey(1)
 
     client.close()
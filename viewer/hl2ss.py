@@ -1,5 +1,6 @@
 
 import numpy as np
+import collections
 import weakref
 import socket
 import select
@@ -343,12 +344,21 @@ class _client:
     def poll(self):
         return len(select.select([self._socket], [], [], 0)[0]) > 0
 
+    def fileno(self):
+        return self._socket.fileno()
+
     def recv(self, chunk_size):
         chunk = self._socket.recv(chunk_size)
         if (len(chunk) <= 0):
             raise Exception('connection closed')
         return chunk
 
+    def recv_into(self, buffer):
+        size = self._socket.recv_into(buffer)
+        if (size <= 0):
+            raise Exception('connection closed')
+        return size
+
     def download(self, total, chunk_size):
         data = bytearray()
 
@@ -428,6 +438,89 @@ class _unpacker:
         return unpack_packet(self._packet)
 
 
+class _unpacker_into:
+    # Header bytes are staged in a preallocated buffer of chunk_size bytes
+    # Payload and pose are read directly into their own buffers so packets
+    # own their data and no bytes are moved after they are received
+    def reset(self, mode, chunk_size=ChunkSize.SINGLE_TRANSFER):
+        self._mode = mode
+        self._state = 0
+        self._pose_size = 64 if (mode == StreamMode.MODE_1) else 0
+        self._buffer = bytearray(max([chunk_size, 12]))
+        self._view = memoryview(self._buffer)
+        self._begin = 0
+        self._end = 0
+        self._packet = None
+
+    def clear(self):
+        self.reset(self._mode, len(self._buffer))
+
+    def _open_packet(self):
+        timestamp, payload_size = struct.unpack_from('<QI', self._buffer, self._begin)
+        self._begin += 12
+        self._timestamp = timestamp
+        self._payload = bytearray(payload_size)
+        self._pose = bytearray(self._pose_size)
+        self._targets = [memoryview(self._payload), memoryview(self._pose)]
+        self._target = 0
+        self._offset = 0
+        self._state = 1
+
+    def _advance(self, size):
+        self._offset += size
+        while ((self._target < len(self._targets)) and (self._offset >= len(self._targets[self._target]))):
+            self._target += 1
+            self._offset = 0
+
+    def _drain(self):
+        while ((self._target < len(self._targets)) and (self._begin < self._end)):
+            target = self._targets[self._target]
+            size = min([len(target) - self._offset, self._end - self._begin])
+            target[self._offset:(self._offset + size)] = self._view[self._begin:(self._begin + size)]
+            self._begin += size
+            self._advance(size)
+
+    def unpack(self):
+        if ((self._state == 0) and ((self._end - self._begin) >= 12)):
+            self._open_packet()
+            self._advance(0)
+
+        if (self._state == 1):
+            self._drain()
+            if (self._target >= len(self._targets)):
+                self._packet = _packet(self._timestamp, self._payload, np.frombuffer(self._pose, dtype=np.float32).reshape((4, 4)) if (self._pose_size == 64) else None)
+                self._state = 0
+                return True
+
+        return False
+
+    def read(self, recv_into):
+        if (self._begin >= self._end):
+            self._begin = 0
+            self._end = 0
+
+        if (self._state == 1):
+            target = self._targets[self._target]
+            remaining = len(target) - self._offset
+            if (remaining >= len(self._buffer)):
+                size = recv_into(target[self._offset:])
+                self._advance(size)
+                return size
+
+        if ((len(self._buffer) - self._end) < 12):
+            pending = self._end - self._begin
+            self._buffer[:pending] = self._view[self._begin:self._end].tobytes()
+            self._begin = 0
+            self._end = pending
+
+        size = recv_into(self._view[self._end:])
+        self._end += size
+        return size
+
+    def get(self):
+        return self._packet
+
+
 #------------------------------------------------------------------------------
 # Packet Gatherer
 #------------------------------------------------------------------------------
@@ -435,23 +528,26 @@ class _unpacker:
 class _gatherer:
     def __init__(self):
         self._client = _client()
-        self._unpacker = _unpacker()
+        self._unpacker = _unpacker_into()
 
     def open(self, host, port, sockopt, chunk_size, mode):
         self._chunk_size = chunk_size
-        self._unpacker.reset(mode)
+        self._unpacker.reset(mode, chunk_size)
         self._client.open(host, port, sockopt)
         
     def sendall(self, data):
         self._client.sendall(data)
 
+    def fileno(self):
+        return self._client.fileno()
+
     def get_next_packet(self, wait=True):
         while (True):
             if (self._unpacker.unpack()):
                 return self._unpacker.get()
             if ((not wait) and (not self._client.poll())):
                 return None
-            self._unpacker.extend(self._client.recv(self._chunk_size))
+            self._unpacker.read(self._client.recv_into)
 
     def close(self):
         self._client.close()
@@ -729,6 +825,9 @@ class rx_rm_vlc(_context_manager):
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
 
+    def fileno(self):
+        return self._client.fileno()
+
     def close(self):
         self._client.close()
 
@@ -753,6 +852,9 @@ class rx_rm_depth_ahat(_context_manager):
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
 
+    def fileno(self):
+        return self._client.fileno()
+
     def close(self):
         self._client.close()
 
@@ -773,6 +875,9 @@ class rx_rm_depth_longthrow(_context_manager):
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
 
+    def fileno(self):
+        return self._client.fileno()
+
     def close(self):
         self._client.close()
 
@@ -791,6 +896,9 @@ class rx_rm_imu(_context_manager):
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
 
+    def fileno(self):
+        return self._client.fileno()
+
     def close(self):
         self._client.close()
 
@@ -817,6 +925,9 @@ class rx_pv(_context_manager):
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
 
+    def fileno(self):
+        return self._client.fileno()
+
     def close(self):
         self._client.close()
 
@@ -836,6 +947,9 @@ class rx_microphone(_context_manager):
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
 
+    def fileno(self):
+        return self._client.fileno()
+
     def close(self):
         self._client.close()
 
@@ -853,6 +967,9 @@ class rx_si(_context_manager):
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
 
+    def fileno(self):
+        return self._client.fileno()
+
     def close(self):
         self._client.close()
 
@@ -870,6 +987,9 @@ class rx_eet(_context_manager):
 
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
+
+    def fileno(self):
+        return self._client.fileno()
     
     def close(self):
         self._client.close()
@@ -892,6 +1012,9 @@ class rx_extended_audio(_context_manager):
 
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
+
+    def fileno(self):
+        return self._client.fileno()
     
     def close(self):
         self._client.close()
@@ -914,6 +1037,9 @@ class rx_extended_depth(_context_manager):
     def get_next_packet(self, wait=True):
         return self._client.get_next_packet(wait)
 
+    def fileno(self):
+        return self._client.fileno()
+
     def close(self):
         self._client.close()
 
@@ -961,36 +1087,112 @@ def get_audio_codec_bitrate(profile):
     return None
 
 
-class _codec_h264:
-    _aud = b'\x00\x00\x00\x01\x09\x10'
+class VideoCodecThreading:
+    NONE  = 'NONE'
+    SLICE = 'SLICE'
+    FRAME = 'FRAME'
+    AUTO  = 'AUTO'
+
+
+class _codec_h26x:
+    def __init__(self, name, thread_type, thread_count):
+        self._name = name
+        self._thread_type = thread_type
+        self._thread_count = thread_count
+        self._codec = self._create()
+        self._frames = collections.deque()
+        self._tags = collections.deque()
+        self._serial = 0
+        self.packets_in = 0
+        self.frames_out = 0
+        self.parse_errors = 0
+        self.decode_errors = 0
+
+    def _create(self):
+        codec = av.CodecContext.create(self._name, 'r')
+        codec.thread_type = self._thread_type
+        codec.thread_count = self._thread_count
+        return codec
+
+    def _prepare(self, payload):
+        return payload
+
+    def _match(self, pts):
+        # Packets are numbered through pts, tags of packets that produced no frame are dropped
+        while ((pts is not None) and (len(self._tags) > 0)):
+            serial, tag = self._tags.popleft()
+            if (serial == pts):
+                return tag
+            if (serial > pts):
+                self._tags.appendleft((serial, tag))
+                break
+        return None
 
-    def __init__(self):
-        self._codec = self._codec = av.CodecContext.create('h264', 'r')
+    def _decode(self, packet):
+        try:
+            for frame in self._codec.decode(packet):
+                self._frames.append((self._match(frame.pts), frame))
+                self.frames_out += 1
+        except:
+            self.decode_errors += 1
 
-    def decode(self, payload):
+    def push(self, payload, tag=None):
+        self.packets_in += 1
         try:
-            for packet in self._codec.parse(payload[6:] + _codec_h264._aud):
-                for frame in self._codec.decode(packet):
-                    return frame
+            packets = self._codec.parse(self._prepare(payload))
         except:
-            pass
-        return None
+            self.parse_errors += 1
+            return
+        for packet in packets:
+            packet.pts = self._serial
+            self._tags.append((self._serial, tag))
+            self._serial += 1
+            self._decode(packet)
+
+    def pending(self):
+        return len(self._frames)
 
+    def pop(self):
+        return self._frames.popleft() if (len(self._frames) > 0) else None
+
+    def decode(self, payload):
+        # Frames still pending from earlier payloads are discarded rather than returned for this one
+        marker = object()
+        self.push(payload, marker)
+        frame = None
+        while (len(self._frames) > 0):
+            tag, d = self._frames.popleft()
+            if (tag is marker):
+                frame = d
+        return frame
+
+    def flush(self):
+        self._decode(None)
+        frames = list(self._frames)
+        self._frames.clear()
+        self._tags.clear()
+        self._codec = self._create()
+        return frames
+
+
+class _codec_h264(_codec_h26x):
+    _aud = b'\x00\x00\x00\x01\x09\x10'
+
+    def __init__(self, thread_type=VideoCodecThreading.SLICE, thread_count=0):
+        super().__init__('h264', thread_type, thread_count)
+
+    def _prepare(self, payload):
+        return b''.join((payload[6:], _codec_h264._aud))
 
-class _codec_hevc:
+
+class _codec_hevc(_codec_h26x):
     _aud = b'\x00\x00\x00\x01\x46\x01\x03'
 
-    def __init__(self):
-        self._codec = self._codec = av.CodecContext.create('hevc', 'r')
+    def __init__(self, thread_type=VideoCodecThreading.SLICE, thread_count=0):
+        super().__init__('hevc', thread_type, thread_count)
 
-    def decode(self, payload):
-        try:
-            for packet in self._codec.parse(payload + _codec_hevc._aud):
-                for frame in self._codec.decode(packet):
-                    return frame
-        except:
-            pass
-        return None
+    def _prepare(self, payload):
+        return b''.join((payload, _codec_hevc._aud))
 
 
 class _codec_aac:
@@ -1004,19 +1206,57 @@ class _codec_aac:
         return None
 
 
-def get_video_codec(profile):
+def get_video_codec(profile, thread_type=VideoCodecThreading.SLICE, thread_count=0):
     if (profile == VideoProfile.H264_BASE):
-        return _codec_h264()
+        return _codec_h264(thread_type, thread_count)
     if (profile == VideoProfile.H264_MAIN):
-        return _codec_h264()
+        return _codec_h264(thread_type, thread_count)
     if (profile == VideoProfile.H264_HIGH):
-        return _codec_h264()
+        return _codec_h264(thread_type, thread_count)
     if (profile == VideoProfile.H265_MAIN):
-        return _codec_hevc()
+        return _codec_hevc(thread_type, thread_count)
 
     return None
 
 
+def _h264_is_keyframe(payload, start, end):
+    index = start
+    while (True):
+        index = payload.find(b'\x00\x00\x01', index, end)
+        if ((index < 0) or ((index + 3) >= end)):
+            return None
+        index += 3
+        nal_type = payload[index] & 0x1F
+        if (nal_type in [5, 7, 8]):
+            return True
+        if ((nal_type >= 1) and (nal_type <= 4)):
+            return False
+
+
+def _hevc_is_keyframe(payload, start, end):
+    index = start
+    while (True):
+        index = payload.find(b'\x00\x00\x01', index, end)
+        if ((index < 0) or ((index + 3) >= end)):
+            return None
+        index += 3
+        nal_type = (payload[index] >> 1) & 0x3F
+        if (((nal_type >= 16) and (nal_type <= 23)) or ((nal_type >= 32) and (nal_type <= 34))):
+            return True
+        if (nal_type <= 15):
+            return False
+
+
+def _h26x_scan_keyframe(profile, payload, start, end):
+    # Returns None if no slice or parameter set NAL unit was found in range
+    name = get_video_codec_name(profile)
+    return _h264_is_keyframe(payload, start, end) if (name == 'h264') else _hevc_is_keyframe(payload, start, end) if (name == 'hevc') else True
+
+
+def _h26x_is_keyframe(profile, payload, start, end):
+    return _h26x_scan_keyframe(profile, payload, start, end) == True
+
+
 def get_audio_codec(profile):
     if (profile == AudioProfile.AAC_12000):
         return _codec_aac()
@@ -1076,6 +1316,125 @@ class _decompress_zdepth:
         return np.frombuffer(decompressed, dtype=np.uint16).reshape((height, width))
 
 
+#------------------------------------------------------------------------------
+# Lazy Decoding
+#------------------------------------------------------------------------------
+
+class _lazy_gop:
+    def __init__(self, payloads):
+        self.payloads = payloads
+
+
+class _lazy_cursor:
+    def __init__(self, factory, codec=None):
+        self.factory = factory
+        self._codec = codec
+        self._gop = None
+        self._position = -1
+
+    def decode(self, gop, index, *args):
+        if (self._codec is None):
+            self._codec = self.factory[0](*self.factory[1])
+        if ((self._gop is not gop) or (self._position >= index)):
+            # Restart from the keyframe on a fresh codec, the old one still holds references from the previous position
+            if (self._gop is not None):
+                self._codec = self.factory[0](*self.factory[1])
+            self._gop = gop
+            self._position = -1
+        while (self._position < (index - 1)):
+            self._position += 1
+            self._codec.skip(gop.payloads[self._position])
+        self._position = index
+        return self._codec.decode(gop.payloads[index], *args)
+
+
+class _lazy_value:
+    def __init__(self, cursor, gop, index, args):
+        self._cursor = cursor
+        self._gop = gop
+        self._index = index
+        self._args = args
+        self._decoded = False
+        self._value = None
+
+    def get(self):
+        if (not self._decoded):
+            self._value = self._cursor.decode(self._gop, self._index, *self._args)
+            self._decoded = True
+            self._cursor = None
+            self._gop = None
+        return self._value
+
+    def __getstate__(self):
+        # Decode before crossing processes, the payloads needed grow with the position in the GOP
+        return {'value' : self.get()}
+
+    def __setstate__(self, state):
+        self._value = state['value']
+        self._decoded = True
+        self._cursor = None
+        self._gop = None
+
+
+class _lazy_sequence:
+    def __init__(self, factory, codec):
+        self._cursor = _lazy_cursor(factory, codec)
+        self._gop = None
+
+    def append(self, payload, is_keyframe, *args):
+        # Payloads are kept until the GOP is released, copy views of receive buffers
+        if (isinstance(payload, memoryview)):
+            payload = payload.tobytes()
+        if ((self._gop is None) or is_keyframe(payload)):
+            self._gop = _lazy_gop([])
+        self._gop.payloads.append(payload)
+        return _lazy_value(self._cursor, self._gop, len(self._gop.payloads) - 1, args)
+
+
+#------------------------------------------------------------------------------
+# Frame Decoders
+#------------------------------------------------------------------------------
+
+def _lazy_thread_type(thread_type):
+    # Lazy frames are decoded one payload at a time so frame threading would only add latency
+    return thread_type if (thread_type in [VideoCodecThreading.NONE, VideoCodecThreading.SLICE]) else VideoCodecThreading.SLICE
+
+
+class _decode_h26x:
+    def __init__(self, profile, thread_type, thread_count):
+        self._profile = profile
+        self._codec = get_video_codec(profile, thread_type, thread_count)
+
+    def skip(self, payload):
+        self._codec.decode(payload)
+
+    def push(self, payload, tag):
+        self._codec.push(payload, tag)
+
+    def pop(self):
+        return self._codec.pop()
+
+    def decode(self, payload, *args):
+        return self.convert(self._codec.decode(payload), *args)
+
+
+class _decode_raw:
+    def __init__(self):
+        self._frames = collections.deque()
+
+    def skip(self, payload):
+        pass
+
+    def push(self, payload, tag):
+        self._frames.append((tag, payload))
+
+    def pop(self):
+        return self._frames.popleft() if (len(self._frames) > 0) else None
+
+    def decode(self, payload, *args):
+        return self.convert(payload, *args)
+
+
 #------------------------------------------------------------------------------
 # RM VLC Decoder
 #------------------------------------------------------------------------------
@@ -1088,34 +1447,79 @@ class _RM_VLC_Frame:
         self.gain         = gain
 
 
-class _decode_rm_vlc_h26x:
-    def __init__(self, profile):
-        self._codec = get_video_codec(profile)
+class _RM_VLC_LazyFrame:
+    def __init__(self, image, sensor_ticks, exposure, gain):
+        self._image       = image
+        self.sensor_ticks = sensor_ticks
+        self.exposure     = exposure
+        self.gain         = gain
 
-    def decode(self, payload):
-        d = self._codec.decode(payload)
+    @property
+    def image(self):
+        return self._image.get()
+
+
+class _decode_rm_vlc_h26x(_decode_h26x):
+    def is_keyframe(self, payload):
+        return _h26x_is_keyframe(self._profile, payload, 0, len(payload))
+
+    def convert(self, d):
         return d.to_ndarray()[:Parameters_RM_VLC.HEIGHT, :Parameters_RM_VLC.WIDTH] if (d is not None) else None
 
 
-class _decode_rm_vlc_raw:
-    def decode(self, payload):
+class _decode_rm_vlc_raw(_decode_raw):
+    def is_keyframe(self, payload):
+        return True
+
+    def convert(self, payload):
         return np.frombuffer(payload, dtype=np.uint8).reshape(Parameters_RM_VLC.SHAPE)
 
 
 class decode_rm_vlc:
-    def __init__(self, profile):
-        self._codec = _decode_rm_vlc_raw() if (profile == VideoProfile.RAW) else _decode_rm_vlc_h26x(profile)
-
-    def decode(self, payload):
+    def __init__(self, profile, thread_type=VideoCodecThreading.SLICE, thread_count=0, lazy=False):
+        if (lazy):
+            thread_type = _lazy_thread_type(thread_type)
+        factory = (_decode_rm_vlc_raw, ()) if (profile == VideoProfile.RAW) else (_decode_rm_vlc_h26x, (profile, thread_type, thread_count))
+        self._codec = factory[0](*factory[1])
+        self._lazy = _lazy_sequence(factory, self._codec) if (lazy) else None
+        self._ready = collections.deque()
+
+    def _split(self, payload):
         data     = payload[:-24]
         metadata = payload[-24:]
 
-        image        = self._codec.decode(data)
         sensor_ticks = np.frombuffer(metadata, dtype=np.uint64, offset=0,  count=1)
         exposure     = np.frombuffer(metadata, dtype=np.uint64, offset=8,  count=1)
         gain         = np.frombuffer(metadata, dtype=np.uint32, offset=16, count=1)
 
-        return _RM_VLC_Frame(image, sensor_ticks, exposure, gain)
+        return data, (sensor_ticks, exposure, gain)
+
+    def decode(self, payload):
+        data, metadata = self._split(payload)
+
+        if (self._lazy is not None):
+            return _RM_VLC_LazyFrame(self._lazy.append(data, self._codec.is_keyframe), *metadata)
+
+        image = self._codec.decode(data)
+
+        return _RM_VLC_Frame(image, *metadata)
+
+    def push(self, payload, tag=None):
+        # Frames come out of pop() tagged, possibly several packets later when frame threading is used
+        if (self._lazy is not None):
+            self._ready.append((tag, self.decode(payload)))
+            return
+        data, metadata = self._split(payload)
+        self._codec.push(data, (tag, metadata))
+
+    def pop(self):
+        if (self._lazy is not None):
+            return self._ready.popleft() if (len(self._ready) > 0) else None
+        item = self._codec.pop()
+        if (item is None):
+            return None
+        (tag, metadata), d = item
+        return tag, _RM_VLC_Frame(self._codec.convert(d), *metadata)
 
 
 #------------------------------------------------------------------------------
@@ -1129,7 +1533,21 @@ class _RM_Depth_Frame:
         self.sensor_ticks = sensor_ticks
 
 
-class _decode_rm_depth_ahat_z_ab_h26x:
+class _RM_Depth_LazyFrame:
+    def __init__(self, depth_ab, sensor_ticks):
+        self._depth_ab    = depth_ab
+        self.sensor_ticks = sensor_ticks
+
+    @property
+    def depth(self):
+        return self._depth_ab.get()[0]
+
+    @property
+    def ab(self):
+        return self._depth_ab.get()[1]
+
+
+class _decode_rm_depth_ahat_z_ab_h26x(_decode_h26x):
     TRUNCATE = 4
 
     YS = Parameters_RM_DEPTH_AHAT.HEIGHT
@@ -1142,11 +1560,10 @@ class _decode_rm_depth_ahat_z_ab_h26x:
     BEGIN_I_V = END_I_U
     END_I_V   = BEGIN_I_V + CS
 
-    def __init__(self, profile):
-        self._codec = get_video_codec(profile)
+    def is_keyframe(self, payload, start):
+        return _h26x_is_keyframe(self._profile, payload, start, len(payload))
 
-    def decode(self, payload):
-        d = self._codec.decode(payload)
+    def convert(self, d):
         if (d is None):
             return None, None
         yuv = d.to_ndarray()
@@ -1169,28 +1586,33 @@ class _decode_rm_depth_ahat_z_ab_h26x:
         return depth, ab
 
 
-class _decode_rm_depth_ahat_z_ab_raw:
+class _decode_rm_depth_ahat_z_ab_raw(_decode_raw):
     _Z = 0
     _I = Parameters_RM_DEPTH_AHAT.PIXELS * _SIZEOF.WORD
 
-    def decode(self, payload):
+    def is_keyframe(self, payload, start):
+        return True
+
+    def convert(self, payload):
         depth = np.frombuffer(payload, dtype=np.uint16, offset=_decode_rm_depth_ahat_z_ab_raw._Z, count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
         ab    = np.frombuffer(payload, dtype=np.uint16, offset=_decode_rm_depth_ahat_z_ab_raw._I, count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
         
         return depth, ab
 
 
-class _decode_rm_depth_ahat_x_ab_h26x:
-    def __init__(self, profile):
-        self._codec = get_video_codec(profile)
+class _decode_rm_depth_ahat_x_ab_h26x(_decode_h26x):
+    def is_keyframe(self, payload, start):
+        return _h26x_is_keyframe(self._profile, payload, start, len(payload))
 
-    def decode(self, payload):
-        d = self._codec.decode(payload)
+    def convert(self, d):
         return np.square(d.to_ndarray()[:Parameters_RM_DEPTH_AHAT.HEIGHT, :Parameters_RM_DEPTH_AHAT.WIDTH], dtype=np.uint16) if (d is not None) else None
 
 
-class _decode_rm_depth_ahat_x_ab_raw:
-    def decode(self, payload):
+class _decode_rm_depth_ahat_x_ab_raw(_decode_raw):
+    def is_keyframe(self, payload, start):
+        return True
+
+    def convert(self, payload):
         return np.frombuffer(payload, dtype=np.uint16, offset=0, count=Parameters_RM_DEPTH_AHAT.PIXELS).reshape(Parameters_RM_DEPTH_AHAT.SHAPE)
 
 
@@ -1199,21 +1621,45 @@ class _decode_rm_depth_ahat:
 
 
 class _decode_rm_depth_ahat_same:
-    def __init__(self, profile, base):
-        self._codec_f = _decode_rm_depth_ahat_z_ab_raw() if (profile == VideoProfile.RAW) else _decode_rm_depth_ahat_z_ab_h26x(profile)
+    def __init__(self, profile, base, thread_type, thread_count):
+        self._codec_f = _decode_rm_depth_ahat_z_ab_raw() if (profile == VideoProfile.RAW) else _decode_rm_depth_ahat_z_ab_h26x(profile, thread_type, thread_count)
         self._base = base
 
+    def is_keyframe(self, payload):
+        return self._codec_f.is_keyframe(payload, self._base)
+
+    def skip(self, payload):
+        self._codec_f.skip(payload[self._base:])
+
+    def push(self, payload, tag):
+        self._codec_f.push(payload[self._base:], tag)
+
+    def pop(self):
+        return self._codec_f.pop()
+
+    def convert(self, frame):
+        return self._codec_f.convert(frame)
+
     def decode(self, payload):
         return self._codec_f.decode(payload[self._base:])
 
 
 class _decode_rm_depth_ahat_zdepth:
-    def __init__(self, profile, base):
+    def __init__(self, profile, base, thread_type, thread_count):
         self._codec_z = _decompress_zdepth()
-        self._codec_i = _decode_rm_depth_ahat_x_ab_raw() if (profile == VideoProfile.RAW) else _decode_rm_depth_ahat_x_ab_h26x(profile)
+        self._codec_i = _decode_rm_depth_ahat_x_ab_raw() if (profile == VideoProfile.RAW) else _decode_rm_depth_ahat_x_ab_h26x(profile, thread_type, thread_count)
         self._base = base
 
-    def decode(self, payload):
+    def is_keyframe(self, payload):
+        size_z, size_i = struct.unpack_from('<II', payload, 0)
+        return self._codec_i.is_keyframe(payload, self._base + size_z)
+
+    def skip(self, payload):
+        size_z, size_i = struct.unpack_from('<II', payload, 0)
+        start_i = self._base + size_z
+        self._codec_i.skip(payload[start_i:(start_i + size_i)])
+
+    def _split(self, payload):
         size_z, size_i = struct.unpack_from('<II', payload, 0)
 
         start_z = self._base
@@ -1221,27 +1667,84 @@ class _decode_rm_depth_ahat_zdepth:
         start_i = end_z
         end_i   = start_i + size_i
 
-        depth = self._codec_z.decode(payload[start_z:end_z])
-        ab    = self._codec_i.decode(payload[start_i:end_i])
+        return payload[start_z:end_z], payload[start_i:end_i]
+
+    def push(self, payload, tag):
+        # Depth is decompressed right away and waits for its AB frame
+        data_z, data_i = self._split(payload)
+        self._codec_i.push(data_i, (tag, self._codec_z.decode(data_z)))
+
+    def pop(self):
+        item = self._codec_i.pop()
+        if (item is None):
+            return None
+        (tag, depth), frame = item
+        return tag, (depth, frame)
+
+    def convert(self, frame):
+        return frame[0], self._codec_i.convert(frame[1])
+
+    def decode(self, payload):
+        data_z, data_i = self._split(payload)
+
+        depth = self._codec_z.decode(data_z)
+        ab    = self._codec_i.decode(data_i)
         
         return depth, ab
 
 
 class decode_rm_depth_ahat:
-    def __init__(self, profile_z, profile_ab, base=_decode_rm_depth_ahat.BASE):
-        self._codec = _decode_rm_depth_ahat_same(profile_ab, base) if (profile_z == DepthProfile.SAME) else _decode_rm_depth_ahat_zdepth(profile_ab, base)
-
-    def decode(self, payload):
+    def __init__(self, profile_z, profile_ab, base=_decode_rm_depth_ahat.BASE, thread_type=VideoCodecThreading.SLICE, thread_count=0, lazy=False):
+        if (lazy):
+            thread_type = _lazy_thread_type(thread_type)
+        factory = (_decode_rm_depth_ahat_same, (profile_ab, base, thread_type, thread_count)) if (profile_z == DepthProfile.SAME) else (_decode_rm_depth_ahat_zdepth, (profile_ab, base, thread_type, thread_count))
+        self._codec = factory[0](*factory[1])
+        self._lazy = _lazy_sequence(factory, self._codec) if (lazy) else None
+        self._ready = collections.deque()
+
+    def _split(self, payload):
         data     = payload[:-8]
         metadata = payload[-8:]
 
-        depth, ab    = self._codec.decode(data)
         sensor_ticks = np.frombuffer(metadata, dtype=np.uint64, offset=0, count=1)
 
+        return data, sensor_ticks
+
+    def decode(self, payload):
+        data, sensor_ticks = self._split(payload)
+
+        if (self._lazy is not None):
+            return _RM_Depth_LazyFrame(self._lazy.append(data, self._codec.is_keyframe), sensor_ticks)
+
+        depth, ab = self._codec.decode(data)
+
         return _RM_Depth_Frame(depth, ab, sensor_ticks)
 
+    def push(self, payload, tag=None):
+        if (self._lazy is not None):
+            self._ready.append((tag, self.decode(payload)))
+            return
+        data, sensor_ticks = self._split(payload)
+        self._codec.push(data, (tag, sensor_ticks))
+
+    def pop(self):
+        if (self._lazy is not None):
+            return self._ready.popleft() if (len(self._ready) > 0) else None
+        item = self._codec.pop()
+        if (item is None):
+            return None
+        (tag, sensor_ticks), frame = item
+        depth, ab = self._codec.convert(frame)
+        return tag, _RM_Depth_Frame(depth, ab, sensor_ticks)
+
 
 class _decode_rm_depth_longthrow_png:
+    def is_keyframe(self, payload):
+        return True
+
+    def skip(self, payload):
+        pass
+
     def decode(self, payload):
         composite = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
         h, w, _   = composite.shape
@@ -1256,6 +1759,12 @@ class _decode_rm_depth_longthrow_raw:
     _Z = 0
     _I = Parameters_RM_DEPTH_LONGTHROW.PIXELS * _SIZEOF.WORD
 
+    def is_keyframe(self, payload):
+        return True
+
+    def skip(self, payload):
+        pass
+
     def decode(self, payload):
         depth = np.frombuffer(payload, dtype=np.uint16, offset=_decode_rm_depth_longthrow_raw._Z, count=Parameters_RM_DEPTH_LONGTHROW.PIXELS).reshape(Parameters_RM_DEPTH_LONGTHROW.SHAPE)
         ab    = np.frombuffer(payload, dtype=np.uint16, offset=_decode_rm_depth_longthrow_raw._I, count=Parameters_RM_DEPTH_LONGTHROW.PIXELS).reshape(Parameters_RM_DEPTH_LONGTHROW.SHAPE)
@@ -1264,16 +1773,22 @@ class _decode_rm_depth_longthrow_raw:
 
 
 class decode_rm_depth_longthrow:
-    def __init__(self, profile):
-        self._codec = _decode_rm_depth_longthrow_raw() if (profile == VideoProfile.RAW) else _decode_rm_depth_longthrow_png()
+    def __init__(self, profile, lazy=False):
+        factory = (_decode_rm_depth_longthrow_raw, ()) if (profile == VideoProfile.RAW) else (_decode_rm_depth_longthrow_png, ())
+        self._codec = factory[0](*factory[1])
+        self._lazy = _lazy_sequence(factory, self._codec) if (lazy) else None
 
     def decode(self, payload):
         data     = payload[:-8]
         metadata = payload[-8:]
 
-        depth, ab    = self._codec.decode(data)
         sensor_ticks = np.frombuffer(metadata, dtype=np.uint64, offset=0, count=1)
 
+        if (self._lazy is not None):
+            return _RM_Depth_LazyFrame(self._lazy.append(data, self._codec.is_keyframe), sensor_ticks)
+
+        depth, ab = self._codec.decode(data)
+
         return _RM_Depth_Frame(depth, ab, sensor_ticks)
 
 
@@ -1351,20 +1866,135 @@ class _PV_Frame:
         self.resolution            = resolution
 
 
+class _PV_LazyFrame:
+    def __init__(self, image, focal_length, principal_point, exposure_time, exposure_compensation, lens_position, focus_state, iso_speed, white_balance, iso_gains, white_balance_gains, resolution):
+        self._image                = image
+        self.focal_length          = focal_length
+        self.principal_point       = principal_point
+        self.exposure_time         = exposure_time
+        self.exposure_compensation = exposure_compensation
+        self.lens_position         = lens_position
+        self.focus_state           = focus_state
+        self.iso_speed             = iso_speed
+        self.white_balance         = white_balance
+        self.iso_gains             = iso_gains
+        self.white_balance_gains   = white_balance_gains
+        self.resolution            = resolution
+
+    @property
+    def image(self):
+        return self._image.get()
+
+
 def pv_get_video_stride(width):
     return (width + 63) & ~63
 
 
-class _decode_pv_h26x:
-    def __init__(self, profile):
-        self._codec = get_video_codec(profile)
+_pv_channels = {
+    'rgb24'   : 3,
+    'bgr24'   : 3,
+    'rgba'    : 4,
+    'bgra'    : 4,
+    'gray8'   : 1,
+    'nv12'    : 0,
+    'yuv420p' : 0,
+}
+
+
+def pv_get_output_shape(width, height, format):
+    channels = _pv_channels.get(format, None)
+    return None if (channels is None) else (((height * 3) // 2, width) if (channels == 0) else (height, width) if (channels == 1) else (height, width, channels))
+
+
+class _buffer_pool:
+    def __init__(self, size):
+        self._size = size
+        self._buffers = []
+        self._index = 0
+
+    def get(self, shape):
+        if (self._index >= len(self._buffers)):
+            self._buffers.append(np.empty(shape, dtype=np.uint8))
+        elif (self._buffers[self._index].shape != shape):
+            self._buffers[self._index] = np.empty(shape, dtype=np.uint8)
+        buffer = self._buffers[self._index]
+        self._index = (self._index + 1) % self._size
+        return buffer
+
+
+def _pv_plane(plane, width, height, channels=1):
+    return np.frombuffer(plane, dtype=np.uint8).reshape((-1, plane.line_size))[:height, :(width * channels)]
+
+
+def _pv_copy_yuv420p(frame, format, out):
+    width  = frame.width
+    height = frame.height
+    if (out is None):
+        out = np.empty(pv_get_output_shape(width, height, format), dtype=np.uint8)
+    cw = width // 2
+    ch = height // 2
+    flat = out.reshape((-1,))
+    flat[:(width * height)].reshape((height, width))[:, :] = _pv_plane(frame.planes[0], width, height)
+    u = _pv_plane(frame.planes[1], cw, ch)
+    v = _pv_plane(frame.planes[2], cw, ch)
+    if (format == 'nv12'):
+        uv = flat[(width * height):].reshape((ch, cw, 2))
+        uv[:, :, 0] = u
+        uv[:, :, 1] = v
+    else:
+        flat[(width * height):((width * height) + (cw * ch))].reshape((ch, cw))[:, :] = u
+        flat[((width * height) + (cw * ch)):].reshape((ch, cw))[:, :] = v
+    return out
+
+
+def _pv_copy_nv12_to_yuv420p(image, width, height, out):
+    if (out is None):
+        out = np.empty(pv_get_output_shape(width, height, 'yuv420p'), dtype=np.uint8)
+    cw = width // 2
+    ch = height // 2
+    flat = out.reshape((-1,))
+    flat[:(width * height)].reshape((height, width))[:, :] = image[:height, :]
+    uv = image[height:, :(cw * 2)].reshape((ch, cw, 2))
+    flat[(width * height):((width * height) + (cw * ch))].reshape((ch, cw))[:, :] = uv[:, :, 0]
+    flat[((width * height) + (cw * ch)):].reshape((ch, cw))[:, :] = uv[:, :, 1]
+    return out
+
+
+class _decode_pv_h26x(_decode_h26x):
+    # Limited range BT.601 only, gray8 is left to PyAV since it expands the luma range
+    _cv2_i420_format = {
+        'rgb24' : cv2.COLOR_YUV2RGB_I420,
+        'bgr24' : cv2.COLOR_YUV2BGR_I420,
+        'rgba'  : cv2.COLOR_YUV2RGBA_I420,
+        'bgra'  : cv2.COLOR_YUV2BGRA_I420,
+    }
 
-    def decode(self, payload, width, height, format):
-        d = self._codec.decode(payload)
-        return d.to_ndarray(format=format) if (d is not None) else None
+    def __init__(self, profile, thread_type, thread_count):
+        super().__init__(profile, thread_type, thread_count)
+        self._i420 = _buffer_pool(1)
 
+    def is_keyframe(self, payload):
+        return _h26x_is_keyframe(self._profile, payload, 0, len(payload))
 
-class _decode_pv_raw:
+    def convert(self, d, width, height, format, out=None):
+        if (d is None):
+            return None
+        planar = d.format.name in ['yuv420p', 'yuvj420p']
+        if (planar and (_pv_channels.get(format, None) == 0)):
+            return _pv_copy_yuv420p(d, format, out)
+        if (out is None):
+            return d.to_ndarray(format=format)
+        # color_range 2 is full (JPEG) range
+        if ((d.format.name == 'yuv420p') and (d.color_range != 2) and (format in _decode_pv_h26x._cv2_i420_format)):
+            # Convert from a reused I420 buffer straight into out, PyAV can only convert into a new frame
+            # Pixels may differ by a few levels from the PyAV conversion used without out due to rounding
+            i420 = _pv_copy_yuv420p(d, 'yuv420p', self._i420.get(pv_get_output_shape(d.width, d.height, 'yuv420p')))
+            return cv2.cvtColor(i420, _decode_pv_h26x._cv2_i420_format[format], dst=out)
+        out[...] = _pv_plane(d.reformat(format=format).planes[0], d.width, d.height, _pv_channels[format]).reshape(out.shape)
+        return out
+
+
+class _decode_pv_raw(_decode_raw):
     _cv2_nv12_format = {
         'rgb24' : cv2.COLOR_YUV2RGB_NV12,
         'bgr24' : cv2.COLOR_YUV2BGR_NV12,
@@ -1374,37 +2004,103 @@ class _decode_pv_raw:
         'nv12'  : None
     }
 
-    def decode(self, payload, width, height, format):
+    def is_keyframe(self, payload):
+        return True
+
+    def convert(self, payload, width, height, format, out=None):
         image = np.frombuffer(payload, dtype=np.uint8)
         if (format == 'any'):
             return image
         image = image.reshape(((height * 3) // 2, -1))[:, :width]
+        if (format == 'yuv420p'):
+            return _pv_copy_nv12_to_yuv420p(image, width, height, out)
         sf = _decode_pv_raw._cv2_nv12_format[format]
-        return image if (sf is None) else cv2.cvtColor(image, sf)
+        if (out is None):
+            return image if (sf is None) else cv2.cvtColor(image, sf)
+        if (sf is None):
+            out[...] = image
+            return out
+        return cv2.cvtColor(image, sf, dst=out)
 
 
 class decode_pv:
-    def __init__(self, profile):
-        self._codec =  _decode_pv_raw() if (profile == VideoProfile.RAW) else _decode_pv_h26x(profile)
-
-    def decode(self, payload, format):
+    _metadata = np.dtype([
+        ('focal_length',          '<f4', (2,)),
+        ('principal_point',       '<f4', (2,)),
+        ('exposure_time',         '<u8'),
+        ('exposure_compensation', '<u8', (2,)),
+        ('lens_position',         '<u4'),
+        ('focus_state',           '<u4'),
+        ('iso_speed',             '<u4'),
+        ('white_balance',         '<u4'),
+        ('iso_gains',             '<f4', (2,)),
+        ('white_balance_gains',   '<f4', (3,)),
+        ('resolution',            '<u2', (2,)),
+    ])
+
+    def __init__(self, profile, thread_type=VideoCodecThreading.SLICE, thread_count=0, lazy=False, pool_size=0):
+        if (lazy):
+            thread_type = _lazy_thread_type(thread_type)
+        factory = (_decode_pv_raw, ()) if (profile == VideoProfile.RAW) else (_decode_pv_h26x, (profile, thread_type, thread_count))
+        self._codec = factory[0](*factory[1])
+        self._lazy = _lazy_sequence(factory, self._codec) if (lazy) else None
+        self._pool = _buffer_pool(pool_size) if (pool_size > 0) else None
+        self._ready = collections.deque()
+
+    def _split(self, payload):
         data     = payload[:-80]
-        metadata = payload[-80:]
-
-        focal_length          = np.frombuffer(metadata, dtype=np.float32, offset=0,  count=2)
-        principal_point       = np.frombuffer(metadata, dtype=np.float32, offset=8,  count=2)
-        exposure_time         = np.frombuffer(metadata, dtype=np.uint64,  offset=16, count=1)
-        exposure_compensation = np.frombuffer(metadata, dtype=np.uint64,  offset=24, count=2)
-        lens_position         = np.frombuffer(metadata, dtype=np.uint32,  offset=40, count=1)
-        focus_state           = np.frombuffer(metadata, dtype=np.uint32,  offset=44, count=1)
-        iso_speed             = np.frombuffer(metadata, dtype=np.uint32,  offset=48, count=1)
-        white_balance         = np.frombuffer(metadata, dtype=np.uint32,  offset=52, count=1)
-        iso_gains             = np.frombuffer(metadata, dtype=np.float32, offset=56, count=2)
-        white_balance_gains   = np.frombuffer(metadata, dtype=np.float32, offset=64, count=3)
-        resolution            = np.frombuffer(metadata, dtype=np.uint16,  offset=76, count=2)
-        image                 = self._codec.decode(data, resolution[0], resolution[1], format)
-
-        return _PV_Frame(image, focal_length, principal_point, exposure_time, exposure_compensation, lens_position, focus_state, iso_speed, white_balance, iso_gains, white_balance_gains, resolution)
+        metadata = np.frombuffer(payload[-80:], dtype=decode_pv._metadata)
+
+        focal_length          = metadata['focal_length'][0]
+        principal_point       = metadata['principal_point'][0]
+        exposure_time         = metadata['exposure_time']
+        exposure_compensation = metadata['exposure_compensation'][0]
+        lens_position         = metadata['lens_position']
+        focus_state           = metadata['focus_state']
+        iso_speed             = metadata['iso_speed']
+        white_balance         = metadata['white_balance']
+        iso_gains             = metadata['iso_gains'][0]
+        white_balance_gains   = metadata['white_balance_gains'][0]
+        resolution            = metadata['resolution'][0]
+
+        return data, (focal_length, principal_point, exposure_time, exposure_compensation, lens_position, focus_state, iso_speed, white_balance, iso_gains, white_balance_gains, resolution)
+
+    def _get_out(self, resolution, format, out):
+        if ((out is None) and (self._pool is not None)):
+            shape = pv_get_output_shape(resolution[0], resolution[1], format)
+            if (shape is not None):
+                out = self._pool.get(shape)
+        return out
+
+    def decode(self, payload, format, out=None):
+        data, metadata = self._split(payload)
+        resolution = metadata[-1]
+
+        if (self._lazy is not None):
+            return _PV_LazyFrame(self._lazy.append(data, self._codec.is_keyframe, resolution[0], resolution[1], format), *metadata)
+
+        image = self._codec.decode(data, resolution[0], resolution[1], format, self._get_out(resolution, format, out))
+
+        return _PV_Frame(image, *metadata)
+
+    def push(self, payload, format, tag=None):
+        # Frames come out of pop() tagged, possibly several packets later when frame threading is used
+        if (self._lazy is not None):
+            self._ready.append((tag, self.decode(payload, format)))
+            return
+        data, metadata = self._split(payload)
+        self._codec.push(data, (tag, format, metadata))
+
+    def pop(self, out=None):
+        if (self._lazy is not None):
+            return self._ready.popleft() if (len(self._ready) > 0) else None
+        item = self._codec.pop()
+        if (item is None):
+            return None
+        (tag, format, metadata), d = item
+        resolution = metadata[-1]
+        image = self._codec.convert(d, resolution[0], resolution[1], format, self._get_out(resolution, format, out))
+        return tag, _PV_Frame(image, *metadata)
 
 
 #------------------------------------------------------------------------------
@@ -1701,55 +2397,68 @@ class decode_extended_depth:
 #------------------------------------------------------------------------------
 
 class rx_decoded_rm_vlc(rx_rm_vlc):
-    def __init__(self, host, port, sockopt, chunk, mode, divisor, profile, level, bitrate, options):
+    def __init__(self, host, port, sockopt, chunk, mode, divisor, profile, level, bitrate, options, lazy=False, thread_type=VideoCodecThreading.SLICE, thread_count=0):
         super().__init__(host, port, sockopt, chunk, mode, divisor, profile, level, bitrate, options)
+        self.lazy = lazy
+        self.thread_type = thread_type
+        self.thread_count = thread_count
 
     def open(self):
-        self._codec = decode_rm_vlc(self.profile)
+        self._codec = decode_rm_vlc(self.profile, self.thread_type, self.thread_count, self.lazy)
         super().open()
 
     def get_next_packet(self, wait=True):
+        # Packets are pushed as tags so every frame keeps its own metadata and pose
         while (True):
+            item = self._codec.pop()
+            if (item is not None):
+                data = item[0]
+                data.payload = item[1]
+                return data
             data = super().get_next_packet(wait)
-            if (data is not None):
-                data.payload = self._codec.decode(data.payload)
-                if (data.payload.image is not None):
-                    return data
-            if (not wait):
+            if (data is None):
                 return None
+            self._codec.push(data.payload, data)
 
     def close(self):
         super().close()
 
 
 class rx_decoded_rm_depth_ahat(rx_rm_depth_ahat):
-    def __init__(self, host, port, sockopt, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options):
+    def __init__(self, host, port, sockopt, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options, lazy=False, thread_type=VideoCodecThreading.SLICE, thread_count=0):
         super().__init__(host, port, sockopt, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options)
+        self.lazy = lazy
+        self.thread_type = thread_type
+        self.thread_count = thread_count
         
     def open(self):
-        self._codec = decode_rm_depth_ahat(self.profile_z, self.profile_ab)
+        self._codec = decode_rm_depth_ahat(self.profile_z, self.profile_ab, thread_type=self.thread_type, thread_count=self.thread_count, lazy=self.lazy)
         super().open()
 
     def get_next_packet(self, wait=True):
+        # Packets are pushed as tags so every frame keeps its own metadata and pose
         while (True):
+            item = self._codec.pop()
+            if (item is not None):
+                data = item[0]
+                data.payload = item[1]
+                return data
             data = super().get_next_packet(wait)
-            if (data is not None):
-                data.payload = self._codec.decode(data.payload)
-                if ((data.payload.depth is not None) and (data.payload.ab is not None)):
-                    return data
-            if (not wait):
+            if (data is None):
                 return None
+            self._codec.push(data.payload, data)
 
     def close(self):
         super().close()
 
 
 class rx_decoded_rm_depth_longthrow(rx_rm_depth_longthrow):
-    def __init__(self, host, port, sockopt, chunk, mode, divisor, png_filter):
+    def __init__(self, host, port, sockopt, chunk, mode, divisor, png_filter, lazy=False):
         super().__init__(host, port, sockopt, chunk, mode, divisor, png_filter)
+        self.lazy = lazy
 
     def open(self):
-        self._codec = decode_rm_depth_longthrow(self.png_filter)
+        self._codec = decode_rm_depth_longthrow(self.png_filter, lazy=self.lazy)
         super().open()
 
     def get_next_packet(self, wait=True):
@@ -1781,23 +2490,30 @@ class rx_decoded_rm_imu(rx_rm_imu):
 
 
 class rx_decoded_pv(rx_pv):
-    def __init__(self, host, port, sockopt, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options, format):
+    def __init__(self, host, port, sockopt, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options, format, lazy=False, pool_size=0, thread_type=VideoCodecThreading.SLICE, thread_count=0):
         super().__init__(host, port, sockopt, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options)
         self.format = format
+        self.lazy = lazy
+        self.pool_size = pool_size
+        self.thread_type = thread_type
+        self.thread_count = thread_count
         
     def open(self):        
-        self._codec = decode_pv(self.profile)
+        self._codec = decode_pv(self.profile, self.thread_type, self.thread_count, self.lazy, self.pool_size)
         super().open()
 
     def get_next_packet(self, wait=True):
+        # Packets are pushed as tags so every frame keeps its own metadata and pose
         while (True):
+            item = self._codec.pop()
+            if (item is not None):
+                data = item[0]
+                data.payload = item[1]
+                return data
             data = super().get_next_packet(wait)
-            if (data is not None):
-                data.payload = self._codec.decode(data.payload, self.format)
-                if (data.payload.image is not None):
-                    return data
-            if (not wait):
+            if (data is None):
                 return None
+            self._codec.push(data.payload, self.format, data)
 
     def close(self):
         super().close()
@@ -1,5 +1,12 @@
 
 import numpy as np
+import concurrent.futures
+import threading as mt
+import collections
+import hashlib
+import struct
+import json
+import copy
 import os
 import cv2
 import hl2ss
@@ -87,6 +94,14 @@ def project(points, projection4x4):
     return to_inhomogeneous(transform(points, projection4x4))
 
 
+def compose(*transforms4x4):
+    # Row vector convention, transforms are applied left to right
+    chain = np.eye(4, 4, dtype=np.float64)
+    for transform4x4 in transforms4x4:
+        chain = chain @ transform4x4.astype(np.float64)
+    return chain.astype(np.float32)
+
+
 def extrinsics_to_Rt(extrinsics):
     return (extrinsics[:3, :3], extrinsics[3, :3].reshape((1, 3)))
 
@@ -103,6 +118,85 @@ def essential_to_fundamental(image_to_camera_1, image_to_camera_2, essential):
     return image_to_camera_1 @ essential @ image_to_camera_2.transpose()
 
 
+#------------------------------------------------------------------------------
+# Point Pipeline
+#------------------------------------------------------------------------------
+
+class point_pipeline:
+    '''
+    Float32 point transforms into preallocated buffers. Compose the 4x4 chain
+    once per frame with compose() and apply it here in a single product.
+    Returned arrays are views of the internal buffers (or out) and are
+    overwritten by the next call.
+    '''
+    def __init__(self, count):
+        self._points  = np.empty((count, 3), dtype=np.float32)
+        self._scratch = np.empty((count, 3), dtype=np.float32)
+        self._pixels  = np.empty((count, 2), dtype=np.float32)
+        self._depth   = np.empty((count, 1), dtype=np.float32)
+        self._mask    = np.empty((count,),   dtype=np.bool_)
+        self._limit   = np.empty((count,),   dtype=np.bool_)
+
+    def _apply(self, points, transform4x4, out):
+        # Single pass affine transform, cv2 uses column vectors
+        if (points.dtype != np.float32):
+            points = points.astype(np.float32)
+        cv2.transform(points.reshape((-1, 1, 3)), transform4x4[:, :3].transpose().astype(np.float32), dst=out.reshape((-1, 1, 3)))
+        return out
+
+    def depth_to_points(self, rays, depth, transform4x4=None, min_depth=0, max_depth=None, compact=True, out=None):
+        '''
+        Computes (rays * depth) @ transform4x4 and the mask of points with
+        min_depth < depth <= max_depth. With compact=True only valid points
+        are returned as a list, otherwise points keep the shape of rays.
+        '''
+        shape = rays.shape
+        rays  = rays.reshape((-1, 3))
+        depth = depth.reshape((-1, 1))
+        count = rays.shape[0]
+
+        mask = self._mask[:count]
+        np.greater(depth[:, 0], min_depth, out=mask)
+        if (max_depth is not None):
+            np.less_equal(depth[:, 0], max_depth, out=self._limit[:count])
+            np.logical_and(mask, self._limit[:count], out=mask)
+
+        if (compact):
+            count = np.count_nonzero(mask)
+            np.compress(mask, rays,  axis=0, out=self._scratch[:count])
+            np.compress(mask, depth, axis=0, out=self._depth[:count])
+            rays  = self._scratch[:count]
+            depth = self._depth[:count]
+
+        points = self._points[:count] if (out is None) else out.reshape((-1, 3))[:count]
+        if (transform4x4 is None):
+            np.multiply(rays, depth, out=points)
+        else:
+            np.multiply(rays, depth, out=self._scratch[:count])
+            self._apply(self._scratch[:count], transform4x4, points)
+
+        return (points if (compact) else points.reshape(shape), mask)
+
+    def transform(self, points, transform4x4, out=None):
+        shape = points.shape
+        points = points.reshape((-1, 3))
+        count = points.shape[0]
+        result = self._points[:count] if (out is None) else out.reshape((-1, 3))
+        if (np.may_share_memory(points, result)):
+            np.copyto(self._scratch[:count], points)
+            points = self._scratch[:count]
+        return self._apply(points, transform4x4, result).reshape(shape)
+
+    def project(self, points, projection4x4, out=None):
+        shape = points.shape[:-1] + (2,)
+        points = points.reshape((-1, 3))
+        count = points.shape[0]
+        image = self._apply(points, projection4x4, self._scratch[:count])
+        pixels = self._pixels[:count] if (out is None) else out.reshape((-1, 2))
+        np.divide(image[:, 0:2], image[:, 2:3], out=pixels)
+        return pixels.reshape(shape)
+
+
 #------------------------------------------------------------------------------
 # RM VLC
 #------------------------------------------------------------------------------
@@ -154,10 +248,22 @@ def rm_vlc_rotate_image(image, rotation):
     return cv2.rotate(image, rotation)
 
 
-def rm_vlc_undistort(image, undistort_map, interpolation=cv2.INTER_LINEAR):
+def convert_undistort_map(undistort_map, nearest=False):
+    map1, map2 = cv2.convertMaps(undistort_map[:, :, 0], undistort_map[:, :, 1], cv2.CV_16SC2, nninterpolation=nearest)
+    return (map1, map2)
+
+
+def undistort(image, undistort_map, interpolation):
+    # Accepts float32 HxWx2 maps or fixed-point (map1, map2) from convert_undistort_map
+    if (isinstance(undistort_map, tuple)):
+        return cv2.remap(image, undistort_map[0], undistort_map[1], interpolation)
     return cv2.remap(image, undistort_map[:, :, 0], undistort_map[:, :, 1], interpolation)
 
 
+def rm_vlc_undistort(image, undistort_map, interpolation=cv2.INTER_LINEAR):
+    return undistort(image, undistort_map, interpolation)
+
+
 def rm_vlc_to_rgb(image):
     return np.dstack((image, image, image))
 
@@ -171,7 +277,7 @@ def rm_depth_normalize(depth, scale):
 
 
 def rm_depth_undistort(depth, undistort_map):
-    return cv2.remap(depth, undistort_map[:, :, 0], undistort_map[:, :, 1], cv2.INTER_NEAREST)
+    return undistort(depth, undistort_map, cv2.INTER_NEAREST)
 
 
 def rm_depth_compute_rays(uv2xy, depth_scale):
@@ -193,7 +299,7 @@ def rm_ab_normalize(ab):
 
 
 def rm_ab_undistort(ab, undistort_map, interpolation=cv2.INTER_LINEAR):
-    return cv2.remap(ab, undistort_map[:, :, 0], undistort_map[:, :, 1], interpolation)
+    return undistort(ab, undistort_map, interpolation)
 
 
 def rm_ab_to_rgb(ab):
@@ -227,6 +333,226 @@ def pv_fix_calibration(intrinsics, extrinsics):
     return (intrinsics, extrinsics)
 
 
+#------------------------------------------------------------------------------
+# Depth Registration
+#------------------------------------------------------------------------------
+
+def rm_depth_register(depth, rays, depth_to_world, world_to_camera, camera_to_image, width, height, max_footprint=None, hole_fill=0):
+    # depth: normalized depth (rm_depth_normalize), rays: xy1 grid
+    # (rm_depth_compute_rays)
+    # Each depth pixel covers the rectangle between the projections of its
+    # top-left and bottom-right ray corners, the nearest depth wins where
+    # rectangles overlap
+    # Footprints are clipped to max_footprint pixels, by default the size of a
+    # depth pixel in the target image from the intrinsics plus rounding
+    # Returns camera space depth in the target image (0 where empty)
+    if (max_footprint is None):
+        spacing = np.abs(rays[1:, 1:, 0:2] - rays[:-1, :-1, 0:2]).reshape((-1, 2)).max(axis=0)
+        max_footprint = int(np.ceil(max(abs(camera_to_image[0, 0]) * spacing[0], abs(camera_to_image[1, 1]) * spacing[1]))) + 2
+    mask = depth[:-1, :-1, 0] > 0
+    z = depth[:-1, :-1, :][mask]
+
+    depth_to_camera = depth_to_world @ world_to_camera
+    points_o = transform(rays[:-1, :-1, :][mask] * z, depth_to_camera)
+    points_d = transform(rays[1:, 1:, :][mask] * z, depth_to_camera)
+    uv_o = np.floor(project(points_o, camera_to_image))
+    uv_d = np.floor(project(points_d, camera_to_image)) + 1
+    z = points_o[:, 2]
+
+    valid = (z > 0) & (uv_o[:, 0] >= 0) & (uv_o[:, 0] < width) & (uv_d[:, 0] >= 0) & (uv_d[:, 0] <= width) & (uv_o[:, 1] >= 0) & (uv_o[:, 1] < height) & (uv_d[:, 1] >= 0) & (uv_d[:, 1] <= height)
+
+    z = z[valid].astype(np.float32)
+    u0 = uv_o[valid, 0].astype(np.int32)
+    v0 = uv_o[valid, 1].astype(np.int32)
+    w = np.clip(uv_d[valid, 0].astype(np.int32) - u0, 0, max_footprint)
+    h = np.clip(uv_d[valid, 1].astype(np.int32) - v0, 0, max_footprint)
+    base = v0 * width + u0
+
+    index = []
+    value = []
+    for dv in range(int(h.max()) if (len(h) > 0) else 0):
+        for du in range(int(w.max())):
+            select = (w > du) & (h > dv)
+            index.append(base[select] + (dv * width + du))
+            value.append(z[select])
+
+    buffer = np.full(height * width, np.inf, dtype=np.float32)
+    if (len(index) > 0):
+        np.minimum.at(buffer, np.concatenate(index), np.concatenate(value))
+    buffer = buffer.reshape((height, width))
+
+    if (hole_fill > 0):
+        # Empty pixels take the nearest depth found within hole_fill pixels
+        kernel = np.ones((2 * hole_fill + 1, 2 * hole_fill + 1), dtype=np.uint8)
+        nearest = cv2.erode(np.where(np.isinf(buffer), np.finfo(np.float32).max, buffer), kernel)
+        empty = np.isinf(buffer) & (nearest < np.finfo(np.float32).max)
+        buffer[empty] = nearest[empty]
+
+    buffer[np.isinf(buffer)] = 0
+    return buffer
+
+
+#------------------------------------------------------------------------------
+# Trajectory
+#------------------------------------------------------------------------------
+
+def rotation_to_quaternion(rotation):
+    # (..., 3, 3) -> (..., 4) as w, x, y, z
+    m = np.asarray(rotation, dtype=np.float64)
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+    candidates = np.stack((
+        np.stack((1 + m00 + m11 + m22, m21 - m12, m02 - m20, m10 - m01), axis=-1),
+        np.stack((m21 - m12, 1 + m00 - m11 - m22, m01 + m10, m02 + m20), axis=-1),
+        np.stack((m02 - m20, m01 + m10, 1 - m00 + m11 - m22, m12 + m21), axis=-1),
+        np.stack((m10 - m01, m02 + m20, m12 + m21, 1 - m00 - m11 + m22), axis=-1),
+    ), axis=-2)
+    # Pick the numerically largest component to avoid cancellation
+    select = np.argmax(np.stack((m00 + m11 + m22, m00, m11, m22), axis=-1), axis=-1)
+    q = np.take_along_axis(candidates, select[..., np.newaxis, np.newaxis], axis=-2)[..., 0, :]
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+# Products of unit quaternion components (w, x, y, z) needed for rotations
+_QUATERNION_PRODUCTS = np.array([[0, 0], [1, 1], [2, 2], [3, 3], [1, 2], [1, 3], [2, 3], [0, 1], [0, 2], [0, 3]])
+
+
+def _create_quaternion_to_pose():
+    # Maps [products, translation, 1] to a flattened 4x4 pose
+    ww, xx, yy, zz, xy, xz, yz, wx, wy, wz = range(10)
+    table = np.zeros((14, 16), dtype=np.float64)
+    table[[ww, xx, yy, zz],  0] = [1,  1, -1, -1]
+    table[[xy, wz],          1] = [2, -2]
+    table[[xz, wy],          2] = [2,  2]
+    table[[xy, wz],          4] = [2,  2]
+    table[[ww, xx, yy, zz],  5] = [1, -1,  1, -1]
+    table[[yz, wx],          6] = [2, -2]
+    table[[xz, wy],          8] = [2, -2]
+    table[[yz, wx],          9] = [2,  2]
+    table[[ww, xx, yy, zz], 10] = [1, -1, -1,  1]
+    table[[10, 11, 12, 13], [12, 13, 14, 15]] = 1
+    return table
+
+
+_QUATERNION_TO_POSE = _create_quaternion_to_pose()
+
+
+def quaternion_to_rotation(quaternion):
+    # (..., 4) unit quaternions as w, x, y, z -> (..., 3, 3)
+    q = np.asarray(quaternion, dtype=np.float64)
+    products = q[..., _QUATERNION_PRODUCTS[:, 0]] * q[..., _QUATERNION_PRODUCTS[:, 1]]
+    return (products @ _QUATERNION_TO_POSE[:10, :]).reshape(q.shape[:-1] + (4, 4))[..., :3, :3]
+
+
+class trajectory:
+    '''
+    Poses sampled at increasing timestamps, queried in batches with SLERP for
+    rotation and linear interpolation for translation. Invalid poses (see
+    hl2ss.is_valid_pose) split the trajectory: queries that fall between
+    poses separated by invalid samples, or by more than max_gap hundreds of
+    nanoseconds, or outside the sampled range, are reported as invalid.
+    Queries at the timestamp of a valid pose return that pose.
+    '''
+    def __init__(self, timestamps, poses, max_gap=None):
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        poses = np.asarray(poses, dtype=np.float32).reshape((-1, 4, 4))
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        poses = poses[order]
+
+        # hl2ss.is_valid_pose for all poses at once
+        valid = poses[:, 3, 3] != 0
+        sample = np.flatnonzero(valid)
+
+        self.timestamps = timestamps
+        self.poses = poses
+        self.valid = valid
+        self.max_gap = max_gap
+
+        self._t = timestamps[sample]
+        self._q = rotation_to_quaternion(poses[sample, :3, :3])
+        self._p = poses[sample, 3, :3].astype(np.float64)
+
+        # Per interval [i, i + 1]: q0, shortest arc q1, p0, p1 - p0, angle and
+        # 1 / sin(angle), stored as rows so queries gather contiguous vectors
+        q0 = self._q[:-1]
+        q1 = self._q[1:]
+        d = np.sum(q0 * q1, axis=-1)
+        q1 = np.where((d < 0)[:, np.newaxis], -q1, q1)
+        # sin(a * theta) / sin(theta) -> a as theta -> 0, clamp to avoid 0 / 0
+        theta = np.maximum(np.arccos(np.clip(np.abs(d), 0, 1)), 1e-9)
+        self._interval = np.ascontiguousarray(np.vstack((q0.T, q1.T, self._p[:-1].T, np.diff(self._p, axis=0).T, theta, 1 / np.sin(theta))))
+
+        dt = np.diff(self._t)
+        contiguous = np.diff(sample) == 1
+        self._interval_valid = contiguous if (max_gap is None) else (contiguous & (dt <= max_gap))
+        self._dt = np.maximum(dt, 1)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def get_range(self):
+        return (int(self._t[0]), int(self._t[-1])) if (len(self._t) > 0) else None
+
+    def get_gaps(self):
+        '''
+        Returns (N, 2) timestamps bounding each interval without valid poses.
+        '''
+        gaps = np.flatnonzero(~self._interval_valid)
+        return np.stack((self._t[gaps], self._t[gaps + 1]), axis=-1)
+
+    def get_poses(self, timestamps):
+        '''
+        Interpolates poses at the given timestamps. Returns (poses, valid)
+        where poses is (N, 4, 4) float32 and invalid poses are all zeros.
+        '''
+        x = np.asarray(timestamps, dtype=np.int64).reshape((-1,))
+        n = len(self._t)
+        poses = np.zeros((x.shape[0], 4, 4), dtype=np.float32)
+        if (n <= 0):
+            return (poses, np.zeros(x.shape, dtype=bool))
+        if (n == 1):
+            valid = x == self._t[0]
+            poses[valid] = self.poses[self.valid][0]
+            return (poses, valid)
+
+        i = np.clip(np.searchsorted(self._t, x, side='right') - 1, 0, n - 2)
+        alpha = (x - self._t[i]) / self._dt[i]
+        # Queries at a sampled timestamp are valid even next to a gap
+        valid = (alpha >= 0) & (alpha <= 1) & (self._interval_valid[i] | (x == self._t[i]) | (x == self._t[i + 1]))
+
+        interval = np.take(self._interval, i, axis=1)
+        theta = interval[14]
+        inv_sin_theta = interval[15]
+        q = (np.sin((1 - alpha) * theta) * inv_sin_theta) * interval[0:4] + (np.sin(alpha * theta) * inv_sin_theta) * interval[4:8]
+
+        features = np.empty((14, x.shape[0]), dtype=np.float64)
+        np.multiply(q[_QUATERNION_PRODUCTS[:, 0]], q[_QUATERNION_PRODUCTS[:, 1]], out=features[:10])
+        np.multiply(alpha, interval[11:14], out=features[10:13])
+        np.add(features[10:13], interval[8:11], out=features[10:13])
+        # Invalid queries map to all zero poses
+        np.multiply(features[:13], valid, out=features[:13])
+        features[13] = valid
+        poses = (features.T @ _QUATERNION_TO_POSE).astype(np.float32).reshape((-1, 4, 4))
+        return (poses, valid)
+
+    def get_pose(self, timestamp):
+        poses, valid = self.get_poses([timestamp])
+        return poses[0] if (valid[0]) else None
+
+
+def trajectory_from_packets(packets, max_gap=None):
+    # Packets from hl2ss_mx buffers, sinks or readers, missing poses are invalid
+    packets = list(packets)
+    timestamps = np.array([packet.timestamp for packet in packets], dtype=np.int64)
+    poses = np.zeros((len(timestamps), 4, 4), dtype=np.float32)
+    for i, packet in enumerate(packets):
+        if (packet.pose is not None):
+            poses[i] = packet.pose
+    return trajectory(timestamps, poses, max_gap)
+
+
 #------------------------------------------------------------------------------
 # SI
 #------------------------------------------------------------------------------
@@ -296,46 +622,6 @@ def su_normalize(mesh, location):
 # Calibration
 #------------------------------------------------------------------------------
 
-def _save_calibration_rm_vlc(calibration, path):
-    calibration.uv2xy                .tofile(os.path.join(path, 'uv2xy.bin'))
-    calibration.extrinsics           .tofile(os.path.join(path, 'extrinsics.bin'))
-    calibration.undistort_map        .tofile(os.path.join(path, 'undistort_map.bin'))
-    calibration.intrinsics           .tofile(os.path.join(path, 'intrinsics.bin'))
-
-
-def _save_calibration_rm_depth_ahat(calibration, path):
-    calibration.uv2xy                .tofile(os.path.join(path, 'uv2xy.bin'))
-    calibration.extrinsics           .tofile(os.path.join(path, 'extrinsics.bin'))
-    calibration.scale                .tofile(os.path.join(path, 'scale.bin'))
-    calibration.alias                .tofile(os.path.join(path, 'alias.bin'))
-    calibration.undistort_map        .tofile(os.path.join(path, 'undistort_map.bin'))
-    calibration.intrinsics           .tofile(os.path.join(path, 'intrinsics.bin'))
-
-
-def _save_calibration_rm_depth_longthrow(calibration, path):
-    calibration.uv2xy                .tofile(os.path.join(path, 'uv2xy.bin'))
-    calibration.extrinsics           .tofile(os.path.join(path, 'extrinsics.bin'))
-    calibration.scale                .tofile(os.path.join(path, 'scale.bin'))
-    calibration.undistort_map        .tofile(os.path.join(path, 'undistort_map.bin'))
-    calibration.intrinsics           .tofile(os.path.join(path, 'intrinsics.bin'))
-
-
-def _save_calibration_rm_imu(calibration, path):
-    calibration.extrinsics           .tofile(os.path.join(path, 'extrinsics.bin'))
-
-
-def _save_calibration_pv(calibration, path):
-    calibration.focal_length         .tofile(os.path.join(path, 'focal_length.bin'))
-    calibration.principal_point      .tofile(os.path.join(path, 'principal_point.bin'))
-    calibration.radial_distortion    .tofile(os.path.join(path, 'radial_distortion.bin'))
-    calibration.tangential_distortion.tofile(os.path.join(path, 'tangential_distortion.bin'))
-    calibration.projection           .tofile(os.path.join(path, 'projection.bin'))
-    calibration.intrinsics           .tofile(os.path.join(path, 'intrinsics.bin'))
-    calibration.extrinsics           .tofile(os.path.join(path, 'extrinsics.bin'))
-    calibration.intrinsics_mf        .tofile(os.path.join(path, 'intrinsics_mf.bin'))
-    calibration.extrinsics_mf        .tofile(os.path.join(path, 'extriniscs_mf.bin'))
-
-
 def _load_calibration_rm_vlc(path):
     lut_shape = hl2ss.Parameters_RM_VLC.SHAPE + (2,)
 
@@ -387,7 +673,7 @@ def _load_calibration_pv(path):
     intrinsics            = np.fromfile(os.path.join(path, 'intrinsics.bin'),            dtype=np.float32).reshape((4, 4))
     extrinsics            = np.fromfile(os.path.join(path, 'extrinsics.bin'),            dtype=np.float32).reshape((4, 4))
     intrinsics_mf         = np.fromfile(os.path.join(path, 'intrinsics_mf.bin'),         dtype=np.float32)
-    extrinsics_mf         = np.fromfile(os.path.join(path, 'extrinsics_mf.bin'),         dtype=np.float32)
+    extrinsics_mf         = np.fromfile(os.path.join(path, 'extriniscs_mf.bin'),         dtype=np.float32) # name used by previous versions
 
     return hl2ss._Mode2_PV(focal_length, principal_point, radial_distortion, tangential_distortion, projection, intrinsics, extrinsics, intrinsics_mf, extrinsics_mf)
 
@@ -415,27 +701,6 @@ def _download_calibration_rm(host, port, sockopt):
         return hl2ss_lnm.download_calibration_rm_imu(            host, port, sockopt)
 
 
-def _save_calibration_rm(port, calibration, path):
-    if (port == hl2ss.StreamPort.RM_VLC_LEFTFRONT):
-        return _save_calibration_rm_vlc(            calibration, path)
-    if (port == hl2ss.StreamPort.RM_VLC_LEFTLEFT):
-        return _save_calibration_rm_vlc(            calibration, path)
-    if (port == hl2ss.StreamPort.RM_VLC_RIGHTFRONT):
-        return _save_calibration_rm_vlc(            calibration, path)
-    if (port == hl2ss.StreamPort.RM_VLC_RIGHTRIGHT):
-        return _save_calibration_rm_vlc(            calibration, path)
-    if (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
-        return _save_calibration_rm_depth_ahat(     calibration, path)
-    if (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
-        return _save_calibration_rm_depth_longthrow(calibration, path)
-    if (port == hl2ss.StreamPort.RM_IMU_ACCELEROMETER):
-        return _save_calibration_rm_imu(            calibration, path)
-    if (port == hl2ss.StreamPort.RM_IMU_GYROSCOPE):
-        return _save_calibration_rm_imu(            calibration, path)
-
-    return None
-
-
 def _load_calibration_rm(port, path):   
     if (port == hl2ss.StreamPort.RM_VLC_LEFTFRONT):
         return _load_calibration_rm_vlc(            path)
@@ -476,33 +741,314 @@ def _calibration_subdirectory_pv(focus, width, height, path):
 
 def get_calibration_rm(path, host, port, sockopt=None):
     _check_calibration_directory(path)
+    return _get_calibration(path, _calibration_request_rm(path, host, port, sockopt))
+
+
+def get_calibration_pv(path, host, port, sockopt=None, focus=1000, width=1920, height=1080, framerate=30):
+    _check_calibration_directory(path)
+    return _get_calibration(path, _calibration_request_pv(path, host, port, sockopt, focus, width, height, framerate))
+
+
+def prefetch_calibration(path, host, ports, sockopt=None, pv_modes=[], workers=None):
+    '''
+    Loads all requested calibrations into the store, downloading the missing
+    ones concurrently. pv_modes is a list of (focus, width, height, framerate)
+    for the PERSONAL_VIDEO port. Returns the names of the downloaded entries.
+    '''
+    _check_calibration_directory(path)
+    requests = [_calibration_request_rm(path, host, port, sockopt) for port in ports if (port != hl2ss.StreamPort.PERSONAL_VIDEO)]
+    requests.extend([_calibration_request_pv(path, host, hl2ss.StreamPort.PERSONAL_VIDEO, sockopt, *mode) for mode in pv_modes])
+    filename = _calibration_store_filename(path)
+    missing = [request for request in requests if (_lookup_calibration(filename, request.key) is None)]
+    if (len(missing) <= 0):
+        return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(missing) if (workers is None) else workers) as pool:
+        calibrations = list(pool.map(_fetch_calibration, missing))
+    _insert_calibration(filename, {request.key : (request.kind, calibration) for request, calibration in zip(missing, calibrations)})
+    return [request.key for request in missing]
+
+
+#------------------------------------------------------------------------------
+# Calibration Store
+#------------------------------------------------------------------------------
+
+# One file per calibration path holding all sensors and PV modes:
+# magic, 64-byte aligned raw arrays, json index, footer (u64 index offset, u64 index size, magic)
+# New entries are appended over the previous index so existing mappings stay valid
+
+_CALIBRATION_STORE_MAGIC = b'HL2SSCS1'
+_CALIBRATION_STORE_ALIGNMENT = 64
+_CALIBRATION_CACHE_SIZE = 32
+
+_calibration_fields = {
+    'rm_vlc'             : (hl2ss._Mode2_RM_VLC,              ['uv2xy', 'extrinsics', 'undistort_map', 'intrinsics']),
+    'rm_depth_ahat'      : (hl2ss._Mode2_RM_DEPTH_AHAT,       ['uv2xy', 'extrinsics', 'scale', 'alias', 'undistort_map', 'intrinsics']),
+    'rm_depth_longthrow' : (hl2ss._Mode2_RM_DEPTH_LONGTHROW,  ['uv2xy', 'extrinsics', 'scale', 'undistort_map', 'intrinsics']),
+    'rm_imu'             : (hl2ss._Mode2_RM_IMU,              ['extrinsics']),
+    'pv'                 : (hl2ss._Mode2_PV,                  ['focal_length', 'principal_point', 'radial_distortion', 'tangential_distortion', 'projection', 'intrinsics', 'extrinsics', 'intrinsics_mf', 'extrinsics_mf']),
+}
+
+_calibration_lock = mt.Lock()
+_calibration_stores = dict()
+_calibration_cache = collections.OrderedDict()
+
+
+class _calibration_request:
+    def __init__(self, key, kind, load, download):
+        self.key = key
+        self.kind = kind
+        self.load = load
+        self.download = download
+
+
+def _calibration_kind_rm(port):
+    if (port in [hl2ss.StreamPort.RM_VLC_LEFTFRONT, hl2ss.StreamPort.RM_VLC_LEFTLEFT, hl2ss.StreamPort.RM_VLC_RIGHTFRONT, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT]):
+        return 'rm_vlc'
+    if (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return 'rm_depth_ahat'
+    if (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return 'rm_depth_longthrow'
+    if (port in [hl2ss.StreamPort.RM_IMU_ACCELEROMETER, hl2ss.StreamPort.RM_IMU_GYROSCOPE]):
+        return 'rm_imu'
+
+    return None
 
-    base = _calibration_subdirectory(port, path)
 
+def _calibration_request_rm(path, host, port, sockopt):
+    return _calibration_request(hl2ss.get_port_name(port), _calibration_kind_rm(port), lambda: _load_calibration_rm(port, _calibration_subdirectory(port, path)), lambda: _download_calibration_rm(host, port, sockopt))
+
+
+def _calibration_request_pv(path, host, port, sockopt, focus, width, height, framerate):
+    base = _calibration_subdirectory_pv(focus, width, height, _calibration_subdirectory(port, path))
+    return _calibration_request(hl2ss.get_port_name(port) + '/' + os.path.basename(base), 'pv', lambda: _load_calibration_pv(base), lambda: hl2ss_lnm.download_calibration_pv(host, port, sockopt, width, height, framerate))
+
+
+def _calibration_store_filename(path):
+    return os.path.join(path, 'calibration.store')
+
+
+def _align_calibration_store(offset):
+    return -(-offset // _CALIBRATION_STORE_ALIGNMENT) * _CALIBRATION_STORE_ALIGNMENT
+
+
+def _open_calibration_store(filename):
+    data = np.memmap(filename, dtype=np.uint8, mode='r')
+    if ((data[:8].tobytes() != _CALIBRATION_STORE_MAGIC) or (data[-8:].tobytes() != _CALIBRATION_STORE_MAGIC)):
+        raise IOError('invalid calibration store ' + filename)
+    position, size = struct.unpack('<QQ', data[-24:-8].tobytes())
+    index = json.loads(data[position:(position + size)].tobytes().decode('utf-8'))
+    return (data, index, position)
+
+
+def _read_calibration_store(store, key):
+    data, index, _ = store
+    entry = index[key]
+    calibration_class, names = _calibration_fields[entry['type']]
+    arrays = []
+    for name in names:
+        offset, dtype, shape = entry['fields'][name]
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        arrays.append(data[offset:(offset + count * dtype.itemsize)].view(dtype).reshape(shape))
+    return calibration_class(*arrays)
+
+
+def _write_calibration_store(filename, store, entries):
+    if (store is None):
+        index = dict()
+        end = _CALIBRATION_STORE_ALIGNMENT
+        mode = 'wb'
+    else:
+        index = dict(store[1])
+        end = store[2]
+        mode = 'r+b'
+    with open(filename, mode) as file:
+        file.write(_CALIBRATION_STORE_MAGIC)
+        for key, (kind, calibration) in entries.items():
+            fields = dict()
+            for name in _calibration_fields[kind][1]:
+                array = np.ascontiguousarray(getattr(calibration, name))
+                offset = _align_calibration_store(end)
+                file.seek(offset)
+                file.write(memoryview(array).cast('B'))
+                fields[name] = [offset, array.dtype.str, list(array.shape)]
+                end = offset + array.nbytes
+            index[key] = {'type' : kind, 'fields' : fields}
+        header = json.dumps(index).encode('utf-8')
+        file.seek(end)
+        file.write(header + struct.pack('<QQ', end, len(header)) + _CALIBRATION_STORE_MAGIC)
+        file.truncate()
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _get_calibration_store(filename):
+    # Reopen if another writer replaced the file
+    try:
+        status = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    signature = (status.st_ino, status.st_mtime_ns, status.st_size)
+    cached = _calibration_stores.get(filename, None)
+    if ((cached is not None) and (cached[0] == signature)):
+        return cached[1]
+    try:
+        store = _open_calibration_store(filename)
+    except:
+        store = None
+    _calibration_stores[filename] = (signature, store)
+    return store
+
+
+def _cache_calibration(filename, key, calibration):
+    _calibration_cache[(filename, key)] = calibration
+    _calibration_cache.move_to_end((filename, key))
+    while (len(_calibration_cache) > _CALIBRATION_CACHE_SIZE):
+        _calibration_cache.popitem(last=False)
+
+
+def _lookup_calibration(filename, key):
+    with _calibration_lock:
+        calibration = _calibration_cache.get((filename, key), None)
+        if (calibration is not None):
+            _calibration_cache.move_to_end((filename, key))
+            return calibration
+        store = _get_calibration_store(filename)
+        if ((store is None) or (key not in store[1])):
+            return None
+        calibration = _read_calibration_store(store, key)
+        _cache_calibration(filename, key, calibration)
+        return calibration
+
+
+def _insert_calibration(filename, entries):
+    with _calibration_lock:
+        _write_calibration_store(filename, _get_calibration_store(filename), entries)
+        store = _get_calibration_store(filename)
+        calibrations = dict()
+        for key in entries.keys():
+            calibrations[key] = _read_calibration_store(store, key)
+            _cache_calibration(filename, key, calibrations[key])
+        return calibrations
+
+
+def _fetch_calibration(request):
+    # Migrate calibration saved as separate .bin files by previous versions
     try:
-        calibration = _load_calibration_rm(port, base)
+        return request.load()
     except:
-        calibration = _download_calibration_rm(host, port, sockopt)
-        os.makedirs(base, exist_ok=True)
-        _save_calibration_rm(port, calibration, base)
+        return request.download()
 
+
+def _copy_calibration(calibration):
+    # Lookup tables stay shared and read-only, small arrays are copied so callers can modify them
+    calibration = copy.copy(calibration)
+    for name, value in vars(calibration).items():
+        if (isinstance(value, np.ndarray) and (value.ndim < 3)):
+            setattr(calibration, name, np.array(value))
     return calibration
 
 
-def get_calibration_pv(path, host, port, sockopt=None, focus=1000, width=1920, height=1080, framerate=30):
-    _check_calibration_directory(path)
+def _get_calibration(path, request):
+    filename = _calibration_store_filename(path)
+    calibration = _lookup_calibration(filename, request.key)
+    if (calibration is None):
+        calibration = _insert_calibration(filename, {request.key : (request.kind, _fetch_calibration(request))})[request.key]
+    return _copy_calibration(calibration)
 
-    root = _calibration_subdirectory(port, path)
-    base = _calibration_subdirectory_pv(focus, width, height, root)
 
+def clear_calibration_cache():
+    with _calibration_lock:
+        _calibration_cache.clear()
+        _calibration_stores.clear()
+
+
+#------------------------------------------------------------------------------
+# Geometry Cache
+#------------------------------------------------------------------------------
+
+_geometry_cache = dict()
+
+
+def get_calibration_hash(calibration):
+    digest = hashlib.sha1()
+    for name, value in sorted(vars(calibration).items()):
+        if (isinstance(value, np.ndarray)):
+            value = np.ascontiguousarray(value)
+            digest.update(f'{name}:{value.dtype.str}:{value.shape}'.encode())
+            digest.update(memoryview(value).cast('B'))
+    return digest.hexdigest()[:16]
+
+
+def _geometry_subdirectory(port, path):
+    return os.path.join(_calibration_subdirectory(port, path), 'geometry')
+
+
+def _geometry_filename(path, name, width, height, digest):
+    return os.path.join(path, f'{name}_{int(width)}x{int(height)}_{digest}.npy')
+
+
+def _load_geometry(path, names, width, height, digest):
+    return tuple(np.load(_geometry_filename(path, name, width, height, digest), mmap_mode='r', allow_pickle=False) for name in names)
+
+
+def _save_geometry(path, names, width, height, digest, arrays):
+    os.makedirs(path, exist_ok=True)
+    for name, array in zip(names, arrays):
+        filename = _geometry_filename(path, name, width, height, digest)
+        with open(filename + '.tmp', 'wb') as file:
+            np.save(file, array, allow_pickle=False)
+        os.replace(filename + '.tmp', filename)
+
+
+def get_geometry(path, port, calibration, width, height, names, compute):
+    '''
+    Memoizes arrays derived from calibration, keyed by port, resolution and
+    calibration hash. If path is not None, arrays are also persisted as .npy
+    files next to the calibration files and reloaded memory-mapped.
+    '''
+    digest = get_calibration_hash(calibration)
+    key = (port, int(width), int(height), digest, tuple(names))
+    arrays = _geometry_cache.get(key, None)
+    if (arrays is not None):
+        return arrays
+    base = None if (path is None) else _geometry_subdirectory(port, path)
     try:
-        calibration = _load_calibration_pv(base)
+        arrays = _load_geometry(base, names, width, height, digest)
     except:
-        calibration = hl2ss_lnm.download_calibration_pv(host, port, sockopt, width, height, framerate)
-        os.makedirs(base, exist_ok=True)
-        _save_calibration_pv(calibration, base)
-        
-    return calibration
+        arrays = tuple(compute())
+        if (base is not None):
+            _save_geometry(base, names, width, height, digest, arrays)
+    _geometry_cache[key] = arrays
+    return arrays
+
+
+def clear_geometry_cache():
+    _geometry_cache.clear()
+
+
+def get_uv2xy(path, port, calibration, width, height):
+    return get_geometry(path, port, calibration, width, height, ['uv2xy'], lambda: (compute_uv2xy(calibration.intrinsics, width, height),))[0]
+
+
+def get_rm_depth_rays(path, port, calibration, width, height, lut=False):
+    # lut=True uses the device uv2xy table (distorted image), otherwise the pinhole model (undistorted image)
+    uv2xy = lambda: calibration.uv2xy if (lut) else compute_uv2xy(calibration.intrinsics, width, height)
+    names = ['xy1_lut', 'scale_lut'] if (lut) else ['xy1', 'scale']
+    return get_geometry(path, port, calibration, width, height, names, lambda: rm_depth_compute_rays(uv2xy(), calibration.scale))
+
+
+def get_undistort_map(path, port, calibration, nearest=False):
+    # Fixed-point CV_16SC2 maps, use nearest=True for rm_depth_undistort
+    height, width = calibration.undistort_map.shape[:2]
+    if (nearest):
+        return (get_geometry(path, port, calibration, width, height, ['undistort_map_nearest'], lambda: convert_undistort_map(calibration.undistort_map, True)[:1])[0], None)
+    return get_geometry(path, port, calibration, width, height, ['undistort_map_xy', 'undistort_map_table'], lambda: convert_undistort_map(calibration.undistort_map, False))
+
+
+def get_rm_vlc_rotated_calibration(path, port, calibration):
+    rotation = rm_vlc_get_rotation(port)
+    return get_geometry(path, port, calibration, hl2ss.Parameters_RM_VLC.WIDTH, hl2ss.Parameters_RM_VLC.HEIGHT, ['intrinsics_rotated', 'extrinsics_rotated'], lambda: rm_vlc_rotate_calibration(calibration.intrinsics, calibration.extrinsics, rotation))
 
 
 #------------------------------------------------------------------------------
@@ -0,0 +1,507 @@
+import asyncio
+import socket
+import struct
+import numpy as np
+import hl2ss
+import hl2ss_dw
+
+
+#------------------------------------------------------------------------------
+# Network Client
+#------------------------------------------------------------------------------
+
+class _client:
+    async def open(self, host, port, sockopt):
+        self._timeout = sockopt['settimeout']
+        self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(host, port), self._timeout)
+        self._writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, sockopt['setsockopt.IPPROTO_TCP.TCP_NODELAY'])
+
+    async def sendall(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    async def _readexactly(self, size):
+        try:
+            return await self._reader.readexactly(size)
+        except asyncio.IncompleteReadError:
+            raise Exception('connection closed')
+
+    async def recv_exactly(self, size):
+        return await (self._readexactly(size) if (self._timeout is None) else asyncio.wait_for(self._readexactly(size), self._timeout))
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except:
+            pass
+
+
+#------------------------------------------------------------------------------
+# Packet Gatherer
+#------------------------------------------------------------------------------
+
+class _gatherer:
+    def __init__(self):
+        self._client = _client()
+
+    async def open(self, host, port, sockopt, mode):
+        self._pose_size = 64 if (mode == hl2ss.StreamMode.MODE_1) else 0
+        await self._client.open(host, port, sockopt)
+
+    async def sendall(self, data):
+        await self._client.sendall(data)
+
+    async def get_next_packet(self):
+        timestamp, payload_size = struct.unpack('<QI', await self._client.recv_exactly(12))
+        payload = await self._client.recv_exactly(payload_size)
+        pose = np.frombuffer(await self._client.recv_exactly(self._pose_size), dtype=np.float32).reshape((4, 4)) if (self._pose_size == 64) else None
+        return hl2ss._packet(timestamp, payload, pose)
+
+    async def close(self):
+        await self._client.close()
+
+
+#------------------------------------------------------------------------------
+# Mode 0 and Mode 1 Data Acquisition
+#------------------------------------------------------------------------------
+
+async def _connect_client(host, port, sockopt, mode, configuration):
+    c = _gatherer()
+    await c.open(host, port, sockopt, mode)
+    if (configuration is not None):
+        await c.sendall(configuration)
+    return c
+
+
+async def _connect_client_rm_vlc(host, port, sockopt, mode, divisor, profile, level, bitrate, options):
+    return await _connect_client(host, port, sockopt, mode, hl2ss._create_configuration_for_rm_vlc(mode, divisor, profile, level, bitrate, options))
+
+
+async def _connect_client_rm_depth_ahat(host, port, sockopt, mode, divisor, profile_z, profile_ab, level, bitrate, options):
+    return await _connect_client(host, port, sockopt, mode, hl2ss._create_configuration_for_rm_depth_ahat(mode, divisor, profile_z, profile_ab, level, bitrate, options))
+
+
+async def _connect_client_rm_depth_longthrow(host, port, sockopt, mode, divisor, png_filter):
+    return await _connect_client(host, port, sockopt, mode, hl2ss._create_configuration_for_rm_depth_longthrow(mode, divisor, png_filter))
+
+
+async def _connect_client_rm_imu(host, port, sockopt, mode):
+    return await _connect_client(host, port, sockopt, mode, hl2ss._create_configuration_for_rm_imu(mode))
+
+
+async def _connect_client_pv(host, port, sockopt, mode, width, height, framerate, divisor, profile, level, bitrate, options):
+    return await _connect_client(host, port, sockopt, mode, hl2ss._create_configuration_for_pv(mode, width, height, framerate, divisor, profile, level, bitrate, options))
+
+
+async def _connect_client_microphone(host, port, sockopt, profile, level):
+    return await _connect_client(host, port, sockopt, hl2ss.StreamMode.MODE_0, hl2ss._create_configuration_for_microphone(profile, level))
+
+
+async def _connect_client_si(host, port, sockopt):
+    return await _connect_client(host, port, sockopt, hl2ss.StreamMode.MODE_0, None)
+
+
+async def _connect_client_eet(host, port, sockopt, fps):
+    return await _connect_client(host, port, sockopt, hl2ss.StreamMode.MODE_1, hl2ss._create_configuration_for_eet(fps))
+
+
+async def _connect_client_extended_audio(host, port, sockopt, mixer_mode, loopback_gain, microphone_gain, profile, level):
+    return await _connect_client(host, port, sockopt, hl2ss.StreamMode.MODE_0, hl2ss._create_configuration_for_extended_audio(mixer_mode, loopback_gain, microphone_gain, profile, level))
+
+
+async def _connect_client_extended_depth(host, port, sockopt, mode, divisor, profile_z, options):
+    return await _connect_client(host, port, sockopt, mode, hl2ss._create_configuration_for_extended_depth(mode, divisor, profile_z, options))
+
+
+#------------------------------------------------------------------------------
+# Context Manager
+#------------------------------------------------------------------------------
+
+class _context_manager:
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+#------------------------------------------------------------------------------
+# Receiver Wrappers
+#------------------------------------------------------------------------------
+
+class _rx(_context_manager):
+    async def get_next_packet(self):
+        return await self._client.get_next_packet()
+
+    async def close(self):
+        await self._client.close()
+
+
+class rx_rm_vlc(_rx):
+    def __init__(self, host, port, sockopt, mode, divisor, profile, level, bitrate, options):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+        self.mode = mode
+        self.divisor = divisor
+        self.profile = profile
+        self.level = level
+        self.bitrate = bitrate
+        self.options = options
+
+    async def open(self):
+        self._client = await _connect_client_rm_vlc(self.host, self.port, self.sockopt, self.mode, self.divisor, self.profile, self.level, self.bitrate, self.options)
+
+
+class rx_rm_depth_ahat(_rx):
+    def __init__(self, host, port, sockopt, mode, divisor, profile_z, profile_ab, level, bitrate, options):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+        self.mode = mode
+        self.divisor = divisor
+        self.profile_z = profile_z
+        self.profile_ab = profile_ab
+        self.level = level
+        self.bitrate = bitrate
+        self.options = options
+
+    async def open(self):
+        self._client = await _connect_client_rm_depth_ahat(self.host, self.port, self.sockopt, self.mode, self.divisor, self.profile_z, self.profile_ab, self.level, self.bitrate, self.options)
+
+
+class rx_rm_depth_longthrow(_rx):
+    def __init__(self, host, port, sockopt, mode, divisor, png_filter):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+        self.mode = mode
+        self.divisor = divisor
+        self.png_filter = png_filter
+
+    async def open(self):
+        self._client = await _connect_client_rm_depth_longthrow(self.host, self.port, self.sockopt, self.mode, self.divisor, self.png_filter)
+
+
+class rx_rm_imu(_rx):
+    def __init__(self, host, port, sockopt, mode):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+        self.mode = mode
+
+    async def open(self):
+        self._client = await _connect_client_rm_imu(self.host, self.port, self.sockopt, self.mode)
+
+
+class rx_pv(_rx):
+    def __init__(self, host, port, sockopt, mode, width, height, framerate, divisor, profile, level, bitrate, options):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.framerate = framerate
+        self.divisor = divisor
+        self.profile = profile
+        self.level = level
+        self.bitrate = bitrate
+        self.options = options
+
+    async def open(self):
+        self._client = await _connect_client_pv(self.host, self.port, self.sockopt, self.mode, self.width, self.height, self.framerate, self.divisor, self.profile, self.level, self.bitrate, self.options)
+
+
+class rx_microphone(_rx):
+    def __init__(self, host, port, sockopt, profile, level):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+        self.profile = profile
+        self.level = level
+
+    async def open(self):
+        self._client = await _connect_client_microphone(self.host, self.port, self.sockopt, self.profile, self.level)
+
+
+class rx_si(_rx):
+    def __init__(self, host, port, sockopt):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+
+    async def open(self):
+        self._client = await _connect_client_si(self.host, self.port, self.sockopt)
+
+
+class rx_eet(_rx):
+    def __init__(self, host, port, sockopt, fps):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+        self.fps = fps
+
+    async def open(self):
+        self._client = await _connect_client_eet(self.host, self.port, self.sockopt, self.fps)
+
+
+class rx_extended_audio(_rx):
+    def __init__(self, host, port, sockopt, mixer_mode, loopback_gain, microphone_gain, profile, level):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+        self.mixer_mode = mixer_mode
+        self.loopback_gain = loopback_gain
+        self.microphone_gain = microphone_gain
+        self.profile = profile
+        self.level = level
+
+    async def open(self):
+        self._client = await _connect_client_extended_audio(self.host, self.port, self.sockopt, self.mixer_mode, self.loopback_gain, self.microphone_gain, self.profile, self.level)
+
+
+class rx_extended_depth(_rx):
+    def __init__(self, host, port, sockopt, mode, divisor, profile_z, options):
+        self.host = host
+        self.port = port
+        self.sockopt = sockopt
+        self.mode = mode
+        self.divisor = divisor
+        self.profile_z = profile_z
+        self.options = options
+
+    async def open(self):
+        self._client = await _connect_client_extended_depth(self.host, self.port, self.sockopt, self.mode, self.divisor, self.profile_z, self.options)
+
+
+#------------------------------------------------------------------------------
+# Decoded Receivers
+#------------------------------------------------------------------------------
+
+async def _run_in_executor(function, *args):
+    # Video and depth decoding runs off the event loop so one stream does not stall the others
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+
+async def _get_next_decoded_packet(rx, get_next_packet, push):
+    while (True):
+        item = await _run_in_executor(rx._codec.pop)
+        if (item is not None):
+            data = item[0]
+            data.payload = item[1]
+            return data
+        data = await get_next_packet()
+        await _run_in_executor(push, data)
+
+
+class rx_decoded_rm_vlc(rx_rm_vlc):
+    def __init__(self, host, port, sockopt, mode, divisor, profile, level, bitrate, options, lazy=False, thread_type=hl2ss.VideoCodecThreading.SLICE, thread_count=0):
+        super().__init__(host, port, sockopt, mode, divisor, profile, level, bitrate, options)
+        self.lazy = lazy
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+
+    async def open(self):
+        self._codec = hl2ss.decode_rm_vlc(self.profile, self.thread_type, self.thread_count, self.lazy)
+        await super().open()
+
+    async def get_next_packet(self):
+        return await _get_next_decoded_packet(self, super().get_next_packet, lambda data : self._codec.push(data.payload, data))
+
+
+class rx_decoded_rm_depth_ahat(rx_rm_depth_ahat):
+    def __init__(self, host, port, sockopt, mode, divisor, profile_z, profile_ab, level, bitrate, options, lazy=False, thread_type=hl2ss.VideoCodecThreading.SLICE, thread_count=0):
+        super().__init__(host, port, sockopt, mode, divisor, profile_z, profile_ab, level, bitrate, options)
+        self.lazy = lazy
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+
+    async def open(self):
+        self._codec = hl2ss.decode_rm_depth_ahat(self.profile_z, self.profile_ab, thread_type=self.thread_type, thread_count=self.thread_count, lazy=self.lazy)
+        await super().open()
+
+    async def get_next_packet(self):
+        return await _get_next_decoded_packet(self, super().get_next_packet, lambda data : self._codec.push(data.payload, data))
+
+
+class rx_decoded_rm_depth_longthrow(rx_rm_depth_longthrow):
+    def __init__(self, host, port, sockopt, mode, divisor, png_filter, lazy=False):
+        super().__init__(host, port, sockopt, mode, divisor, png_filter)
+        self.lazy = lazy
+
+    async def open(self):
+        self._codec = hl2ss.decode_rm_depth_longthrow(self.png_filter, lazy=self.lazy)
+        await super().open()
+
+    async def get_next_packet(self):
+        data = await super().get_next_packet()
+        data.payload = await _run_in_executor(self._codec.decode, data.payload)
+        return data
+
+
+class rx_decoded_rm_imu(rx_rm_imu):
+    async def open(self):
+        self._codec = hl2ss.decode_rm_imu()
+        await super().open()
+
+    async def get_next_packet(self):
+        data = await super().get_next_packet()
+        data.payload = self._codec.decode(data.payload)
+        return data
+
+
+class rx_decoded_pv(rx_pv):
+    def __init__(self, host, port, sockopt, mode, width, height, framerate, divisor, profile, level, bitrate, options, format, lazy=False, pool_size=0, thread_type=hl2ss.VideoCodecThreading.SLICE, thread_count=0):
+        super().__init__(host, port, sockopt, mode, width, height, framerate, divisor, profile, level, bitrate, options)
+        self.format = format
+        self.lazy = lazy
+        self.pool_size = pool_size
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+
+    async def open(self):
+        self._codec = hl2ss.decode_pv(self.profile, self.thread_type, self.thread_count, self.lazy, self.pool_size)
+        await super().open()
+
+    async def get_next_packet(self):
+        return await _get_next_decoded_packet(self, super().get_next_packet, lambda data : self._codec.push(data.payload, self.format, data))
+
+
+class rx_decoded_microphone(rx_microphone):
+    async def open(self):
+        self._codec = hl2ss.decode_microphone(self.profile, self.level)
+        await super().open()
+
+    async def get_next_packet(self):
+        data = await super().get_next_packet()
+        data.payload = self._codec.decode(data.payload)
+        return data
+
+
+class rx_decoded_si(rx_si):
+    async def open(self):
+        self._codec = hl2ss.decode_si()
+        await super().open()
+
+    async def get_next_packet(self):
+        data = await super().get_next_packet()
+        data.payload = self._codec.decode(data.payload)
+        return data
+
+
+class rx_decoded_eet(rx_eet):
+    async def open(self):
+        self._codec = hl2ss.decode_eet()
+        await super().open()
+
+    async def get_next_packet(self):
+        data = await super().get_next_packet()
+        data.payload = self._codec.decode(data.payload)
+        return data
+
+
+class rx_decoded_extended_audio(rx_extended_audio):
+    async def open(self):
+        self._codec = hl2ss.decode_extended_audio(self.profile, self.level)
+        await super().open()
+
+    async def get_next_packet(self):
+        data = await super().get_next_packet()
+        data.payload = self._codec.decode(data.payload)
+        return data
+
+
+class rx_decoded_extended_depth(rx_extended_depth):
+    async def open(self):
+        self._codec = hl2ss.decode_extended_depth(self.profile_z)
+        await super().open()
+
+    async def get_next_packet(self):
+        data = await super().get_next_packet()
+        data.payload = await _run_in_executor(self._codec.decode, data.payload)
+        return data
+
+
+#------------------------------------------------------------------------------
+# Receiver From Receiver
+#------------------------------------------------------------------------------
+
+def _create_rx_from_rx_rm_vlc(rx):
+    return rx_decoded_rm_vlc(rx.host, rx.port, rx.sockopt, rx.mode, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options, rx.lazy, rx.thread_type, rx.thread_count) if (isinstance(rx, hl2ss.rx_decoded_rm_vlc)) else rx_rm_vlc(rx.host, rx.port, rx.sockopt, rx.mode, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options)
+
+
+def _create_rx_from_rx_rm_depth_ahat(rx):
+    return rx_decoded_rm_depth_ahat(rx.host, rx.port, rx.sockopt, rx.mode, rx.divisor, rx.profile_z, rx.profile_ab, rx.level, rx.bitrate, rx.options, rx.lazy, rx.thread_type, rx.thread_count) if (isinstance(rx, hl2ss.rx_decoded_rm_depth_ahat)) else rx_rm_depth_ahat(rx.host, rx.port, rx.sockopt, rx.mode, rx.divisor, rx.profile_z, rx.profile_ab, rx.level, rx.bitrate, rx.options)
+
+
+def _create_rx_from_rx_rm_depth_longthrow(rx):
+    return rx_decoded_rm_depth_longthrow(rx.host, rx.port, rx.sockopt, rx.mode, rx.divisor, rx.png_filter, rx.lazy) if (isinstance(rx, hl2ss.rx_decoded_rm_depth_longthrow)) else rx_rm_depth_longthrow(rx.host, rx.port, rx.sockopt, rx.mode, rx.divisor, rx.png_filter)
+
+
+def _create_rx_from_rx_rm_imu(rx):
+    return rx_decoded_rm_imu(rx.host, rx.port, rx.sockopt, rx.mode) if (isinstance(rx, hl2ss.rx_decoded_rm_imu)) else rx_rm_imu(rx.host, rx.port, rx.sockopt, rx.mode)
+
+
+def _create_rx_from_rx_pv(rx):
+    return rx_decoded_pv(rx.host, rx.port, rx.sockopt, rx.mode, rx.width, rx.height, rx.framerate, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options, rx.format, rx.lazy, rx.pool_size, rx.thread_type, rx.thread_count) if (isinstance(rx, hl2ss.rx_decoded_pv)) else rx_pv(rx.host, rx.port, rx.sockopt, rx.mode, rx.width, rx.height, rx.framerate, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options)
+
+
+def _create_rx_from_rx_microphone(rx):
+    return rx_decoded_microphone(rx.host, rx.port, rx.sockopt, rx.profile, rx.level) if (isinstance(rx, hl2ss.rx_decoded_microphone)) else rx_microphone(rx.host, rx.port, rx.sockopt, rx.profile, rx.level)
+
+
+def _create_rx_from_rx_si(rx):
+    return rx_decoded_si(rx.host, rx.port, rx.sockopt) if (isinstance(rx, hl2ss.rx_decoded_si)) else rx_si(rx.host, rx.port, rx.sockopt)
+
+
+def _create_rx_from_rx_eet(rx):
+    return rx_decoded_eet(rx.host, rx.port, rx.sockopt, rx.fps) if (isinstance(rx, hl2ss.rx_decoded_eet)) else rx_eet(rx.host, rx.port, rx.sockopt, rx.fps)
+
+
+def _create_rx_from_rx_extended_audio(rx):
+    return rx_decoded_extended_audio(rx.host, rx.port, rx.sockopt, rx.mixer_mode, rx.loopback_gain, rx.microphone_gain, rx.profile, rx.level) if (isinstance(rx, hl2ss.rx_decoded_extended_audio)) else rx_extended_audio(rx.host, rx.port, rx.sockopt, rx.mixer_mode, rx.loopback_gain, rx.microphone_gain, rx.profile, rx.level)
+
+
+def _create_rx_from_rx_extended_depth(rx):
+    return rx_decoded_extended_depth(rx.host, rx.port, rx.sockopt, rx.mode, rx.divisor, rx.profile_z, rx.options) if (isinstance(rx, hl2ss.rx_decoded_extended_depth)) else rx_extended_depth(rx.host, rx.port, rx.sockopt, rx.mode, rx.divisor, rx.profile_z, rx.options)
+
+
+def create_rx_from_rx(rx):
+    # Decode worker wrappers are replaced by the receiver they wrap, decoding happens in the executor
+    if (isinstance(rx, hl2ss_dw.rx_decode_worker)):
+        rx = rx.rx
+    if (rx.port == hl2ss.StreamPort.RM_VLC_LEFTFRONT):
+        return _create_rx_from_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_VLC_LEFTLEFT):
+        return _create_rx_from_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_VLC_RIGHTFRONT):
+        return _create_rx_from_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_VLC_RIGHTRIGHT):
+        return _create_rx_from_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return _create_rx_from_rx_rm_depth_ahat(rx)
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return _create_rx_from_rx_rm_depth_longthrow(rx)
+    if (rx.port == hl2ss.StreamPort.RM_IMU_ACCELEROMETER):
+        return _create_rx_from_rx_rm_imu(rx)
+    if (rx.port == hl2ss.StreamPort.RM_IMU_GYROSCOPE):
+        return _create_rx_from_rx_rm_imu(rx)
+    if (rx.port == hl2ss.StreamPort.RM_IMU_MAGNETOMETER):
+        return _create_rx_from_rx_rm_imu(rx)
+    if (rx.port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return _create_rx_from_rx_pv(rx)
+    if (rx.port == hl2ss.StreamPort.MICROPHONE):
+        return _create_rx_from_rx_microphone(rx)
+    if (rx.port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return _create_rx_from_rx_si(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_EYE_TRACKER):
+        return _create_rx_from_rx_eet(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_AUDIO):
+        return _create_rx_from_rx_extended_audio(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_VIDEO):
+        return _create_rx_from_rx_pv(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_DEPTH):
+        return _create_rx_from_rx_extended_depth(rx)
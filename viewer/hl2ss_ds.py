@@ -1,11 +1,17 @@
 
 import multiprocessing as mp
+import numpy as np
 import fractions
+import types
+import time
+import cv2
+import os
 import av
 import hl2ss
 import hl2ss_io
 import hl2ss_mx
 import hl2ss_mp
+import hl2ss_sx
 
 
 #------------------------------------------------------------------------------
@@ -13,10 +19,10 @@ import hl2ss_mp
 #------------------------------------------------------------------------------
 
 class _wr_process(mp.Process):
-    def __init__(self, filename, producer, port, user):
+    def __init__(self, filename, producer, port, user, config=None):
         super().__init__()
         self._event_stop = mp.Event()
-        self._wr = hl2ss_io.create_wr_from_rx(filename, producer.get_receiver(port), user)
+        self._wr = hl2ss_io.create_wr_from_rx(filename, producer.get_receiver(port), user, config)
         self._sink = hl2ss_mp.consumer().create_sink(producer, port, mp.Manager(), ...)
 
     def stop(self):
@@ -37,8 +43,10 @@ class _wr_process(mp.Process):
                     writer.write(data)
                 elif (state == hl2ss_mx.Status.DISCARDED):
                     self._frame_stamp = hl2ss_mx.get_sync_frame_stamp(self._frame_stamp + 1, self._sync_period)
-                    print(f'[hl2ss_ds._wr_process] {self._worker_name} writer out of sync')
-        
+                    stats = writer.get_stats()
+                    print(f'[hl2ss_ds._wr_process] {self._worker_name} writer out of sync (backlog {stats.backlog_packets} packets, {stats.backlog_bytes} bytes)')
+
+        _print_stats(self._worker_name, self._wr.get_stats())
         source_string = self._sink.get_source_string()
         self._sink.detach()
         if (source_string is None):
@@ -48,11 +56,186 @@ class _wr_process(mp.Process):
 
 
 class wr(hl2ss._context_manager):
-    def __init__(self, filename, producer, port, user):
-        self._worker = _wr_process(filename, producer, port, user)
+    def __init__(self, filename, producer, port, user, config=None):
+        self._worker = _wr_process(filename, producer, port, user, config)
+
+    def open(self):
+        self._worker.start()
+
+    def close(self):
+        self._worker.stop()
+        self._worker.join()
+
+
+def _print_stats(name, stats):
+    print(f'[hl2ss_ds] {name} wrote {stats.packets} packets ({stats.bytes} bytes), latency mean {1000 * stats.get_latency_mean():.2f} ms max {1000 * stats.latency_max:.2f} ms, peak backlog {stats.backlog_peak} bytes')
+
+
+#------------------------------------------------------------------------------
+# Consolidated Background Writer
+#------------------------------------------------------------------------------
+
+class _wr_stream:
+    def __init__(self, wr, sink):
+        self.wr = wr
+        self.sink = sink
+
+
+class _wr_multi_process(mp.Process):
+    def __init__(self, filenames, producer, user, config):
+        super().__init__()
+        self._event_stop = mp.Event()
+        self._streams = dict()
+        manager = mp.Manager()
+        consumer = hl2ss_mp.consumer()
+        semaphore = ...
+        # All sinks share one semaphore so a single process can wait on every
+        # port at once
+        for port, filename in filenames.items():
+            wr = hl2ss_io.create_wr_from_rx(filename, producer.get_receiver(port), user, config)
+            self._streams[port] = _wr_stream(wr, consumer.create_sink(producer, port, manager, semaphore))
+            semaphore = port
+        self._sink = self._streams[port].sink
+
+    def stop(self):
+        self._event_stop.set()
+        self._sink.release()
+
+    def _drain(self, port, stream, count):
+        # Writes up to count frames and returns how many were written
+        written = 0
+        while (written < count):
+            state, _, data = stream.sink.get_buffered_frame(stream.frame_stamp)
+            if (state == hl2ss_mx.Status.OK):
+                stream.frame_stamp += 1
+                stream.wr.write(data)
+                written += 1
+            elif (state == hl2ss_mx.Status.DISCARDED):
+                stream.frame_stamp = hl2ss_mx.get_sync_frame_stamp(stream.frame_stamp + 1, stream.sync_period)
+                stats = stream.wr.get_stats()
+                print(f'[hl2ss_ds._wr_multi_process] {hl2ss.get_port_name(port)} writer out of sync (backlog {stats.backlog_packets} packets, {stats.backlog_bytes} bytes)')
+            else:
+                break
+        return written
+
+    def run(self):
+        for stream in self._streams.values():
+            stream.sync_period = hl2ss_mx.get_sync_period(stream.wr)
+            stream.frame_stamp = hl2ss_mx.get_sync_frame_stamp(stream.sink.get_attach_response() + 1, stream.sync_period)
+            stream.wr.open()
+
+        # Each release of the shared semaphore is a new frame or a source
+        # status change on some port, ports that waited longest are polled first
+        active = list(self._streams.keys())
+        pending = 0
+        while ((not self._event_stop.is_set()) and (len(active) > 0)):
+            self._sink.acquire()
+            pending += 1
+            for port in list(active):
+                written = self._drain(port, self._streams[port], pending)
+                pending -= written
+                if (written > 0):
+                    active.remove(port)
+                    active.append(port)
+                if (pending <= 0):
+                    break
+            if (pending > 0):
+                pending = 0
+                active = [port for port in active if (self._streams[port].sink.get_source_status())]
+
+        for port, stream in self._streams.items():
+            stream.wr.close()
+            _print_stats(hl2ss.get_port_name(port), stream.wr.get_stats())
+            source_string = stream.sink.get_source_string()
+            stream.sink.detach()
+            if (source_string is not None):
+                print(f'[hl2ss_ds._wr_multi_process] {hl2ss.get_port_name(port)} source was lost:')
+                print(source_string)
+
+
+class wr_multi(hl2ss._context_manager):
+    '''
+    Records several ports of a producer from a single process.
+    filenames: dict of port to output filename.
+    '''
+
+    def __init__(self, filenames, producer, user, config=None):
+        self._worker = _wr_multi_process(filenames, producer, user, config)
+
+    def open(self):
+        self._worker.start()
+
+    def close(self):
+        self._worker.stop()
+        self._worker.join()
+
+
+#------------------------------------------------------------------------------
+# Raw Background Writer
+#------------------------------------------------------------------------------
+
+class _wr_dispatch:
+    def __init__(self, wr):
+        self.wr = wr
+        self.source_string = None
+
+    def __call__(self, data):
+        if (data is None):
+            return
+        if (data.timestamp is None):
+            self.source_string = data.payload
+            return
+        self.wr.write(data)
+
+
+class _wr_raw_process(mp.Process):
+    def __init__(self, filenames, receivers, user, config):
+        super().__init__()
+        self._event_stop = mp.Event()
+        self._event_ready = mp.Event()
+        self._rx = receivers
+        self._wr = {port : hl2ss_io.create_wr_from_rx(filename, receivers[port], user, config) for port, filename in filenames.items()}
+
+    def stop(self):
+        self._event_stop.set()
+
+    def wait_ready(self, timeout=None):
+        return self._event_ready.wait(timeout)
+
+    def run(self):
+        # Packets are written as they are unpacked from the sockets, without
+        # going through an interconnect process
+        dispatch = {port : _wr_dispatch(wr) for port, wr in self._wr.items()}
+        client = hl2ss_sx.multiplexer()
+        for port, wr in self._wr.items():
+            wr.open()
+            client.configure(port, self._rx[port], dispatch[port])
+        client.open()
+        self._event_ready.set()
+        self._event_stop.wait()
+        client.close()
+
+        for port, wr in self._wr.items():
+            wr.close()
+            _print_stats(hl2ss.get_port_name(port), wr.get_stats())
+            if (dispatch[port].source_string is not None):
+                print(f'[hl2ss_ds._wr_raw_process] {hl2ss.get_port_name(port)} source was lost:')
+                print(dispatch[port].source_string)
+
+
+class wr_raw(hl2ss._context_manager):
+    '''
+    Receives and records several ports from a single process.
+    filenames: dict of port to output filename.
+    receivers: dict of port to receiver (decoded=False or decoded_format=None).
+    '''
+
+    def __init__(self, filenames, receivers, user, config=None):
+        self._worker = _wr_raw_process(filenames, receivers, user, config)
 
     def open(self):
         self._worker.start()
+        self._worker.wait_ready()
 
     def close(self):
         self._worker.stop()
@@ -131,49 +314,402 @@ def get_av_codec_kind(rd):
     return None
 
 
-def unpack_to_mp4(input_filenames, output_filename):
+class _av_parser(hl2ss._context_manager):
+    # Reads and parses one input on a player worker thread
+    def __init__(self, input_filename):
+        self.rd = hl2ss_io.create_rd(input_filename, hl2ss.ChunkSize.SINGLE_TRANSFER, None)
+
+    def open(self):
+        self.rd.open()
+        self._codec = av.CodecContext.create(get_av_codec_name(self.rd), "r")
+        self._metadata_size = hl2ss.get_metadata_size(self.rd.port)
+
+    def get_next_packet(self):
+        data = self.rd.get_next_packet()
+        if (data is None):
+            return None
+        payload = data.payload[:-self._metadata_size] if (self._metadata_size > 0) else data.payload
+        return hl2ss._packet(data.timestamp, (len(payload), self._codec.parse(payload)), None)
+
+    def close(self):
+        self.rd.close()
+
+
+def _unpack_report(done, total, size, elapsed):
+    print(f'[hl2ss_ds.unpack_to_mp4] {done}/{total} packets ({(100 * done / max(total, 1)):.1f}%), {(size / max(elapsed, 1e-9) / 1e6):.1f} MB/s')
+
+
+def unpack_to_mp4(input_filenames, output_filename, progress=False, prefetch=64):
+    # Packets from all inputs are muxed in timestamp order
     time_base = fractions.Fraction(1, hl2ss.TimeBase.HUNDREDS_OF_NANOSECONDS)
 
-    readers = [hl2ss_io.sequencer(hl2ss_io.create_rd(input_filename, hl2ss.ChunkSize.SINGLE_TRANSFER, None)) for input_filename in input_filenames]
-    for reader in readers:
-        reader.open()
+    parsers = [_av_parser(input_filename) for input_filename in input_filenames]
+    player = hl2ss_io.player(parsers, prefetch=prefetch)
+    player.open()
 
     container = av.open(output_filename, mode='w')
-    streams = [container.add_stream(get_av_codec_name(reader.rd), rate=get_av_framerate(reader.rd)) for reader in readers]
-    codecs = [av.CodecContext.create(get_av_codec_name(reader.rd), "r") for reader in readers]
+    streams = [container.add_stream(get_av_codec_name(parser.rd), rate=get_av_framerate(parser.rd)) for parser in parsers]
 
     for stream in streams:
         stream.time_base = time_base
 
     base = hl2ss._RANGEOF.U64_MAX
 
-    for reader in readers:
-        data = reader.get_left()
-        if ((get_av_codec_kind(reader.rd) == av_codec_kind.VIDEO) and (data is not None) and (data.timestamp < base)):
+    for index, parser in enumerate(parsers):
+        data = player.peek(index)
+        if ((get_av_codec_kind(parser.rd) == av_codec_kind.VIDEO) and (data is not None) and (data.timestamp < base)):
             base = data.timestamp
 
-    for reader, codec, stream in zip(readers, codecs, streams):
-        metadata_size = hl2ss.get_metadata_size(reader.rd.port)
-        while (True):
-            data = reader.get_left()
-            if (data is None):
-                break
-            reader.advance()
+    total = sum([parser.rd.get_frame_count() for parser in parsers]) if (progress) else 0
+    done = 0
+    size = 0
+    start = time.perf_counter()
+    report = start + 1
+
+    for index, data in player:
+        done += 1
+        local_timestamp = data.timestamp - base
+        if (local_timestamp >= 0):
+            length, packets = data.payload
+            size += length
+            for p in packets:
+                p.stream, p.pts, p.dts, p.time_base = streams[index], local_timestamp, local_timestamp, time_base
+                container.mux(p)
+        if (progress and (time.perf_counter() >= report)):
+            _unpack_report(done, total, size, time.perf_counter() - start)
+            report += 1
 
-            if (metadata_size > 0):
-                payload = data.payload[:-metadata_size]
-            else:
-                payload = data.payload
+    container.close()
+    player.close()
 
-            local_timestamp = data.timestamp - base
-            if (local_timestamp < 0):
-                continue
+    if (progress):
+        _unpack_report(done, total, size, time.perf_counter() - start)
 
-            for p in codec.parse(payload):
-                p.stream, p.pts, p.dts, p.time_base = stream, local_timestamp, local_timestamp, time_base
-                container.mux(p)
 
-    container.close()
-    for reader in readers:
-        reader.close()
+#------------------------------------------------------------------------------
+# Frame Extraction
+#------------------------------------------------------------------------------
+
+def _get_extract_format(port):
+    if (port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return 'bgr24'
+    if (port == hl2ss.StreamPort.EXTENDED_VIDEO):
+        return 'bgr24'
+    return True
+
+
+def _get_extract_images(port, payload):
+    # Depth and AB are written as 16-bit PNG regardless of the image format
+    if (port == hl2ss.StreamPort.RM_VLC_LEFTFRONT):
+        return [('image', payload.image, False)]
+    if (port == hl2ss.StreamPort.RM_VLC_LEFTLEFT):
+        return [('image', payload.image, False)]
+    if (port == hl2ss.StreamPort.RM_VLC_RIGHTFRONT):
+        return [('image', payload.image, False)]
+    if (port == hl2ss.StreamPort.RM_VLC_RIGHTRIGHT):
+        return [('image', payload.image, False)]
+    if (port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return [('depth', payload.depth, True), ('ab', payload.ab, True)]
+    if (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return [('depth', payload.depth, True), ('ab', payload.ab, True)]
+    if (port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return [('image', payload.image, False)]
+    if (port == hl2ss.StreamPort.EXTENDED_VIDEO):
+        return [('image', payload.image, False)]
+    if (port == hl2ss.StreamPort.EXTENDED_DEPTH):
+        return [('depth', payload.depth, True)]
+
+    raise Exception(f'Frame extraction is not supported for {hl2ss.get_port_name(port)}')
+
+
+def get_extract_filename(output_path, kind, timestamp, image_format):
+    return os.path.join(output_path, kind, f'{timestamp:020d}.{image_format}')
+
+
+_extract_state = None
+
+
+def _extract_open(input_filename, port, output_path, image_format):
+    # Runs once per worker process, the reader is reused across tasks
+    global _extract_state
+    rd = hl2ss_io.create_rd(input_filename, hl2ss.ChunkSize.SINGLE_TRANSFER, _get_extract_format(port), mapped=True)
+    rd.open()
+    _extract_state = (rd, output_path, image_format)
+
+
+def _extract_range(task):
+    rd, output_path, image_format = _extract_state
+    begin, timestamp_stop = task
+    rd.seek(begin)
+    count = 0
+    # Frames are decoded and written one at a time
+    while (True):
+        data = rd.get_next_packet()
+        if ((data is None) or ((timestamp_stop is not None) and (data.timestamp >= timestamp_stop))):
+            break
+        for kind, image, raw in _get_extract_images(rd.port, data.payload):
+            cv2.imwrite(get_extract_filename(output_path, kind, data.timestamp, 'png' if (raw) else image_format), image)
+        count += 1
+    return count
+
+
+def _get_extract_tasks(index, min_frames):
+    # Each task starts at a keyframe and covers whole GOPs
+    keyframes = np.flatnonzero(index['keyframe']).tolist()
+    if ((len(keyframes) <= 0) or (keyframes[0] != 0)):
+        keyframes.insert(0, 0)
+    starts = [keyframes[0]]
+    for keyframe in keyframes[1:]:
+        if ((keyframe - starts[-1]) >= min_frames):
+            starts.append(keyframe)
+    stops = [int(index['timestamp'][start]) for start in starts[1:]] + [None]
+    return list(zip(starts, stops))
+
+
+def extract_frames(input_filename, output_path, image_format='png', workers=None, min_frames=30, progress=False):
+    '''
+    Decodes a video or depth recording on a process pool and writes every
+    frame to output_path/<kind>/<timestamp>.<image_format>.
+    '''
+    with hl2ss_io.create_rd(input_filename, hl2ss.ChunkSize.SINGLE_TRANSFER, None) as rd:
+        port = rd.port
+        index = rd.get_index()
+
+    for kind, _, _ in _get_extract_images(port, types.SimpleNamespace(image=None, depth=None, ab=None)):
+        os.makedirs(os.path.join(output_path, kind), exist_ok=True)
+
+    tasks = _get_extract_tasks(index, min_frames)
+    done = 0
+    start = time.perf_counter()
+
+    with mp.Pool(workers, initializer=_extract_open, initargs=(input_filename, port, output_path, image_format)) as pool:
+        for count in pool.imap_unordered(_extract_range, tasks):
+            done += count
+            if (progress):
+                elapsed = time.perf_counter() - start
+                print(f'[hl2ss_ds.extract_frames] {done}/{len(index)} frames ({(100 * done / max(len(index), 1)):.1f}%), {(done / max(elapsed, 1e-9)):.1f} frames/s')
+
+    return done
+
 
+#------------------------------------------------------------------------------
+# Columnar Export
+#------------------------------------------------------------------------------
+
+# Column layouts are (dtype, shape per row, rows) where rows is 'packets' or
+# 'samples'
+
+class _columns_rm_imu:
+    _sample = np.dtype([('vinyl_hup_ticks', '<u8'), ('soc_ticks', '<u8'), ('x', '<f4'), ('y', '<f4'), ('z', '<f4'), ('temperature', '<f4')])
+
+    def __init__(self):
+        self._start = 0
+
+    def get_rows(self, index):
+        return {'packets' : len(index), 'samples' : int(index['size'].astype(np.int64).sum()) // self._sample.itemsize}
+
+    def get_layout(self):
+        return {
+            'sample_start'    : (np.uint64,  (), 'packets'),
+            'sample_count'    : (np.uint32,  (), 'packets'),
+            'vinyl_hup_ticks' : (np.uint64,  (), 'samples'),
+            'soc_ticks'       : (np.uint64,  (), 'samples'),
+            'x'               : (np.float32, (), 'samples'),
+            'y'               : (np.float32, (), 'samples'),
+            'z'               : (np.float32, (), 'samples'),
+            'temperature'     : (np.float32, (), 'samples'),
+        }
+
+    def decode(self, payload, sizes):
+        # Same soc_ticks correction as hl2ss.decode_rm_imu, applied per packet
+        f = payload.view(self._sample)
+        counts = sizes // self._sample.itemsize
+        starts = np.cumsum(counts) - counts
+        full = counts > 0
+        vinyl_hup_ticks = f['vinyl_hup_ticks']
+        soc_ticks = f['soc_ticks']
+        fix = np.zeros(len(counts), dtype=bool)
+        fix[full] = soc_ticks[starts[full]] == soc_ticks[starts[full] + counts[full] - 1]
+        fix_samples = np.repeat(fix, counts)
+        base = np.repeat(vinyl_hup_ticks[np.minimum(starts, max(len(f) - 1, 0))], counts)
+        soc_ticks = np.where(fix_samples, soc_ticks + ((vinyl_hup_ticks - base) // 100), soc_ticks)
+        sample_start = (starts + self._start).astype(np.uint64)
+        self._start += len(f)
+        return {
+            'sample_start'    : sample_start,
+            'sample_count'    : counts.astype(np.uint32),
+            'vinyl_hup_ticks' : vinyl_hup_ticks,
+            'soc_ticks'       : soc_ticks,
+            'x'               : f['x'],
+            'y'               : f['y'],
+            'z'               : f['z'],
+            'temperature'     : f['temperature'],
+        }
+
+
+class _columns_si:
+    _packet = np.dtype([('valid', '<u4'), ('head_pose_position', '<f4', (3,)), ('head_pose_forward', '<f4', (3,)), ('head_pose_up', '<f4', (3,)), ('eye_ray_origin', '<f4', (3,)), ('eye_ray_direction', '<f4', (3,)), ('hands', '<f4', (2, hl2ss.SI_HandJointKind.TOTAL, 9))])
+
+    def get_rows(self, index):
+        return {'packets' : len(index)}
+
+    def get_layout(self):
+        joints = hl2ss.SI_HandJointKind.TOTAL
+        return {
+            'head_pose_position'    : (np.float32, (3,), 'packets'),
+            'head_pose_forward'     : (np.float32, (3,), 'packets'),
+            'head_pose_up'          : (np.float32, (3,), 'packets'),
+            'eye_ray_origin'        : (np.float32, (3,), 'packets'),
+            'eye_ray_direction'     : (np.float32, (3,), 'packets'),
+            'hand_left_orientation' : (np.float32, (joints, 4), 'packets'),
+            'hand_left_position'    : (np.float32, (joints, 3), 'packets'),
+            'hand_left_radius'      : (np.float32, (joints,), 'packets'),
+            'hand_left_accuracy'    : (np.int32,   (joints,), 'packets'),
+            'hand_right_orientation': (np.float32, (joints, 4), 'packets'),
+            'hand_right_position'   : (np.float32, (joints, 3), 'packets'),
+            'hand_right_radius'     : (np.float32, (joints,), 'packets'),
+            'hand_right_accuracy'   : (np.int32,   (joints,), 'packets'),
+            'head_pose_valid'       : (np.bool_,   (), 'packets'),
+            'eye_ray_valid'         : (np.bool_,   (), 'packets'),
+            'hand_left_valid'       : (np.bool_,   (), 'packets'),
+            'hand_right_valid'      : (np.bool_,   (), 'packets'),
+        }
+
+    def decode(self, payload, sizes):
+        f = _view_packets(payload, sizes, self._packet)
+        valid = f['valid']
+        hands = f['hands']
+        return {
+            'head_pose_position'    : f['head_pose_position'],
+            'head_pose_forward'     : f['head_pose_forward'],
+            'head_pose_up'          : f['head_pose_up'],
+            'eye_ray_origin'        : f['eye_ray_origin'],
+            'eye_ray_direction'     : f['eye_ray_direction'],
+            'hand_left_orientation' : hands[:, 0, :, 0:4],
+            'hand_left_position'    : hands[:, 0, :, 4:7],
+            'hand_left_radius'      : hands[:, 0, :, 7],
+            'hand_left_accuracy'    : np.ascontiguousarray(hands[:, 0, :, 8]).view(np.int32),
+            'hand_right_orientation': hands[:, 1, :, 0:4],
+            'hand_right_position'   : hands[:, 1, :, 4:7],
+            'hand_right_radius'     : hands[:, 1, :, 7],
+            'hand_right_accuracy'   : np.ascontiguousarray(hands[:, 1, :, 8]).view(np.int32),
+            'head_pose_valid'       : (valid & 0x01) != 0,
+            'eye_ray_valid'         : (valid & 0x02) != 0,
+            'hand_left_valid'       : (valid & 0x04) != 0,
+            'hand_right_valid'      : (valid & 0x08) != 0,
+        }
+
+
+class _columns_eet:
+    _packet = np.dtype([('reserved', '<u4'), ('combined_ray_origin', '<f4', (3,)), ('combined_ray_direction', '<f4', (3,)), ('left_ray_origin', '<f4', (3,)), ('left_ray_direction', '<f4', (3,)), ('right_ray_origin', '<f4', (3,)), ('right_ray_direction', '<f4', (3,)), ('left_openness', '<f4'), ('right_openness', '<f4'), ('vergence_distance', '<f4'), ('valid', '<u4')])
+    _fields = ['combined_ray_origin', 'combined_ray_direction', 'left_ray_origin', 'left_ray_direction', 'right_ray_origin', 'right_ray_direction', 'left_openness', 'right_openness', 'vergence_distance']
+    _flags = ['calibration_valid', 'combined_ray_valid', 'left_ray_valid', 'right_ray_valid', 'left_openness_valid', 'right_openness_valid', 'vergence_distance_valid']
+
+    def get_rows(self, index):
+        return {'packets' : len(index)}
+
+    def get_layout(self):
+        layout = {name : (np.float32, self._packet.fields[name][0].shape, 'packets') for name in self._fields}
+        layout.update({name : (np.bool_, (), 'packets') for name in self._flags})
+        return layout
+
+    def decode(self, payload, sizes):
+        f = _view_packets(payload, sizes, self._packet)
+        valid = f['valid']
+        columns = {name : f[name] for name in self._fields}
+        columns.update({name : (valid & (1 << bit)) != 0 for bit, name in enumerate(self._flags)})
+        return columns
+
+
+def _view_packets(payload, sizes, dtype):
+    if (np.any(sizes != dtype.itemsize)):
+        raise Exception(f'Unexpected payload size (expected {dtype.itemsize} bytes)')
+    return payload.view(dtype)
+
+
+def _create_columns(port):
+    if (port == hl2ss.StreamPort.RM_IMU_ACCELEROMETER):
+        return _columns_rm_imu()
+    if (port == hl2ss.StreamPort.RM_IMU_GYROSCOPE):
+        return _columns_rm_imu()
+    if (port == hl2ss.StreamPort.RM_IMU_MAGNETOMETER):
+        return _columns_rm_imu()
+    if (port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return _columns_si()
+    if (port == hl2ss.StreamPort.EXTENDED_EYE_TRACKER):
+        return _columns_eet()
+    
+    raise Exception(f'Columnar export is not supported for {hl2ss.get_port_name(port)}')
+
+
+class _columns_output:
+    def __init__(self, output, format, layout, rows):
+        self._format = format
+        self._columns = dict()
+        self._offsets = {name : 0 for name in layout.keys()}
+        if (format == 'npy'):
+            os.makedirs(output, exist_ok=True)
+        for name, (dtype, shape, kind) in layout.items():
+            size = (rows[kind],) + shape
+            self._columns[name] = np.lib.format.open_memmap(os.path.join(output, name + '.npy'), mode='w+', dtype=dtype, shape=size) if (format == 'npy') else np.empty(size, dtype=dtype)
+        self._output = output
+
+    def write(self, columns):
+        for name, data in columns.items():
+            offset = self._offsets[name]
+            self._columns[name][offset:(offset + len(data))] = data
+            self._offsets[name] = offset + len(data)
+
+    def close(self):
+        if (self._format == 'npy'):
+            for column in self._columns.values():
+                column.flush()
+        else:
+            np.savez(self._output, **self._columns)
+        self._columns = None
+
+
+def _decode_columns(extractor, packets, pose):
+    # One decode call per chunk of packets
+    sizes = np.array([len(packet.payload) for packet in packets], dtype=np.int64)
+    payload = np.frombuffer(b''.join([packet.payload for packet in packets]), dtype=np.uint8)
+    columns = extractor.decode(payload, sizes)
+    columns['timestamp'] = np.array([packet.timestamp for packet in packets], dtype=np.uint64)
+    if (pose):
+        columns['pose'] = np.array([packet.pose for packet in packets], dtype=np.float32)
+    return columns
+
+
+def unpack_to_columns(input_filename, output, format='npy', chunk=4096):
+    '''
+    Decodes a RM IMU, SI or EET recording into one array per field.
+    format 'npy' writes a directory of .npy files that load_columns can memory
+    map; format 'npz' writes a single uncompressed archive.
+    '''
+    with hl2ss_io.create_rd(input_filename, hl2ss.ChunkSize.SINGLE_TRANSFER, None, mapped=True) as rd:
+        extractor = _create_columns(rd.port)
+        rows = extractor.get_rows(rd.get_index())
+        data = rd.get_next_packet()
+        pose = (data is not None) and (data.pose is not None)
+        layout = extractor.get_layout()
+        layout['timestamp'] = (np.uint64, (), 'packets')
+        if (pose):
+            layout['pose'] = (np.float32, (4, 4), 'packets')
+        output_columns = _columns_output(output, format, layout, rows)
+        packets = []
+        while (data is not None):
+            packets.append(data)
+            if (len(packets) >= chunk):
+                output_columns.write(_decode_columns(extractor, packets, pose))
+                packets = []
+            data = rd.get_next_packet()
+        if (len(packets) > 0):
+            output_columns.write(_decode_columns(extractor, packets, pose))
+        output_columns.close()
+
+
+def load_columns(path, mmap=True):
+    if (os.path.isdir(path)):
+        return {os.path.splitext(name)[0] : np.load(os.path.join(path, name), mmap_mode='r' if (mmap) else None) for name in sorted(os.listdir(path)) if (name.endswith('.npy'))}
+    with np.load(path) as data:
+        return {name : data[name] for name in data.files}
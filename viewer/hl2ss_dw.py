@@ -0,0 +1,504 @@
+import multiprocessing as mp
+import threading as mt
+import collections
+import queue
+import socket
+import traceback
+import struct
+import hl2ss
+
+
+#------------------------------------------------------------------------------
+# Settings
+#------------------------------------------------------------------------------
+
+class WorkerKind:
+    THREAD  = 0
+    PROCESS = 1
+
+
+class OverflowPolicy:
+    BLOCK            = 0
+    DROP_OLDEST      = 1
+    DROP_TO_KEYFRAME = 2
+
+
+#------------------------------------------------------------------------------
+# Decoders
+#------------------------------------------------------------------------------
+
+def _drain(codec):
+    # Frame threading can return several frames, or none, per packet
+    frames = []
+    while (True):
+        item = codec.pop()
+        if (item is None):
+            return frames
+        data = item[0]
+        data.payload = item[1]
+        frames.append(data)
+
+
+class _decoder_rm_vlc:
+    def __init__(self, profile, thread_type, thread_count, lazy):
+        self.profile = profile
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self.lazy = lazy
+
+    def open(self):
+        self._codec = hl2ss.decode_rm_vlc(self.profile, self.thread_type, self.thread_count, self.lazy)
+
+    def is_keyframe(self, payload):
+        return hl2ss._h26x_is_keyframe(self.profile, payload, 0, len(payload) - hl2ss._MetadataSize.RM_VLC)
+
+    def decode(self, data):
+        self._codec.push(data.payload, data)
+        return _drain(self._codec)
+
+
+class _decoder_rm_depth_ahat:
+    def __init__(self, profile_z, profile_ab, thread_type, thread_count, lazy):
+        self.profile_z = profile_z
+        self.profile_ab = profile_ab
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self.lazy = lazy
+
+    def open(self):
+        self._codec = hl2ss.decode_rm_depth_ahat(self.profile_z, self.profile_ab, thread_type=self.thread_type, thread_count=self.thread_count, lazy=self.lazy)
+
+    def is_keyframe(self, payload):
+        start = hl2ss._decode_rm_depth_ahat.BASE
+        if (self.profile_z != hl2ss.DepthProfile.SAME):
+            start += struct.unpack_from('<I', payload, 0)[0]
+        return hl2ss._h26x_is_keyframe(self.profile_ab, payload, start, len(payload) - hl2ss._MetadataSize.RM_DEPTH_AHAT)
+
+    def decode(self, data):
+        self._codec.push(data.payload, data)
+        return _drain(self._codec)
+
+
+class _decoder_rm_depth_longthrow:
+    def __init__(self, png_filter, lazy):
+        self.png_filter = png_filter
+        self.lazy = lazy
+
+    def open(self):
+        self._codec = hl2ss.decode_rm_depth_longthrow(self.png_filter, self.lazy)
+
+    def is_keyframe(self, payload):
+        return True
+
+    def decode(self, data):
+        data.payload = self._codec.decode(data.payload)
+        return [data]
+
+
+class _decoder_rm_imu:
+    def open(self):
+        self._codec = hl2ss.decode_rm_imu()
+
+    def is_keyframe(self, payload):
+        return True
+
+    def decode(self, data):
+        data.payload = self._codec.decode(data.payload)
+        return [data]
+
+
+class _decoder_pv:
+    def __init__(self, profile, format, thread_type, thread_count, lazy, pool_size):
+        self.profile = profile
+        self.format = format
+        self.thread_type = thread_type
+        self.thread_count = thread_count
+        self.lazy = lazy
+        self.pool_size = pool_size
+
+    def open(self):
+        self._codec = hl2ss.decode_pv(self.profile, self.thread_type, self.thread_count, self.lazy, self.pool_size)
+
+    def is_keyframe(self, payload):
+        return hl2ss._h26x_is_keyframe(self.profile, payload, 0, len(payload) - hl2ss._MetadataSize.PERSONAL_VIDEO)
+
+    def decode(self, data):
+        self._codec.push(data.payload, self.format, data)
+        return _drain(self._codec)
+
+
+class _decoder_microphone:
+    def __init__(self, profile, level):
+        self.profile = profile
+        self.level = level
+
+    def open(self):
+        self._codec = hl2ss.decode_microphone(self.profile, self.level)
+
+    def is_keyframe(self, payload):
+        return True
+
+    def decode(self, data):
+        data.payload = self._codec.decode(data.payload)
+        return [data]
+
+
+class _decoder_si:
+    def open(self):
+        self._codec = hl2ss.decode_si()
+
+    def is_keyframe(self, payload):
+        return True
+
+    def decode(self, data):
+        data.payload = self._codec.decode(data.payload)
+        return [data]
+
+
+class _decoder_eet:
+    def open(self):
+        self._codec = hl2ss.decode_eet()
+
+    def is_keyframe(self, payload):
+        return True
+
+    def decode(self, data):
+        data.payload = self._codec.decode(data.payload)
+        return [data]
+
+
+class _decoder_extended_audio:
+    def __init__(self, profile, level):
+        self.profile = profile
+        self.level = level
+
+    def open(self):
+        self._codec = hl2ss.decode_extended_audio(self.profile, self.level)
+
+    def is_keyframe(self, payload):
+        return True
+
+    def decode(self, data):
+        data.payload = self._codec.decode(data.payload)
+        return [data]
+
+
+class _decoder_extended_depth:
+    def __init__(self, profile_z):
+        self.profile_z = profile_z
+
+    def open(self):
+        self._codec = hl2ss.decode_extended_depth(self.profile_z)
+
+    def is_keyframe(self, payload):
+        return True
+
+    def decode(self, data):
+        data.payload = self._codec.decode(data.payload)
+        return [data]
+
+
+#------------------------------------------------------------------------------
+# Receiver From Decoded Receiver
+#------------------------------------------------------------------------------
+
+def _create_rx_rm_vlc(rx):
+    return (hl2ss.rx_rm_vlc(rx.host, rx.port, rx.sockopt, rx.chunk, rx.mode, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options), _decoder_rm_vlc(rx.profile, rx.thread_type, rx.thread_count, rx.lazy))
+
+
+def _create_rx_rm_depth_ahat(rx):
+    return (hl2ss.rx_rm_depth_ahat(rx.host, rx.port, rx.sockopt, rx.chunk, rx.mode, rx.divisor, rx.profile_z, rx.profile_ab, rx.level, rx.bitrate, rx.options), _decoder_rm_depth_ahat(rx.profile_z, rx.profile_ab, rx.thread_type, rx.thread_count, rx.lazy))
+
+
+def _create_rx_rm_depth_longthrow(rx):
+    return (hl2ss.rx_rm_depth_longthrow(rx.host, rx.port, rx.sockopt, rx.chunk, rx.mode, rx.divisor, rx.png_filter), _decoder_rm_depth_longthrow(rx.png_filter, rx.lazy))
+
+
+def _create_rx_rm_imu(rx):
+    return (hl2ss.rx_rm_imu(rx.host, rx.port, rx.sockopt, rx.chunk, rx.mode), _decoder_rm_imu())
+
+
+def _create_rx_pv(rx):
+    return (hl2ss.rx_pv(rx.host, rx.port, rx.sockopt, rx.chunk, rx.mode, rx.width, rx.height, rx.framerate, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options), _decoder_pv(rx.profile, rx.format, rx.thread_type, rx.thread_count, rx.lazy, rx.pool_size))
+
+
+def _create_rx_microphone(rx):
+    return (hl2ss.rx_microphone(rx.host, rx.port, rx.sockopt, rx.chunk, rx.profile, rx.level), _decoder_microphone(rx.profile, rx.level))
+
+
+def _create_rx_si(rx):
+    return (hl2ss.rx_si(rx.host, rx.port, rx.sockopt, rx.chunk), _decoder_si())
+
+
+def _create_rx_eet(rx):
+    return (hl2ss.rx_eet(rx.host, rx.port, rx.sockopt, rx.chunk, rx.fps), _decoder_eet())
+
+
+def _create_rx_extended_audio(rx):
+    return (hl2ss.rx_extended_audio(rx.host, rx.port, rx.sockopt, rx.chunk, rx.mixer_mode, rx.loopback_gain, rx.microphone_gain, rx.profile, rx.level), _decoder_extended_audio(rx.profile, rx.level))
+
+
+def _create_rx_extended_depth(rx):
+    return (hl2ss.rx_extended_depth(rx.host, rx.port, rx.sockopt, rx.chunk, rx.mode, rx.divisor, rx.profile_z, rx.options), _decoder_extended_depth(rx.profile_z))
+
+
+def _create_rx(rx):
+    if (rx.port == hl2ss.StreamPort.RM_VLC_LEFTFRONT):
+        return _create_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_VLC_LEFTLEFT):
+        return _create_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_VLC_RIGHTFRONT):
+        return _create_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_VLC_RIGHTRIGHT):
+        return _create_rx_rm_vlc(rx)
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return _create_rx_rm_depth_ahat(rx)
+    if (rx.port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
+        return _create_rx_rm_depth_longthrow(rx)
+    if (rx.port == hl2ss.StreamPort.RM_IMU_ACCELEROMETER):
+        return _create_rx_rm_imu(rx)
+    if (rx.port == hl2ss.StreamPort.RM_IMU_GYROSCOPE):
+        return _create_rx_rm_imu(rx)
+    if (rx.port == hl2ss.StreamPort.RM_IMU_MAGNETOMETER):
+        return _create_rx_rm_imu(rx)
+    if (rx.port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return _create_rx_pv(rx)
+    if (rx.port == hl2ss.StreamPort.MICROPHONE):
+        return _create_rx_microphone(rx)
+    if (rx.port == hl2ss.StreamPort.SPATIAL_INPUT):
+        return _create_rx_si(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_EYE_TRACKER):
+        return _create_rx_eet(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_AUDIO):
+        return _create_rx_extended_audio(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_VIDEO):
+        return _create_rx_pv(rx)
+    if (rx.port == hl2ss.StreamPort.EXTENDED_DEPTH):
+        return _create_rx_extended_depth(rx)
+
+
+#------------------------------------------------------------------------------
+# Bounded Queue
+#------------------------------------------------------------------------------
+
+class _packet_queue:
+    def __init__(self, maxsize, policy, is_keyframe):
+        self._maxsize = maxsize
+        self._policy = policy
+        self._is_keyframe = is_keyframe
+        self._buffer = collections.deque()
+        self._cv = mt.Condition()
+        self._skip = False
+        self._closed = False
+        self.dropped = 0
+
+    def _drop_to_keyframe(self):
+        for index in range(len(self._buffer) - 1, 0, -1):
+            if (self._buffer[index][1]):
+                for _ in range(0, index):
+                    self._buffer.popleft()
+                self.dropped += index
+                return
+        self.dropped += len(self._buffer)
+        self._buffer.clear()
+        self._skip = True
+
+    def put(self, data):
+        key = self._is_keyframe(data.payload) if (self._policy == OverflowPolicy.DROP_TO_KEYFRAME) else True
+        with self._cv:
+            if (self._policy == OverflowPolicy.BLOCK):
+                while ((len(self._buffer) >= self._maxsize) and (not self._closed)):
+                    self._cv.wait()
+            elif (self._policy == OverflowPolicy.DROP_OLDEST):
+                if (len(self._buffer) >= self._maxsize):
+                    self._buffer.popleft()
+                    self.dropped += 1
+            elif (self._policy == OverflowPolicy.DROP_TO_KEYFRAME):
+                if (len(self._buffer) >= self._maxsize):
+                    self._drop_to_keyframe()
+                if (self._skip):
+                    if (not key):
+                        self.dropped += 1
+                        return
+                    self._skip = False
+            self._buffer.append((data, key))
+            self._cv.notify_all()
+
+    def get(self):
+        with self._cv:
+            while ((len(self._buffer) <= 0) and (not self._closed)):
+                self._cv.wait()
+            if (len(self._buffer) <= 0):
+                return None
+            data, _ = self._buffer.popleft()
+            self._cv.notify_all()
+            return data
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+
+
+#------------------------------------------------------------------------------
+# Workers
+#------------------------------------------------------------------------------
+
+class _worker_thread:
+    def __init__(self, decoder):
+        self._decoder = decoder
+
+    def open(self):
+        self._decoder.open()
+
+    def decode(self, data):
+        return self._decoder.decode(data)
+
+    def close(self):
+        pass
+
+
+def _worker_process_run(decoder, pipe, pipe_parent):
+    pipe_parent.close()
+    decoder.open()
+    while (True):
+        try:
+            data = pipe.recv()
+        except EOFError:
+            break
+        if (data is None):
+            break
+        try:
+            pipe.send((True, decoder.decode(data)))
+        except:
+            pipe.send((False, traceback.format_exc()))
+    pipe.close()
+
+
+class _worker_process:
+    def __init__(self, decoder):
+        self._decoder = decoder
+
+    def open(self):
+        self._pipe, pipe = mp.Pipe()
+        self._process = mp.Process(target=_worker_process_run, args=(self._decoder, pipe, self._pipe), daemon=True)
+        self._process.start()
+        pipe.close()
+
+    def decode(self, data):
+        self._pipe.send(data)
+        ok, result = self._pipe.recv()
+        if (not ok):
+            raise Exception(result)
+        return result
+
+    def close(self):
+        try:
+            self._pipe.send(None)
+        except:
+            pass
+        self._process.join()
+        self._pipe.close()
+
+
+def _create_worker(kind, decoder):
+    return _worker_process(decoder) if (kind == WorkerKind.PROCESS) else _worker_thread(decoder)
+
+
+#------------------------------------------------------------------------------
+# Receiver
+#------------------------------------------------------------------------------
+
+class rx_decode_worker(hl2ss._context_manager):
+    def __init__(self, rx, kind=WorkerKind.THREAD, maxsize=32, policy=OverflowPolicy.BLOCK):
+        self.rx = rx
+        self.kind = kind
+        self.maxsize = maxsize
+        self.policy = policy
+
+    def __getattr__(self, name):
+        if ((name == 'rx') or name.startswith('__')):
+            raise AttributeError(name)
+        return getattr(self.rx, name)
+
+    def _receive(self):
+        try:
+            while (not self._event_stop.is_set()):
+                self._input.put(self._rx.get_next_packet())
+        except:
+            if (not self._event_stop.is_set()):
+                self._error = traceback.format_exc()
+        self._input.close()
+
+    def _decode(self):
+        try:
+            while (True):
+                data = self._input.get()
+                if (data is None):
+                    break
+                for data in self._worker.decode(data):
+                    self._put(data)
+        except:
+            if (self._error is None):
+                self._error = traceback.format_exc()
+            self._event_stop.set()
+            self._input.close()
+        self._put(None)
+
+    def _put(self, data):
+        # One byte per queued item keeps the signal socket readable while output is pending
+        self._output.put(data)
+        self._signal_w.send(b'\x00')
+
+    def open(self):
+        if ((self.kind == WorkerKind.THREAD) and (0 < getattr(self.rx, 'pool_size', 0) <= (self.maxsize + 1))):
+            raise Exception('pool_size must be larger than maxsize + 1, otherwise queued frames are overwritten')
+        self._rx, decoder = _create_rx(self.rx)
+        self._input = _packet_queue(self.maxsize, self.policy, decoder.is_keyframe)
+        self._output = queue.Queue(self.maxsize)
+        self._worker = _create_worker(self.kind, decoder)
+        self._event_stop = mt.Event()
+        self._error = None
+        self._eof = False
+        self._signal_r, self._signal_w = socket.socketpair()
+        self._worker.open()
+        self._rx.open()
+        self._thread_receive = mt.Thread(target=self._receive, daemon=True)
+        self._thread_decode = mt.Thread(target=self._decode, daemon=True)
+        self._thread_receive.start()
+        self._thread_decode.start()
+
+    def fileno(self):
+        return self._signal_r.fileno()
+
+    def get_dropped_count(self):
+        return self._input.dropped
+
+    def get_next_packet(self, wait=True):
+        if (self._eof):
+            data = None
+        else:
+            try:
+                data = self._output.get(wait)
+            except queue.Empty:
+                return None
+            self._signal_r.recv(1)
+        if (data is None):
+            self._eof = True
+            raise Exception(self._error if (self._error is not None) else 'decode worker stopped')
+        return data
+
+    def close(self):
+        self._event_stop.set()
+        self._input.close()
+        self._thread_receive.join()
+        self._rx.close()
+        while (self._thread_decode.is_alive()):
+            try:
+                self._output.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread_decode.join(0.01)
+        self._worker.close()
+        self._signal_r.close()
+        self._signal_w.close()
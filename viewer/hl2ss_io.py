@@ -1,32 +1,506 @@
 
+import numpy as np
+import threading as mt
+import collections
+import copy
+import json
+import traceback
 import weakref
+import queue
+import heapq
+import mmap
 import struct
 import types
+import bisect
+import time
+import os
 import hl2ss
 import hl2ss_mx
 
 
 _MAGIC = 'HL2SSV23'
+_INDEX_MAGIC = 'HL2SSI01'
+
+
+#------------------------------------------------------------------------------
+# Index
+#------------------------------------------------------------------------------
+
+# One record per packet: byte offset of the packet header, timestamp, payload
+# size and keyframe flag
+index_dtype = np.dtype([('offset', '<u8'), ('timestamp', '<u8'), ('size', '<u4'), ('keyframe', 'u1')])
+
+_index_record = struct.Struct('<QQIB')
+
+
+class _keyframe_probe:
+    def __init__(self, profile, metadata_size, base=0, offset=False):
+        self.profile = profile
+        self.metadata_size = metadata_size
+        self.base = base
+        self.offset = offset
+
+    def _get_start(self, payload):
+        return self.base + (struct.unpack_from('<I', payload, 0)[0] if (self.offset) else 0)
+
+    def is_keyframe(self, payload):
+        return hl2ss._h26x_is_keyframe(self.profile, payload, self._get_start(payload), len(payload) - self.metadata_size)
+
+    def scan(self, file, offset, size, window=4096):
+        if (hl2ss.get_video_codec_name(self.profile) is None):
+            return True
+        file.seek(offset)
+        start = self._get_start(file.read(4) if (self.offset) else None)
+        end = size - self.metadata_size
+        while (True):
+            file.seek(offset + start)
+            data = file.read(min(window, end - start))
+            keyframe = hl2ss._h26x_scan_keyframe(self.profile, data, 0, len(data))
+            if ((keyframe is not None) or (len(data) >= (end - start))):
+                return keyframe == True
+            window *= 4
+
+
+def _create_keyframe_probe_any():
+    return _keyframe_probe(None, 0)
+
+
+def _create_keyframe_probe_rm_vlc(profile):
+    return _keyframe_probe(profile, hl2ss._MetadataSize.RM_VLC)
+
+
+def _create_keyframe_probe_rm_depth_ahat(profile_z, profile_ab):
+    return _keyframe_probe(profile_ab, hl2ss._MetadataSize.RM_DEPTH_AHAT, hl2ss._decode_rm_depth_ahat.BASE, profile_z != hl2ss.DepthProfile.SAME)
+
+
+def _create_keyframe_probe_pv(profile):
+    return _keyframe_probe(profile, hl2ss._MetadataSize.PERSONAL_VIDEO)
+
+
+def get_index_filename(filename):
+    return filename + '.idx'
+
+
+def load_index(filename):
+    index_filename = get_index_filename(filename)
+    if (not os.path.isfile(index_filename)):
+        return None
+    with open(index_filename, 'rb') as file:
+        if (file.read(len(_INDEX_MAGIC)) != _INDEX_MAGIC.encode()):
+            return None
+        data = file.read()
+    return np.frombuffer(data, dtype=index_dtype, count=len(data) // index_dtype.itemsize)
+
+
+def save_index(filename, index):
+    with open(get_index_filename(filename), 'wb') as file:
+        file.write(_INDEX_MAGIC.encode())
+        file.write(np.ascontiguousarray(index, dtype=index_dtype).tobytes())
+
+
+def build_index(filename):
+    # Reads packet headers only, plus the first NAL units of video payloads
+    with _rd(filename, hl2ss.ChunkSize.SINGLE_TRANSFER) as rd:
+        offset = rd._rd.get_data_offset()
+        pose_size = rd._rd.get_pose_size()
+        probe = _create_keyframe_probe_from_rd(rd)
+
+    file_size = os.path.getsize(filename)
+    records = []
+
+    with open(filename, 'rb') as file:
+        while ((offset + 12) <= file_size):
+            file.seek(offset)
+            timestamp, size = struct.unpack('<QI', file.read(12))
+            end = offset + 12 + size + pose_size
+            if (end > file_size):
+                break
+            records.append((offset, timestamp, size, probe.scan(file, offset + 12, size)))
+            offset = end
+
+    return np.array(records, dtype=index_dtype)
+
+
+def rebuild_index(filename):
+    index = build_index(filename)
+    save_index(filename, index)
+    return index
+
+
+def load_poses(filename):
+    '''
+    Reads the timestamp and pose of every packet through the index, without
+    decoding payloads. Poses is None for recordings without poses.
+    '''
+    timestamps = []
+    poses = []
+    for segment in get_segments(filename):
+        with _rd(segment, hl2ss.ChunkSize.SINGLE_TRANSFER) as rd:
+            pose_size = rd._rd.get_pose_size()
+        index = load_index(segment)
+        if (index is None):
+            index = build_index(segment)
+        timestamps.append(index['timestamp'].astype(np.int64))
+        if (pose_size != 64):
+            continue
+        data = np.memmap(segment, dtype=np.uint8, mode='r')
+        offsets = index['offset'].astype(np.int64) + 12 + index['size'].astype(np.int64)
+        poses.append(np.array(data[offsets[:, np.newaxis] + np.arange(64, dtype=np.int64)]).view(np.float32).reshape((-1, 4, 4)))
+        del data
+    return (np.concatenate(timestamps), np.concatenate(poses) if (len(poses) > 0) else None)
+
+
+#------------------------------------------------------------------------------
+# Segments
+#------------------------------------------------------------------------------
+
+def get_manifest_filename(filename):
+    return filename + '.segments'
+
+
+def get_segment_filename(filename, segment):
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{segment:04d}{ext}'
+
+
+def load_manifest(filename):
+    manifest_filename = get_manifest_filename(filename)
+    if (not os.path.isfile(manifest_filename)):
+        return None
+    with open(manifest_filename, 'r') as file:
+        manifest = json.load(file)
+    path = os.path.dirname(filename)
+    for segment in manifest['segments']:
+        segment['filename'] = os.path.join(path, segment['filename'])
+    return manifest
+
+
+def save_manifest(filename, segments):
+    # Written to a temporary file first so readers never see a partial manifest
+    manifest = {'segments' : [dict(segment, filename=os.path.basename(segment['filename'])) for segment in segments]}
+    manifest_filename = get_manifest_filename(filename)
+    with open(manifest_filename + '.tmp', 'w') as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(manifest_filename + '.tmp', manifest_filename)
+
+
+def is_segmented(filename):
+    return (not os.path.isfile(filename)) and os.path.isfile(get_manifest_filename(filename))
+
+
+def get_segments(filename):
+    # Segment files are complete recordings and can be processed independently
+    manifest = load_manifest(filename) if (is_segmented(filename)) else None
+    return [filename] if (manifest is None) else [segment['filename'] for segment in manifest['segments']]
 
 
 #------------------------------------------------------------------------------
 # File Writer
 #------------------------------------------------------------------------------
 
+class writer_config:
+    '''
+    backlog: 0 writes packets synchronously on the calling thread. A positive
+    value is the byte budget of the background flush thread, and write blocks
+    while the budget is exceeded.
+    flush_period: seconds the flush thread waits to group packets into a
+    single scatter write.
+    fsync_period: seconds between fsync calls (group commit); 0 syncs after
+    every batch and None leaves syncing to the OS.
+    segment_size, segment_duration: bytes or seconds after which the
+    recording continues in a new segment file, starting at the next keyframe.
+    None disables the limit.
+    '''
+
+    def __init__(self, backlog=0, flush_period=0, fsync_period=None, segment_size=None, segment_duration=None):
+        self.backlog = backlog
+        self.flush_period = flush_period
+        self.fsync_period = fsync_period
+        self.segment_size = segment_size
+        self.segment_duration = segment_duration
+
+
+class writer_stats:
+    def __init__(self):
+        self.packets = 0
+        self.bytes = 0
+        self.batches = 0
+        self.syncs = 0
+        self.backlog_packets = 0
+        self.backlog_bytes = 0
+        self.backlog_peak = 0
+        self.latency_last = 0.0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def get_latency_mean(self):
+        return (self.latency_total / self.packets) if (self.packets > 0) else 0.0
+
+
+_IOV_MAX = min(os.sysconf('SC_IOV_MAX') if (hasattr(os, 'sysconf') and ('SC_IOV_MAX' in os.sysconf_names)) else 1024, 1024)
+
+
+def _write_scatter(file, buffers, raw):
+    # Writes the buffers in order without joining them
+    if ((not raw) or (not hasattr(os, 'writev'))):
+        for buffer in buffers:
+            file.write(buffer)
+        return
+    fd = file.fileno()
+    buffers = [memoryview(buffer).cast('B') for buffer in buffers if (len(buffer) > 0)]
+    start = 0
+    while (start < len(buffers)):
+        count = os.writev(fd, buffers[start:(start + _IOV_MAX)])
+        while ((start < len(buffers)) and (count >= len(buffers[start]))):
+            count -= len(buffers[start])
+            start += 1
+        if (count > 0):
+            buffers[start] = buffers[start][count:]
+
+
+class _segment:
+    def __init__(self, filename, position):
+        self.filename = filename
+        self.position = position
+        self.timestamp_start = None
+        self.timestamp_stop = None
+        self.packets = 0
+
+    def add(self, timestamp, size):
+        if (self.timestamp_start is None):
+            self.timestamp_start = timestamp
+        self.timestamp_stop = timestamp
+        self.packets += 1
+        self.position += size
+
+    def get_entry(self):
+        return {'filename' : self.filename, 'timestamp_start' : self.timestamp_start, 'timestamp_stop' : self.timestamp_stop, 'packets' : self.packets, 'size' : self.position}
+
+
 class _writer:
-    def open(self, filename):
-        self._file = open(filename, 'wb')
-        self._f = weakref.finalize(self, lambda f : f.close(), self._file)
+    def open(self, filename, probe, config=None):
+        self._config = config if (config is not None) else writer_config()
+        self._async = self._config.backlog > 0
+        self._segmented = (self._config.segment_size is not None) or (self._config.segment_duration is not None)
+        self._filename = filename
+        self._probe = probe
+        self._preamble = []
+        self._segments = []
+        self._segment = _segment(get_segment_filename(filename, 0) if (self._segmented) else filename, 0)
+        self._stats = writer_stats()
+        self._error = None
+        self._open_segment(self._segment.filename)
+        if (self._segmented):
+            save_manifest(self._filename, [self._segment.get_entry()])
+        if (not self._async):
+            return
+        self._queue = collections.deque()
+        self._lock = mt.Condition()
+        self._stop = False
+        self._last_sync = time.perf_counter()
+        self._thread = mt.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _open_segment(self, filename):
+        self._file = open(filename, 'wb', buffering=0 if (self._async) else -1)
+        self._index = open(get_index_filename(filename), 'wb')
+        self._f = weakref.finalize(self, lambda f, i : (f.close(), i.close()), self._file, self._index)
+        self._index.write(_INDEX_MAGIC.encode())
+        self._last_sync = time.perf_counter()
+
+    def _close_segment(self, force):
+        self._f.detach()
+        try:
+            if ((force or (self._config.fsync_period is not None)) and (self._error is None)):
+                self._commit(True)
+        finally:
+            self._file.close()
+            self._index.close()
+
+    def _rotate(self, filename, segments, preamble):
+        # Previous segment is closed and synced before it is listed
+        self._close_segment(True)
+        if (filename is None):
+            save_manifest(self._filename, segments)
+            return
+        # The open segment is listed once its header is written so the
+        # recording can be read before close or after a crash
+        self._open_segment(filename)
+        _write_scatter(self._file, preamble, self._async)
+        self._file.flush()
+        save_manifest(self._filename, segments + [_segment(filename, sum([len(data) for data in preamble])).get_entry()])
+
+    def _check(self):
+        if (self._error is not None):
+            raise Exception(self._error)
+
+    def _enqueue(self, buffers, size, record, rotate=None):
+        with self._lock:
+            self._check()
+            while ((self._stats.backlog_bytes > 0) and ((self._stats.backlog_bytes + size) > self._config.backlog)):
+                self._lock.wait()
+                self._check()
+            self._queue.append((time.perf_counter(), buffers, size, record, rotate))
+            self._stats.backlog_packets += 1
+            self._stats.backlog_bytes += size
+            self._stats.backlog_peak = max(self._stats.backlog_peak, self._stats.backlog_bytes)
+            self._lock.notify_all()
+
+    def _dequeue(self):
+        with self._lock:
+            while ((len(self._queue) <= 0) and (not self._stop)):
+                self._lock.wait()
+            stop = self._stop
+        if ((self._config.flush_period > 0) and (not stop)):
+            time.sleep(self._config.flush_period)
+        with self._lock:
+            batch = list(self._queue)
+            self._queue.clear()
+        return batch
+
+    def _commit(self, force):
+        period = self._config.fsync_period
+        if ((period is None) and (not force)):
+            return
+        now = time.perf_counter()
+        if ((not force) and ((now - self._last_sync) < period)):
+            return
+        self._file.flush()
+        self._index.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = now
+        self._stats.syncs += 1
+
+    def _write_batch(self, buffers, records):
+        _write_scatter(self._file, buffers, True)
+        self._index.write(b''.join(records))
+
+    def _flush(self, batch):
+        buffers = []
+        records = []
+        size = 0
+        for _, data, length, record, rotate in batch:
+            if (rotate is not None):
+                self._write_batch(buffers, records)
+                buffers.clear()
+                records.clear()
+                self._rotate(*rotate)
+            buffers.extend(data)
+            size += length
+            if (record is not None):
+                records.append(record)
+        self._write_batch(buffers, records)
+        self._commit(False)
+        now = time.perf_counter()
+        with self._lock:
+            for enqueued, _, _, record, _ in batch:
+                if (record is not None):
+                    latency = now - enqueued
+                    self._stats.packets += 1
+                    self._stats.latency_last = latency
+                    self._stats.latency_total += latency
+                    self._stats.latency_max = max(self._stats.latency_max, latency)
+            self._stats.bytes += size
+            self._stats.batches += 1
+            self._stats.backlog_packets -= len(batch)
+            self._stats.backlog_bytes -= size
+            self._lock.notify_all()
+
+    def _run(self):
+        try:
+            while (True):
+                batch = self._dequeue()
+                if (len(batch) > 0):
+                    self._flush(batch)
+                elif (self._stop):
+                    break
+        except:
+            with self._lock:
+                self._error = traceback.format_exc()
+                self._lock.notify_all()
+
+    def _is_segment_full(self, timestamp):
+        segment = self._segment
+        if (segment.packets <= 0):
+            return False
+        if ((self._config.segment_size is not None) and (segment.position >= self._config.segment_size)):
+            return True
+        if ((self._config.segment_duration is not None) and ((timestamp - segment.timestamp_start) >= (self._config.segment_duration * hl2ss.TimeBase.HUNDREDS_OF_NANOSECONDS))):
+            return True
+        return False
+
+    def _next_segment(self):
+        # Each segment repeats the file header and stream configuration so it
+        # can be read on its own
+        self._segments.append(self._segment.get_entry())
+        self._segment = _segment(get_segment_filename(self._filename, len(self._segments)), 0)
+        rotate = (self._segment.filename, list(self._segments), list(self._preamble))
+        size = 0
+        for data in self._preamble:
+            size += len(data)
+        self._segment.position = size
+        if (self._async):
+            self._enqueue([], size, None, rotate)
+        else:
+            self._rotate(*rotate)
+            self._stats.bytes += size
 
     def put(self, data):
-        self._file.write(data)
+        self._preamble.append(bytes(data))
+        if (self._async):
+            self._enqueue([data], len(data), None)
+        else:
+            self._file.write(data)
+            self._stats.bytes += len(data)
+        self._segment.position += len(data)
 
     def write(self, packet):
-        self._file.write(hl2ss.pack_packet(packet))
+        header = struct.pack('<QI', packet.timestamp, len(packet.payload))
+        pose = packet.pose.tobytes() if (packet.pose is not None) else b''
+        size = len(header) + len(packet.payload) + len(pose)
+        keyframe = self._probe.is_keyframe(packet.payload)
+        if (self._segmented and keyframe and self._is_segment_full(packet.timestamp)):
+            self._next_segment()
+        record = _index_record.pack(self._segment.position, packet.timestamp, len(packet.payload), keyframe)
+        self._segment.add(packet.timestamp, size)
+        if (self._async):
+            self._enqueue([header, packet.payload, pose], size, record)
+            return
+        start = time.perf_counter()
+        self._index.write(record)
+        _write_scatter(self._file, [header, packet.payload, pose], False)
+        self._commit(False)
+        latency = time.perf_counter() - start
+        self._stats.packets += 1
+        self._stats.bytes += size
+        self._stats.latency_last = latency
+        self._stats.latency_total += latency
+        self._stats.latency_max = max(self._stats.latency_max, latency)
+
+    def get_segment_count(self):
+        return len(self._segments) + 1
+
+    def get_stats(self):
+        if (not self._async):
+            return copy.copy(self._stats)
+        with self._lock:
+            return copy.copy(self._stats)
 
     def close(self):
-        self._f.detach()
-        self._file.close()
+        if (self._async):
+            with self._lock:
+                self._stop = True
+                self._lock.notify_all()
+            self._thread.join()
+        if (self._segmented):
+            self._segments.append(self._segment.get_entry())
+            try:
+                self._rotate(None, self._segments, None)
+            finally:
+                self._check()
+            return
+        self._close_segment(False)
+        self._check()
 
 
 #------------------------------------------------------------------------------
@@ -41,80 +515,80 @@ def _create_header(port, user):
 # Mode 0 and Mode 1 Data Store
 #------------------------------------------------------------------------------
 
-def _create_wr_rm_vlc(filename, port, mode, divisor, profile, level, bitrate, options, user):
+def _create_wr_rm_vlc(filename, port, mode, divisor, profile, level, bitrate, options, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_rm_vlc(profile), config)
     w.put(_create_header(port, user))
     w.put(hl2ss._create_configuration_for_rm_vlc(mode, divisor, profile, level, bitrate, options))
     return w
 
 
-def _create_wr_rm_depth_ahat(filename, port, mode, divisor, profile_z, profile_ab, level, bitrate, options, user):
+def _create_wr_rm_depth_ahat(filename, port, mode, divisor, profile_z, profile_ab, level, bitrate, options, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_rm_depth_ahat(profile_z, profile_ab), config)
     w.put(_create_header(port, user))
     w.put(hl2ss._create_configuration_for_rm_depth_ahat(mode, divisor, profile_z, profile_ab, level, bitrate, options))
     return w
 
 
-def _create_wr_rm_depth_longthrow(filename, port, mode, divisor, png_filter, user):
+def _create_wr_rm_depth_longthrow(filename, port, mode, divisor, png_filter, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_any(), config)
     w.put(_create_header(port, user))
     w.put(hl2ss._create_configuration_for_rm_depth_longthrow(mode, divisor, png_filter))
     return w
 
 
-def _create_wr_rm_imu(filename, port, mode, user):
+def _create_wr_rm_imu(filename, port, mode, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_any(), config)
     w.put(_create_header(port, user))
     w.put(hl2ss._create_configuration_for_rm_imu(mode))
     return w
 
 
-def _create_wr_pv(filename, port, mode, width, height, framerate, divisor, profile, level, bitrate, options, user):
+def _create_wr_pv(filename, port, mode, width, height, framerate, divisor, profile, level, bitrate, options, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_pv(profile), config)
     w.put(_create_header(port, user))
     w.put(hl2ss._create_configuration_for_pv(mode, width, height, framerate, divisor, profile, level, bitrate, options))
     return w
 
 
-def _create_wr_microphone(filename, port, profile, level, user):
+def _create_wr_microphone(filename, port, profile, level, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_any(), config)
     w.put(_create_header(port, user))
     w.put(hl2ss._create_configuration_for_microphone(profile, level))
     return w
 
 
-def _create_wr_si(filename, port, user):
+def _create_wr_si(filename, port, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_any(), config)
     w.put(_create_header(port, user))
     return w
 
 
-def _create_wr_eet(filename, port, fps, user):
+def _create_wr_eet(filename, port, fps, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_any(), config)
     w.put(_create_header(port, user))
     w.put(hl2ss._create_configuration_for_eet(fps))
     return w
 
 
-def _create_wr_extended_audio(filename, port, mixer_mode, loopback_gain, microphone_gain, profile, level, user):
+def _create_wr_extended_audio(filename, port, mixer_mode, loopback_gain, microphone_gain, profile, level, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_any(), config)
     w.put(_create_header(port, user))
     w.put(hl2ss._create_configuration_for_extended_audio(mixer_mode, loopback_gain, microphone_gain, profile, level))
     return w
 
 
-def _create_wr_extended_depth(filename, port, mode, divisor, profile_z, options, user):
+def _create_wr_extended_depth(filename, port, mode, divisor, profile_z, options, user, config=None):
     w = _writer()
-    w.open(filename)
+    w.open(filename, _create_keyframe_probe_any(), config)
     w.put(_create_header(port, user))
     w.put(hl2ss._create_configuration_for_extended_depth(mode, divisor, profile_z, options))
     return w
@@ -125,7 +599,7 @@ def _create_wr_extended_depth(filename, port, mode, divisor, profile_z, options,
 #------------------------------------------------------------------------------
 
 class _wr_rm_vlc(hl2ss._context_manager):
-    def __init__(self, filename, port, mode, divisor, profile, level, bitrate, options, user):
+    def __init__(self, filename, port, mode, divisor, profile, level, bitrate, options, user, config=None):
         self.filename = filename
         self.port = port
         self.mode = mode
@@ -135,19 +609,23 @@ class _wr_rm_vlc(hl2ss._context_manager):
         self.bitrate = bitrate
         self.options = options
         self.user = user
+        self.config = config
 
     def open(self):
-        self._wr = _create_wr_rm_vlc(self.filename, self.port, self.mode, self.divisor, self.profile, self.level, self.bitrate, self.options, self.user)
+        self._wr = _create_wr_rm_vlc(self.filename, self.port, self.mode, self.divisor, self.profile, self.level, self.bitrate, self.options, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
 
 class _wr_rm_depth_ahat(hl2ss._context_manager):
-    def __init__(self, filename, port, mode, divisor, profile_z, profile_ab, level, bitrate, options, user):
+    def __init__(self, filename, port, mode, divisor, profile_z, profile_ab, level, bitrate, options, user, config=None):
         self.filename = filename
         self.port = port
         self.mode = mode
@@ -158,55 +636,67 @@ class _wr_rm_depth_ahat(hl2ss._context_manager):
         self.bitrate = bitrate
         self.options = options
         self.user = user
+        self.config = config
 
     def open(self):
-        self._wr = _create_wr_rm_depth_ahat(self.filename, self.port, self.mode, self.divisor, self.profile_z, self.profile_ab, self.level, self.bitrate, self.options, self.user)
+        self._wr = _create_wr_rm_depth_ahat(self.filename, self.port, self.mode, self.divisor, self.profile_z, self.profile_ab, self.level, self.bitrate, self.options, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
 
 class _wr_rm_depth_longthrow(hl2ss._context_manager):
-    def __init__(self, filename, port, mode, divisor, png_filter, user):
+    def __init__(self, filename, port, mode, divisor, png_filter, user, config=None):
         self.filename = filename
         self.port = port
         self.mode = mode
         self.divisor = divisor
         self.png_filter = png_filter
         self.user = user
+        self.config = config
 
     def open(self):
-        self._wr = _create_wr_rm_depth_longthrow(self.filename, self.port, self.mode, self.divisor, self.png_filter, self.user)
+        self._wr = _create_wr_rm_depth_longthrow(self.filename, self.port, self.mode, self.divisor, self.png_filter, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
 
 class _wr_rm_imu(hl2ss._context_manager):
-    def __init__(self, filename, port, mode, user):
+    def __init__(self, filename, port, mode, user, config=None):
         self.filename = filename
         self.port = port
         self.mode = mode
         self.user = user
+        self.config = config
 
     def open(self):
-        self._wr = _create_wr_rm_imu(self.filename, self.port, self.mode, self.user)
+        self._wr = _create_wr_rm_imu(self.filename, self.port, self.mode, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
 
 class _wr_pv(hl2ss._context_manager):
-    def __init__(self, filename, port, mode, width, height, framerate, divisor, profile, level, bitrate, options, user):
+    def __init__(self, filename, port, mode, width, height, framerate, divisor, profile, level, bitrate, options, user, config=None):
         self.filename = filename
         self.port = port
         self.mode = mode
@@ -219,70 +709,86 @@ class _wr_pv(hl2ss._context_manager):
         self.bitrate = bitrate
         self.options = options
         self.user = user
+        self.config = config
 
     def open(self):
-        self._wr = _create_wr_pv(self.filename, self.port, self.mode, self.width, self.height, self.framerate, self.divisor, self.profile, self.level, self.bitrate, self.options, self.user)
+        self._wr = _create_wr_pv(self.filename, self.port, self.mode, self.width, self.height, self.framerate, self.divisor, self.profile, self.level, self.bitrate, self.options, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
 
 class _wr_microphone(hl2ss._context_manager):
-    def __init__(self, filename, port, profile, level, user):
+    def __init__(self, filename, port, profile, level, user, config=None):
         self.filename = filename
         self.port = port
         self.profile = profile
         self.level = level
         self.user = user
+        self.config = config
     
     def open(self):
-        self._wr = _create_wr_microphone(self.filename, self.port, self.profile, self.level, self.user)
+        self._wr = _create_wr_microphone(self.filename, self.port, self.profile, self.level, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
 
 class _wr_si(hl2ss._context_manager):
-    def __init__(self, filename, port, user):
+    def __init__(self, filename, port, user, config=None):
         self.filename = filename
         self.port = port
         self.user = user
+        self.config = config
 
     def open(self):
-        self._wr = _create_wr_si(self.filename, self.port, self.user)
+        self._wr = _create_wr_si(self.filename, self.port, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
 
 class _wr_eet(hl2ss._context_manager):
-    def __init__(self, filename, port, fps, user):
+    def __init__(self, filename, port, fps, user, config=None):
         self.filename = filename
         self.port = port
         self.fps = fps
         self.user = user
+        self.config = config
 
     def open(self):
-        self._wr = _create_wr_eet(self.filename, self.port, self.fps, self.user)
+        self._wr = _create_wr_eet(self.filename, self.port, self.fps, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
 
 class _wr_extended_audio(hl2ss._context_manager):
-    def __init__(self, filename, port, mixer_mode, loopback_gain, microphone_gain, profile, level, user):
+    def __init__(self, filename, port, mixer_mode, loopback_gain, microphone_gain, profile, level, user, config=None):
         self.filename = filename
         self.port = port
         self.mixer_mode = mixer_mode
@@ -291,19 +797,23 @@ class _wr_extended_audio(hl2ss._context_manager):
         self.profile = profile
         self.level = level
         self.user = user
+        self.config = config
 
     def open(self):
-        self._wr = _create_wr_extended_audio(self.filename, self.port, self.mixer_mode, self.loopback_gain, self.microphone_gain, self.profile, self.level, self.user)
+        self._wr = _create_wr_extended_audio(self.filename, self.port, self.mixer_mode, self.loopback_gain, self.microphone_gain, self.profile, self.level, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
 
 class _wr_extended_depth(hl2ss._context_manager):
-    def __init__(self, filename, port, mode, divisor, profile_z, options, user):
+    def __init__(self, filename, port, mode, divisor, profile_z, options, user, config=None):
         self.filename = filename
         self.port = port
         self.mode = mode
@@ -311,13 +821,17 @@ class _wr_extended_depth(hl2ss._context_manager):
         self.profile_z = profile_z
         self.options = options
         self.user = user
+        self.config = config
 
     def open(self):
-        self._wr = _create_wr_extended_depth(self.filename, self.port, self.mode, self.divisor, self.profile_z, self.options, self.user)
+        self._wr = _create_wr_extended_depth(self.filename, self.port, self.mode, self.divisor, self.profile_z, self.options, self.user, self.config)
 
     def write(self, packet):
         self._wr.write(packet)
 
+    def get_stats(self):
+        return self._wr.get_stats()
+
     def close(self):
         self._wr.close()
 
@@ -326,79 +840,79 @@ class _wr_extended_depth(hl2ss._context_manager):
 # Writer From Receiver
 #------------------------------------------------------------------------------
 
-def _create_wr_from_rx_rm_vlc(filename, rx, user):
-    return _wr_rm_vlc(filename, rx.port, rx.mode, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options, user)
+def _create_wr_from_rx_rm_vlc(filename, rx, user, config=None):
+    return _wr_rm_vlc(filename, rx.port, rx.mode, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options, user, config)
 
 
-def _create_wr_from_rx_rm_depth_ahat(filename, rx, user):
-    return _wr_rm_depth_ahat(filename, rx.port, rx.mode, rx.divisor, rx.profile_z, rx.profile_ab, rx.level, rx.bitrate, rx.options, user)
+def _create_wr_from_rx_rm_depth_ahat(filename, rx, user, config=None):
+    return _wr_rm_depth_ahat(filename, rx.port, rx.mode, rx.divisor, rx.profile_z, rx.profile_ab, rx.level, rx.bitrate, rx.options, user, config)
 
 
-def _create_wr_from_rx_rm_depth_longthrow(filename, rx, user):
-    return _wr_rm_depth_longthrow(filename, rx.port, rx.mode, rx.divisor, rx.png_filter, user)
+def _create_wr_from_rx_rm_depth_longthrow(filename, rx, user, config=None):
+    return _wr_rm_depth_longthrow(filename, rx.port, rx.mode, rx.divisor, rx.png_filter, user, config)
 
 
-def _create_wr_from_rx_rm_imu(filename, rx, user):
-    return _wr_rm_imu(filename, rx.port, rx.mode, user)
+def _create_wr_from_rx_rm_imu(filename, rx, user, config=None):
+    return _wr_rm_imu(filename, rx.port, rx.mode, user, config)
 
 
-def _create_wr_from_rx_pv(filename, rx, user):
-    return _wr_pv(filename, rx.port, rx.mode, rx.width, rx.height, rx.framerate, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options, user)
+def _create_wr_from_rx_pv(filename, rx, user, config=None):
+    return _wr_pv(filename, rx.port, rx.mode, rx.width, rx.height, rx.framerate, rx.divisor, rx.profile, rx.level, rx.bitrate, rx.options, user, config)
 
 
-def _create_wr_from_rx_microphone(filename, rx, user):
-    return _wr_microphone(filename, rx.port, rx.profile, rx.level, user)
+def _create_wr_from_rx_microphone(filename, rx, user, config=None):
+    return _wr_microphone(filename, rx.port, rx.profile, rx.level, user, config)
 
 
-def _create_wr_from_rx_si(filename, rx, user):
-    return _wr_si(filename, rx.port, user)
+def _create_wr_from_rx_si(filename, rx, user, config=None):
+    return _wr_si(filename, rx.port, user, config)
 
 
-def _create_wr_from_rx_eet(filename, rx, user):
-    return _wr_eet(filename, rx.port, rx.fps, user)
+def _create_wr_from_rx_eet(filename, rx, user, config=None):
+    return _wr_eet(filename, rx.port, rx.fps, user, config)
 
 
-def _create_wr_from_rx_extended_audio(filename, rx, user):
-    return _wr_extended_audio(filename, rx.port, rx.mixer_mode, rx.loopback_gain, rx.microphone_gain, rx.profile, rx.level, user)
+def _create_wr_from_rx_extended_audio(filename, rx, user, config=None):
+    return _wr_extended_audio(filename, rx.port, rx.mixer_mode, rx.loopback_gain, rx.microphone_gain, rx.profile, rx.level, user, config)
 
 
-def _create_wr_from_rx_extended_depth(filename, rx, user):
-    return _wr_extended_depth(filename, rx.port, rx.mode, rx.divisor, rx.profile_z, rx.options, user)
+def _create_wr_from_rx_extended_depth(filename, rx, user, config=None):
+    return _wr_extended_depth(filename, rx.port, rx.mode, rx.divisor, rx.profile_z, rx.options, user, config)
 
 
-def create_wr_from_rx(filename, rx, user):
+def create_wr_from_rx(filename, rx, user, config=None):
     if (rx.port == hl2ss.StreamPort.RM_VLC_LEFTFRONT):
-        return _create_wr_from_rx_rm_vlc(filename, rx, user)
+        return _create_wr_from_rx_rm_vlc(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.RM_VLC_LEFTLEFT):
-        return _create_wr_from_rx_rm_vlc(filename, rx, user)
+        return _create_wr_from_rx_rm_vlc(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.RM_VLC_RIGHTFRONT):
-        return _create_wr_from_rx_rm_vlc(filename, rx, user)
+        return _create_wr_from_rx_rm_vlc(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.RM_VLC_RIGHTRIGHT):
-        return _create_wr_from_rx_rm_vlc(filename, rx, user)
+        return _create_wr_from_rx_rm_vlc(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.RM_DEPTH_AHAT):
-        return _create_wr_from_rx_rm_depth_ahat(filename, rx, user)
+        return _create_wr_from_rx_rm_depth_ahat(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW):
-        return _create_wr_from_rx_rm_depth_longthrow(filename, rx, user)
+        return _create_wr_from_rx_rm_depth_longthrow(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.RM_IMU_ACCELEROMETER):
-        return _create_wr_from_rx_rm_imu(filename, rx, user)
+        return _create_wr_from_rx_rm_imu(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.RM_IMU_GYROSCOPE):
-        return _create_wr_from_rx_rm_imu(filename, rx, user)
+        return _create_wr_from_rx_rm_imu(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.RM_IMU_MAGNETOMETER):
-        return _create_wr_from_rx_rm_imu(filename, rx, user)
+        return _create_wr_from_rx_rm_imu(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.PERSONAL_VIDEO):
-        return _create_wr_from_rx_pv(filename, rx, user)
+        return _create_wr_from_rx_pv(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.MICROPHONE):
-        return _create_wr_from_rx_microphone(filename, rx, user)
+        return _create_wr_from_rx_microphone(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.SPATIAL_INPUT):
-        return _create_wr_from_rx_si(filename, rx, user)
+        return _create_wr_from_rx_si(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.EXTENDED_EYE_TRACKER):
-        return _create_wr_from_rx_eet(filename, rx, user)
+        return _create_wr_from_rx_eet(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.EXTENDED_AUDIO):
-        return _create_wr_from_rx_extended_audio(filename, rx, user)
+        return _create_wr_from_rx_extended_audio(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.EXTENDED_VIDEO):
-        return _create_wr_from_rx_pv(filename, rx, user)
+        return _create_wr_from_rx_pv(filename, rx, user, config)
     if (rx.port == hl2ss.StreamPort.EXTENDED_DEPTH):
-        return _create_wr_from_rx_extended_depth(filename, rx, user)
+        return _create_wr_from_rx_extended_depth(filename, rx, user, config)
 
 
 #------------------------------------------------------------------------------
@@ -407,7 +921,7 @@ def create_wr_from_rx(filename, rx, user):
 
 class _reader:
     def __init__(self):
-        self._unpacker = hl2ss._unpacker()
+        self._unpacker = hl2ss._unpacker_into()
 
     def open(self, filename, chunk_size):
         self._file = open(filename, 'rb')
@@ -415,11 +929,25 @@ class _reader:
         self._chunk_size = chunk_size
         self._eof = False
 
+    def read(self, size):
+        return self._file.read(size)
+
     def get(self, format):
-        return struct.unpack(format, self._file.read(struct.calcsize(format)))
+        return struct.unpack(format, self.read(struct.calcsize(format)))
+
+    def get_data_offset(self):
+        return self._file.tell()
+
+    def get_pose_size(self):
+        return self._unpacker._pose_size
+
+    def seek(self, offset):
+        self._file.seek(offset)
+        self._unpacker.clear()
+        self._eof = False
     
     def get_header(self):
-        return self.get(f'<{len(_MAGIC)}sH') + (self._file.read(self.get('<I')[0]),)
+        return self.get(f'<{len(_MAGIC)}sH') + (self.read(self.get('<I')[0]),)
     
     def get_configuration_for_mode(self):
         return self.get('<B')
@@ -455,51 +983,51 @@ class _reader:
     
     def get_configuration_for_rm_vlc(self):
         configuration = self.get_configuration_for_mode() + self.get_configuration_for_video_divisor() + self.get_configuration_for_video_encoding() + self.get_configuration_for_h26x_encoding()
-        self._unpacker.reset(configuration[0])
+        self._unpacker.reset(configuration[0], self._chunk_size)
         return configuration
 
     def get_configuration_for_rm_depth_ahat(self):
         configuration = self.get_configuration_for_mode() + self.get_configuration_for_video_divisor() + self.get_configuration_for_depth_encoding() + self.get_configuration_for_video_encoding() + self.get_configuration_for_h26x_encoding()
-        self._unpacker.reset(configuration[0])
+        self._unpacker.reset(configuration[0], self._chunk_size)
         return configuration
     
     def get_configuration_for_rm_depth_longthrow(self):
         configuration = self.get_configuration_for_mode() + self.get_configuration_for_video_divisor() + self.get_configuration_for_png_encoding()
-        self._unpacker.reset(configuration[0])
+        self._unpacker.reset(configuration[0], self._chunk_size)
         return configuration
     
     def get_configuration_for_rm_imu(self):
         configuration = self.get_configuration_for_mode()[0]
-        self._unpacker.reset(configuration)
+        self._unpacker.reset(configuration, self._chunk_size)
         return configuration
     
     def get_configuration_for_pv(self):
         configuration = self.get_configuration_for_mode() + self.get_configuration_for_video_format() + self.get_configuration_for_video_divisor() + self.get_configuration_for_video_encoding() + self.get_configuration_for_h26x_encoding()
-        self._unpacker.reset(configuration[0])
+        self._unpacker.reset(configuration[0], self._chunk_size)
         return configuration
     
     def get_configuration_for_microphone(self):
         configuration = self.get_configuration_for_audio_encoding()
-        self._unpacker.reset(hl2ss.StreamMode.MODE_0)
+        self._unpacker.reset(hl2ss.StreamMode.MODE_0, self._chunk_size)
         return configuration
 
     def get_configuration_for_si(self):
-        self._unpacker.reset(hl2ss.StreamMode.MODE_0)
+        self._unpacker.reset(hl2ss.StreamMode.MODE_0, self._chunk_size)
         return None
     
     def get_configuration_for_eet(self):
         configuration = self.get_configuration_for_framerate()[0]
-        self._unpacker.reset(hl2ss.StreamMode.MODE_1)
+        self._unpacker.reset(hl2ss.StreamMode.MODE_1, self._chunk_size)
         return configuration
     
     def get_configuration_for_extended_audio(self):
         configuration = self.get_configuration_for_mrc_audio() + self.get_configuration_for_audio_encoding()
-        self._unpacker.reset(hl2ss.StreamMode.MODE_0)
+        self._unpacker.reset(hl2ss.StreamMode.MODE_0, self._chunk_size)
         return configuration
 
     def get_configuration_for_extended_depth(self):
         configuration = self.get_configuration_for_mode() + self.get_configuration_for_video_divisor() + self.get_configuration_for_depth_encoding() + self.get_configuration_for_h26x_encoding()
-        self._unpacker.reset(configuration[0])
+        self._unpacker.reset(configuration[0], self._chunk_size)
         return configuration
     
     def get_next_packet(self):
@@ -508,21 +1036,68 @@ class _reader:
                 return self._unpacker.get()
             if (self._eof):
                 return None
-            chunk = self._file.read(self._chunk_size)
-            self._eof = len(chunk) < self._chunk_size
-            self._unpacker.extend(chunk)
+            self._eof = self._unpacker.read(self._file.readinto) <= 0
 
     def close(self):
         self._f.detach()
         self._file.close()
 
 
+#------------------------------------------------------------------------------
+# Memory Mapped File Reader
+#------------------------------------------------------------------------------
+
+class _reader_mapped(_reader):
+    # Packets are views into the mapping: payload is a read-only memoryview and
+    # pose is a read-only numpy array, both valid until they are released
+    def open(self, filename, chunk_size):
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._f = weakref.finalize(self, lambda f : f.close(), self._file)
+        self._chunk_size = chunk_size
+        self._size = len(self._map)
+        self._position = 0
+
+    def read(self, size):
+        data = self._view[self._position:(self._position + size)].tobytes()
+        self._position += size
+        return data
+
+    def get_data_offset(self):
+        return self._position
+
+    def seek(self, offset):
+        self._position = offset
+
+    def get_next_packet(self):
+        begin = self._position + 12
+        if (begin > self._size):
+            return None
+        timestamp, payload_size = struct.unpack_from('<QI', self._map, self._position)
+        end = begin + payload_size
+        pose_size = self._unpacker._pose_size
+        if ((end + pose_size) > self._size):
+            return None
+        self._position = end + pose_size
+        return hl2ss._packet(timestamp, self._view[begin:end], np.frombuffer(self._map, dtype=np.float32, count=16, offset=end).reshape((4, 4)) if (pose_size == 64) else None)
+
+    def close(self):
+        self._f.detach()
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+
 #------------------------------------------------------------------------------
 # Mode 0 and Mode 1 Data Load
 #------------------------------------------------------------------------------
 
-def _create_rd(filename, chunk):
-    rd = _reader()
+def _create_rd(filename, chunk, mapped):
+    rd = _reader_mapped() if (mapped) else _reader()
     rd.open(filename, chunk)
     return rd
 
@@ -585,19 +1160,79 @@ class _rd(hl2ss._context_manager):
         f = _rd.__method_table[self.port]
         self.__load = types.MethodType(f[0], self)
 
-    def __init__(self, filename, chunk):
+    def __init__(self, filename, chunk, mapped=False):
         self.filename = filename
         self.chunk = chunk
+        self.mapped = mapped
 
     def open(self):
-        self._rd = _create_rd(self.filename, self.chunk)
+        self._rd = _create_rd(self.filename, self.chunk, self.mapped)
         self.magic, self.port, self.user = self._rd.get_header()
         self.__build()
         self.__load()
+        self._index = None
         
     def get_next_packet(self):
         return self._rd.get_next_packet()
 
+    def _load_index(self):
+        index = load_index(self.filename)
+        return build_index(self.filename) if (index is None) else index
+
+    def get_index(self):
+        if (self._index is None):
+            self._index = self._load_index()
+            self._timestamps = self._index['timestamp'].tolist()
+            self._keyframes = np.flatnonzero(self._index['keyframe'])
+        return self._index
+
+    def get_frame_count(self):
+        return len(self.get_index())
+
+    def get_frame_index(self, timestamp, time_preference=hl2ss_mx.TimePreference.PREFER_NEAREST, tiebreak_right=False):
+        self.get_index()
+        return hl2ss_mx.get_nearest_timestamp(self._timestamps, timestamp, time_preference, tiebreak_right)
+
+    def get_keyframe_index(self, index):
+        self.get_index()
+        position = int(np.searchsorted(self._keyframes, index, side='right')) - 1
+        return int(self._keyframes[position]) if (position >= 0) else 0
+
+    def seek(self, index):
+        self._rd.seek(int(self.get_index()['offset'][index]))
+
+    def seek_timestamp(self, timestamp, time_preference=hl2ss_mx.TimePreference.PREFER_NEAREST, tiebreak_right=False):
+        index = self.get_frame_index(timestamp, time_preference, tiebreak_right)
+        if (index is not None):
+            self.seek(index)
+        return index
+
+    def _get_frame(self, index):
+        self.seek(index)
+        return self.get_next_packet()
+
+    def __len__(self):
+        return self.get_frame_count()
+
+    def __getitem__(self, index):
+        count = self.get_frame_count()
+        if (index < 0):
+            index += count
+        if ((index < 0) or (index >= count)):
+            raise IndexError('frame index out of range')
+        return self._get_frame(index)
+
+    def get_by_timestamp(self, timestamp, time_preference=hl2ss_mx.TimePreference.PREFER_NEAREST, tiebreak_right=False):
+        index = self.get_frame_index(timestamp, time_preference, tiebreak_right)
+        return (-1, None) if (index is None) else (index, self._get_frame(index))
+
+    def iter_range(self, timestamp_start, timestamp_stop):
+        self.get_index()
+        begin = bisect.bisect_left(self._timestamps, timestamp_start)
+        end = bisect.bisect_right(self._timestamps, timestamp_stop)
+        for index in range(begin, end):
+            yield self._get_frame(index)
+
     def close(self):
         self._rd.close()
 
@@ -694,16 +1329,20 @@ class _rd_decoded(_rd):
         self.__set_codec = types.MethodType(f[0], self)
         self.__decode    = types.MethodType(f[1], self)
 
-    def __init__(self, filename, chunk, format):
-        super().__init__(filename, chunk)
+    def __init__(self, filename, chunk, format, mapped=False, cache_size=2):
+        super().__init__(filename, chunk, mapped)
         self.format = format
+        self.cache_size = cache_size
 
     def open(self):
         super().open()
         self.__build()
         self.__set_codec()
+        self._gops = collections.OrderedDict()
+        self._cursor = None
         
     def get_next_packet(self):
+        self._cursor = None
         while (True):
             data = super().get_next_packet()
             if (data is None):
@@ -712,16 +1351,147 @@ class _rd_decoded(_rd):
             if (data.payload is not None):
                 return data
 
+    def seek(self, index):
+        # Decoding restarts at the preceding keyframe
+        keyframe = self.get_keyframe_index(index)
+        super().seek(keyframe)
+        self.__set_codec()
+        self._cursor = None
+        for _ in range(keyframe, index):
+            self.__decode(super().get_next_packet().payload)
+
+    def _get_frame(self, index):
+        # Decoded GOPs are cached by keyframe index and extended while frames
+        # are requested in order
+        keyframe = self.get_keyframe_index(index)
+        gop = self._gops.get(keyframe, None)
+        if (gop is None):
+            gop = []
+            self._gops[keyframe] = gop
+            while (len(self._gops) > max(self.cache_size, 1)):
+                self._gops.popitem(last=False)
+        self._gops.move_to_end(keyframe)
+        if ((index - keyframe) < len(gop)):
+            return gop[index - keyframe]
+        if (self._cursor != (keyframe + len(gop))):
+            gop.clear()
+            super(_rd_decoded, self).seek(keyframe)
+            self.__set_codec()
+        while (len(gop) <= (index - keyframe)):
+            data = super(_rd_decoded, self).get_next_packet()
+            data.payload = self.__decode(data.payload)
+            gop.append(data if (data.payload is not None) else None)
+        self._cursor = keyframe + len(gop)
+        return gop[index - keyframe]
+
     def close(self):
         super().close()
 
 
+#------------------------------------------------------------------------------
+# Keyframe Probe From Reader
+#------------------------------------------------------------------------------
+
+def _create_keyframe_probe_from_rd(rd):
+    if (rd.port == hl2ss.StreamPort.RM_VLC_LEFTFRONT):
+        return _create_keyframe_probe_rm_vlc(rd.profile)
+    if (rd.port == hl2ss.StreamPort.RM_VLC_LEFTLEFT):
+        return _create_keyframe_probe_rm_vlc(rd.profile)
+    if (rd.port == hl2ss.StreamPort.RM_VLC_RIGHTFRONT):
+        return _create_keyframe_probe_rm_vlc(rd.profile)
+    if (rd.port == hl2ss.StreamPort.RM_VLC_RIGHTRIGHT):
+        return _create_keyframe_probe_rm_vlc(rd.profile)
+    if (rd.port == hl2ss.StreamPort.RM_DEPTH_AHAT):
+        return _create_keyframe_probe_rm_depth_ahat(rd.profile_z, rd.profile_ab)
+    if (rd.port == hl2ss.StreamPort.PERSONAL_VIDEO):
+        return _create_keyframe_probe_pv(rd.profile)
+    if (rd.port == hl2ss.StreamPort.EXTENDED_VIDEO):
+        return _create_keyframe_probe_pv(rd.profile)
+    
+    return _create_keyframe_probe_any()
+
+
+#------------------------------------------------------------------------------
+# Segmented Reader
+#------------------------------------------------------------------------------
+
+class _rd_segments(_rd):
+    def __init__(self, filename, chunk, decoded, mapped=False):
+        self.filename = filename
+        self.chunk = chunk
+        self.decoded = decoded
+        self.mapped = mapped
+
+    def _select(self, segment):
+        # Only one segment file is open at a time
+        if (segment == self._segment):
+            return self._current
+        if (self._current is not None):
+            self._current.close()
+            self._current = None
+        self._segment = segment
+        if ((segment is not None) and (segment < len(self._segments))):
+            self._current = _create_rd_file(self._segments[segment], self.chunk, self.decoded, self.mapped)
+            self._current.open()
+        return self._current
+
+    def open(self):
+        self._segments = get_segments(self.filename)
+        self._segment = None
+        self._current = None
+        rd = self._select(0)
+        for key, value in vars(rd).items():
+            if ((not key.startswith('_')) and (key not in ['filename', 'chunk', 'mapped', 'format', 'cache_size'])):
+                setattr(self, key, value)
+        self._index = None
+
+    def get_next_packet(self):
+        while (self._current is not None):
+            data = self._current.get_next_packet()
+            if (data is not None):
+                return data
+            self._select(self._segment + 1)
+        return None
+
+    def get_segments(self):
+        return self._segments
+
+    def _load_index(self):
+        indices = []
+        for filename in self._segments:
+            index = load_index(filename)
+            indices.append(build_index(filename) if (index is None) else index)
+        self._starts = np.cumsum([0] + [len(index) for index in indices]).tolist()
+        return np.concatenate(indices)
+
+    def _locate(self, index):
+        self.get_index()
+        segment = bisect.bisect_right(self._starts, index) - 1
+        return (self._select(segment), index - self._starts[segment])
+
+    def seek(self, index):
+        rd, index = self._locate(index)
+        rd.seek(index)
+
+    def _get_frame(self, index):
+        rd, index = self._locate(index)
+        return rd._get_frame(index)
+
+    def close(self):
+        self._select(None)
+
+
 #------------------------------------------------------------------------------
 # Create Reader
 #------------------------------------------------------------------------------
 
-def create_rd(filename, chunk, decoded):
-    return _rd_decoded(filename, chunk, decoded) if (decoded) else _rd(filename, chunk)
+def _create_rd_file(filename, chunk, decoded, mapped):
+    return _rd_decoded(filename, chunk, decoded, mapped) if (decoded) else _rd(filename, chunk, mapped)
+
+
+def create_rd(filename, chunk, decoded, mapped=False):
+    # Segmented recordings are read as a single stream
+    return _rd_segments(filename, chunk, decoded, mapped) if (is_segmented(filename)) else _create_rd_file(filename, chunk, decoded, mapped)
 
 
 #------------------------------------------------------------------------------
@@ -776,3 +1546,120 @@ class sequencer(hl2ss._context_manager):
     def close(self):
         self.rd.close()
 
+
+
+#------------------------------------------------------------------------------
+# Player
+#------------------------------------------------------------------------------
+
+class _prefetch(mt.Thread):
+    def __init__(self, rd, size, event_stop):
+        super().__init__(daemon=True)
+        self._rd = rd
+        self._queue = queue.Queue(max(size, 1))
+        self._event_stop = event_stop
+
+    def _put(self, data):
+        while (not self._event_stop.is_set()):
+            try:
+                self._queue.put(data, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(self):
+        try:
+            while (True):
+                data = self._rd.get_next_packet()
+                if ((not self._put(data)) or (data is None)):
+                    return
+        except:
+            self._put(hl2ss._packet(None, traceback.format_exc(), None))
+
+    def get(self):
+        data = self._queue.get()
+        if ((data is not None) and (data.timestamp is None)):
+            raise Exception(data.payload)
+        return data
+
+    def drain(self):
+        while (True):
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class player(hl2ss._context_manager):
+    '''
+    Yields the packets of several recordings in global timestamp order using a
+    k-way merge. Each reader is read and decoded ahead by its own thread. With
+    speed set, packets are released in real time scaled by speed.
+    '''
+
+    def __init__(self, readers, speed=None, prefetch=8):
+        self.readers = readers
+        self.speed = speed
+        self.prefetch = prefetch
+
+    def open(self):
+        self._event_stop = mt.Event()
+        self._workers = []
+        for rd in self.readers:
+            rd.open()
+            self._workers.append(_prefetch(rd, self.prefetch, self._event_stop))
+        for worker in self._workers:
+            worker.start()
+        self._heads = [None] * len(self.readers)
+        self._heap = []
+        for index in range(len(self.readers)):
+            self._fetch(index)
+        self._base = None
+
+    def _fetch(self, index):
+        data = self._workers[index].get()
+        self._heads[index] = data
+        if (data is not None):
+            heapq.heappush(self._heap, (data.timestamp, index))
+
+    def _pace(self, timestamp):
+        if (self.speed is None):
+            return
+        if (self._base is None):
+            self._base = (time.perf_counter(), timestamp)
+        delay = self._base[0] + ((timestamp - self._base[1]) / (self.speed * hl2ss.TimeBase.HUNDREDS_OF_NANOSECONDS)) - time.perf_counter()
+        if (delay > 0):
+            time.sleep(delay)
+
+    def get_next_packet(self):
+        if (len(self._heap) <= 0):
+            return None
+        timestamp, index = heapq.heappop(self._heap)
+        data = self._heads[index]
+        self._fetch(index)
+        self._pace(timestamp)
+        return (index, data)
+
+    def __iter__(self):
+        while (True):
+            data = self.get_next_packet()
+            if (data is None):
+                return
+            yield data
+
+    def peek(self, index):
+        # Next packet of the given reader, None if it has no packets left
+        return self._heads[index]
+
+    def get_reader(self, index):
+        return self.readers[index]
+
+    def close(self):
+        self._event_stop.set()
+        for worker in self._workers:
+            worker.drain()
+        for worker in self._workers:
+            worker.join()
+        for rd in self.readers:
+            rd.close()
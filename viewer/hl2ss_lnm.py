@@ -2,6 +2,7 @@
 import struct
 import hl2ss
 import hl2ss_dp
+import hl2ss_dw
 
 
 #------------------------------------------------------------------------------
@@ -43,6 +44,19 @@ def create_sockopt(settimeout=None, tcp_nodelay=1):
     return sockopt
 
 
+def create_decode_worker(kind=hl2ss_dw.WorkerKind.THREAD, maxsize=32, policy=hl2ss_dw.OverflowPolicy.BLOCK):
+    decode_worker = {
+        'kind'    : kind,
+        'maxsize' : maxsize,
+        'policy'  : policy,
+    }
+    return decode_worker
+
+
+def create_rx_decode_worker(rx, decode_worker):
+    return rx if (decode_worker is None) else hl2ss_dw.rx_decode_worker(rx, **decode_worker)
+
+
 #------------------------------------------------------------------------------
 # Control
 #------------------------------------------------------------------------------
@@ -65,7 +79,7 @@ def stop_subsystem_pv(host, port, sockopt=None):
 # Modes 0, 1
 #------------------------------------------------------------------------------
 
-def rx_rm_vlc(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_VLC, mode=hl2ss.StreamMode.MODE_1, divisor=1, profile=hl2ss.VideoProfile.H265_MAIN, level=hl2ss.H26xLevel.DEFAULT, bitrate=None, options=None, decoded=True):
+def rx_rm_vlc(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_VLC, mode=hl2ss.StreamMode.MODE_1, divisor=1, profile=hl2ss.VideoProfile.H265_MAIN, level=hl2ss.H26xLevel.DEFAULT, bitrate=None, options=None, decoded=True, decode_worker=None, lazy=False, thread_type=hl2ss.VideoCodecThreading.SLICE, thread_count=0):
     if (sockopt is None):
         sockopt = create_sockopt()
 
@@ -79,10 +93,10 @@ def rx_rm_vlc(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_VLC, mode=hl2ss
     else:
         options[hl2ss.H26xEncoderProperty.CODECAPI_AVEncMPVGOPSize] = options.get(hl2ss.H26xEncoderProperty.CODECAPI_AVEncMPVGOPSize, get_video_codec_default_gop_size(hl2ss.Parameters_RM_VLC.FPS, divisor, profile))
     
-    return hl2ss.rx_decoded_rm_vlc(host, port, sockopt, chunk, mode, divisor, profile, level, bitrate, options) if (decoded) else hl2ss.rx_rm_vlc(host, port, sockopt, chunk, mode, divisor, profile, level, bitrate, options)
+    return create_rx_decode_worker(hl2ss.rx_decoded_rm_vlc(host, port, sockopt, chunk, mode, divisor, profile, level, bitrate, options, lazy, thread_type, thread_count), decode_worker) if (decoded) else hl2ss.rx_rm_vlc(host, port, sockopt, chunk, mode, divisor, profile, level, bitrate, options)
 
 
-def rx_rm_depth_ahat(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_DEPTH_AHAT, mode=hl2ss.StreamMode.MODE_1, divisor=1, profile_z=hl2ss.DepthProfile.SAME, profile_ab=hl2ss.VideoProfile.H265_MAIN, level=hl2ss.H26xLevel.DEFAULT, bitrate=None, options=None, decoded=True):
+def rx_rm_depth_ahat(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_DEPTH_AHAT, mode=hl2ss.StreamMode.MODE_1, divisor=1, profile_z=hl2ss.DepthProfile.SAME, profile_ab=hl2ss.VideoProfile.H265_MAIN, level=hl2ss.H26xLevel.DEFAULT, bitrate=None, options=None, decoded=True, decode_worker=None, lazy=False, thread_type=hl2ss.VideoCodecThreading.SLICE, thread_count=0):
     if (sockopt is None):
         sockopt = create_sockopt()
 
@@ -94,24 +108,24 @@ def rx_rm_depth_ahat(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_DEPTH_AH
     else:
         options[hl2ss.H26xEncoderProperty.CODECAPI_AVEncMPVGOPSize] = options.get(hl2ss.H26xEncoderProperty.CODECAPI_AVEncMPVGOPSize, get_video_codec_default_gop_size(hl2ss.Parameters_RM_DEPTH_AHAT.FPS, divisor, profile_ab))
     
-    return hl2ss.rx_decoded_rm_depth_ahat(host, port, sockopt, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options) if (decoded) else hl2ss.rx_rm_depth_ahat(host, port, sockopt, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options)
+    return create_rx_decode_worker(hl2ss.rx_decoded_rm_depth_ahat(host, port, sockopt, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options, lazy, thread_type, thread_count), decode_worker) if (decoded) else hl2ss.rx_rm_depth_ahat(host, port, sockopt, chunk, mode, divisor, profile_z, profile_ab, level, bitrate, options)
 
 
-def rx_rm_depth_longthrow(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_DEPTH_LONGTHROW, mode=hl2ss.StreamMode.MODE_1, divisor=1, png_filter=hl2ss.PNGFilterMode.PAETH, decoded=True):
+def rx_rm_depth_longthrow(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_DEPTH_LONGTHROW, mode=hl2ss.StreamMode.MODE_1, divisor=1, png_filter=hl2ss.PNGFilterMode.PAETH, decoded=True, decode_worker=None, lazy=False):
     if (sockopt is None):
         sockopt = create_sockopt()
 
-    return hl2ss.rx_decoded_rm_depth_longthrow(host, port, sockopt, chunk, mode, divisor, png_filter) if (decoded) else hl2ss.rx_rm_depth_longthrow(host, port, sockopt, chunk, mode, divisor, png_filter)
+    return create_rx_decode_worker(hl2ss.rx_decoded_rm_depth_longthrow(host, port, sockopt, chunk, mode, divisor, png_filter, lazy), decode_worker) if (decoded) else hl2ss.rx_rm_depth_longthrow(host, port, sockopt, chunk, mode, divisor, png_filter)
 
 
-def rx_rm_imu(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_IMU, mode=hl2ss.StreamMode.MODE_1, decoded=True):
+def rx_rm_imu(host, port, sockopt=None, chunk=hl2ss.ChunkSize.RM_IMU, mode=hl2ss.StreamMode.MODE_1, decoded=True, decode_worker=None):
     if (sockopt is None):
         sockopt = create_sockopt()
 
-    return hl2ss.rx_decoded_rm_imu(host, port, sockopt, chunk, mode) if (decoded) else hl2ss.rx_rm_imu(host, port, sockopt, chunk, mode)
+    return create_rx_decode_worker(hl2ss.rx_decoded_rm_imu(host, port, sockopt, chunk, mode), decode_worker) if (decoded) else hl2ss.rx_rm_imu(host, port, sockopt, chunk, mode)
 
 
-def rx_pv(host, port, sockopt=None, chunk=hl2ss.ChunkSize.PERSONAL_VIDEO, mode=hl2ss.StreamMode.MODE_1, width=1920, height=1080, framerate=30, divisor=1, profile=hl2ss.VideoProfile.H265_MAIN, level=hl2ss.H26xLevel.DEFAULT, bitrate=None, options=None, decoded_format='bgr24'):
+def rx_pv(host, port, sockopt=None, chunk=hl2ss.ChunkSize.PERSONAL_VIDEO, mode=hl2ss.StreamMode.MODE_1, width=1920, height=1080, framerate=30, divisor=1, profile=hl2ss.VideoProfile.H265_MAIN, level=hl2ss.H26xLevel.DEFAULT, bitrate=None, options=None, decoded_format='bgr24', decode_worker=None, lazy=False, pool_size=0, thread_type=hl2ss.VideoCodecThreading.SLICE, thread_count=0):
     if (sockopt is None):
         sockopt = create_sockopt()
     
@@ -123,38 +137,38 @@ def rx_pv(host, port, sockopt=None, chunk=hl2ss.ChunkSize.PERSONAL_VIDEO, mode=h
     else:
         options[hl2ss.H26xEncoderProperty.CODECAPI_AVEncMPVGOPSize] = options.get(hl2ss.H26xEncoderProperty.CODECAPI_AVEncMPVGOPSize, get_video_codec_default_gop_size(framerate, divisor, profile))
     
-    return hl2ss.rx_decoded_pv(host, port, sockopt, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options, decoded_format) if (decoded_format) else hl2ss.rx_pv(host, port, sockopt, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options)
+    return create_rx_decode_worker(hl2ss.rx_decoded_pv(host, port, sockopt, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options, decoded_format, lazy, pool_size, thread_type, thread_count), decode_worker) if (decoded_format) else hl2ss.rx_pv(host, port, sockopt, chunk, mode, width, height, framerate, divisor, profile, level, bitrate, options)
 
 
-def rx_microphone(host, port, sockopt=None, chunk=hl2ss.ChunkSize.MICROPHONE, profile=hl2ss.AudioProfile.AAC_24000, level=hl2ss.AACLevel.L2, decoded=True):
+def rx_microphone(host, port, sockopt=None, chunk=hl2ss.ChunkSize.MICROPHONE, profile=hl2ss.AudioProfile.AAC_24000, level=hl2ss.AACLevel.L2, decoded=True, decode_worker=None):
     if (sockopt is None):
         sockopt = create_sockopt()
 
-    return hl2ss.rx_decoded_microphone(host, port, sockopt, chunk, profile, level) if (decoded) else hl2ss.rx_microphone(host, port, sockopt, chunk, profile, level)
+    return create_rx_decode_worker(hl2ss.rx_decoded_microphone(host, port, sockopt, chunk, profile, level), decode_worker) if (decoded) else hl2ss.rx_microphone(host, port, sockopt, chunk, profile, level)
 
 
-def rx_si(host, port, sockopt=None, chunk=hl2ss.ChunkSize.SPATIAL_INPUT, decoded=True):
+def rx_si(host, port, sockopt=None, chunk=hl2ss.ChunkSize.SPATIAL_INPUT, decoded=True, decode_worker=None):
     if (sockopt is None):
         sockopt = create_sockopt()
 
-    return hl2ss.rx_decoded_si(host, port, sockopt, chunk) if (decoded) else hl2ss.rx_si(host, port, sockopt, chunk)
+    return create_rx_decode_worker(hl2ss.rx_decoded_si(host, port, sockopt, chunk), decode_worker) if (decoded) else hl2ss.rx_si(host, port, sockopt, chunk)
 
 
-def rx_eet(host, port, sockopt=None, chunk=hl2ss.ChunkSize.EXTENDED_EYE_TRACKER, fps=30, decoded=True):
+def rx_eet(host, port, sockopt=None, chunk=hl2ss.ChunkSize.EXTENDED_EYE_TRACKER, fps=30, decoded=True, decode_worker=None):
     if (sockopt is None):
         sockopt = create_sockopt()
 
-    return hl2ss.rx_decoded_eet(host, port, sockopt, chunk, fps) if (decoded) else hl2ss.rx_eet(host, port, sockopt, chunk, fps)
+    return create_rx_decode_worker(hl2ss.rx_decoded_eet(host, port, sockopt, chunk, fps), decode_worker) if (decoded) else hl2ss.rx_eet(host, port, sockopt, chunk, fps)
 
 
-def rx_extended_audio(host, port, sockopt=None, chunk=hl2ss.ChunkSize.EXTENDED_AUDIO, mixer_mode=hl2ss.MixerMode.BOTH, loopback_gain=1.0, microphone_gain=1.0, profile=hl2ss.AudioProfile.AAC_24000, level=hl2ss.AACLevel.L2, decoded=True):
+def rx_extended_audio(host, port, sockopt=None, chunk=hl2ss.ChunkSize.EXTENDED_AUDIO, mixer_mode=hl2ss.MixerMode.BOTH, loopback_gain=1.0, microphone_gain=1.0, profile=hl2ss.AudioProfile.AAC_24000, level=hl2ss.AACLevel.L2, decoded=True, decode_worker=None):
     if (sockopt is None):
         sockopt = create_sockopt()
     
-    return hl2ss.rx_decoded_extended_audio(host, port, sockopt, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level) if (decoded) else hl2ss.rx_extended_audio(host, port, sockopt, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level)
+    return create_rx_decode_worker(hl2ss.rx_decoded_extended_audio(host, port, sockopt, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level), decode_worker) if (decoded) else hl2ss.rx_extended_audio(host, port, sockopt, chunk, mixer_mode, loopback_gain, microphone_gain, profile, level)
 
 
-def rx_extended_depth(host, port, sockopt=None, chunk=hl2ss.ChunkSize.EXTENDED_DEPTH, mode=hl2ss.StreamMode.MODE_1, divisor=1, profile_z=hl2ss.DepthProfile.ZDEPTH, media_index=0xFFFFFFFF, stride_mask=0x3F, decoded=True):
+def rx_extended_depth(host, port, sockopt=None, chunk=hl2ss.ChunkSize.EXTENDED_DEPTH, mode=hl2ss.StreamMode.MODE_1, divisor=1, profile_z=hl2ss.DepthProfile.ZDEPTH, media_index=0xFFFFFFFF, stride_mask=0x3F, decoded=True, decode_worker=None):
     if (sockopt is None):
         sockopt = create_sockopt()
     
@@ -162,7 +176,7 @@ def rx_extended_depth(host, port, sockopt=None, chunk=hl2ss.ChunkSize.EXTENDED_D
     options[hl2ss.H26xEncoderProperty.HL2SSAPI_VideoMediaIndex] = media_index
     options[hl2ss.H26xEncoderProperty.HL2SSAPI_VideoStrideMask] = stride_mask
 
-    return hl2ss.rx_decoded_extended_depth(host, port, sockopt, chunk, mode, divisor, profile_z, options) if (decoded) else hl2ss.rx_extended_depth(host, port, sockopt, chunk, mode, divisor, profile_z, options)
+    return create_rx_decode_worker(hl2ss.rx_decoded_extended_depth(host, port, sockopt, chunk, mode, divisor, profile_z, options), decode_worker) if (decoded) else hl2ss.rx_extended_depth(host, port, sockopt, chunk, mode, divisor, profile_z, options)
 
 
 def rx_dp_mrc(host, port, user, password, chunk=hl2ss_dp.ChunkSize.MRC, configuration=None, decoded_format='bgr24'):
@@ -1,48 +1,222 @@
 
 import multiprocessing as mp
+import multiprocessing.shared_memory
+import multiprocessing.resource_tracker
 import threading as mt
+import os
+import numpy as np
 import queue
+import pickle
+import struct
 import traceback
+import weakref
 import hl2ss
 import hl2ss_mx
 
 
+#------------------------------------------------------------------------------
+# Shared Memory
+#------------------------------------------------------------------------------
+
+def _shared_memory_try_close(shm):
+    try:
+        shm.close()
+    except BufferError:
+        return False
+    return True
+
+
+class _shared_memory(mp.shared_memory.SharedMemory):
+    def __del__(self):
+        # Frames still referencing the mapping at exit keep it open until the process ends
+        _shared_memory_try_close(self)
+
+
+def _shared_memory_attach(name):
+    # Attaching must not leave the segment registered with the resource tracker,
+    # which would unlink it when this process exits (track is available in 3.13+)
+    try:
+        return _shared_memory(name=name, track=False)
+    except TypeError:
+        pass
+    shm = _shared_memory(name=name)
+    if (os.name != 'nt'):
+        mp.resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _shared_memory_close(shm, views):
+    # Frames returned to the user may still reference the mapping, in which
+    # case it is closed once the last view handed out with them is released
+    if (_shared_memory_try_close(shm)):
+        return
+    # Without views to wait for the mapping is closed when shm is collected
+    for view in views:
+        weakref.finalize(view, _shared_memory_try_close, shm)
+
+
+class _shared_packet:
+    def __init__(self, timestamp, frame_stamp):
+        self.timestamp = timestamp
+        self.frame_stamp = frame_stamp
+
+
+class _shared_ring:
+    _header = struct.Struct('<II')
+    _align = 64
+
+    def __init__(self, name, slots, slot_size):
+        self.name = name
+        self.slots = slots
+        self.slot_size = slot_size
+
+    def _map(self):
+        base = (self.slots * 8 + _shared_ring._align - 1) & ~(_shared_ring._align - 1)
+        self._stamps = np.ndarray((self.slots,), dtype=np.int64, buffer=self._shm.buf)
+        self._data = self._shm.buf[base:]
+
+    def create(self):
+        size = ((self.slots * 8 + _shared_ring._align - 1) & ~(_shared_ring._align - 1)) + (self.slots * self.slot_size)
+        self._shm = _shared_memory(create=True, size=size)
+        self.name = self._shm.name
+        self._views = []
+        self._map()
+        self._stamps[:] = -1
+
+    def attach(self):
+        self._shm = _shared_memory_attach(self.name)
+        self._views = []
+        self._map()
+
+    def get_descriptor(self):
+        return (self.name, self.slots, self.slot_size)
+
+    def get_frame_stamp(self, frame_stamp):
+        return int(self._stamps[frame_stamp % self.slots])
+
+    def write(self, frame_stamp, data):
+        buffers = []
+        header = pickle.dumps(data, protocol=5, buffer_callback=buffers.append)
+        raw = [buffer.raw() for buffer in buffers]
+        lengths = struct.pack(f'<{len(raw)}Q', *[len(view) for view in raw])
+        offset = _shared_ring._header.size + len(lengths) + len(header)
+        offsets = []
+        for view in raw:
+            offset = (offset + _shared_ring._align - 1) & ~(_shared_ring._align - 1)
+            offsets.append(offset)
+            offset += len(view)
+        if (offset > self.slot_size):
+            raise Exception(f'Packet of {offset} bytes does not fit in shared memory slot of {self.slot_size} bytes')
+        index = frame_stamp % self.slots
+        slot = self._data[(index * self.slot_size):((index + 1) * self.slot_size)]
+        self._stamps[index] = -1
+        _shared_ring._header.pack_into(slot, 0, len(raw), len(header))
+        position = _shared_ring._header.size
+        slot[position:(position + len(lengths))] = lengths
+        position += len(lengths)
+        slot[position:(position + len(header))] = header
+        for view, position in zip(raw, offsets):
+            slot[position:(position + len(view))] = view
+        self._stamps[index] = frame_stamp
+
+    def read(self, frame_stamp):
+        index = frame_stamp % self.slots
+        if (self._stamps[index] != frame_stamp):
+            return None
+        slot = self._data[(index * self.slot_size):((index + 1) * self.slot_size)]
+        try:
+            count, size = _shared_ring._header.unpack_from(slot, 0)
+            position = _shared_ring._header.size
+            lengths = struct.unpack_from(f'<{count}Q', slot, position)
+            position += count * 8
+            header = bytes(slot[position:(position + size)])
+        except:
+            return None
+        if (self._stamps[index] != frame_stamp):
+            return None
+        offset = position + size
+        self._views = [reference for reference in self._views if (reference() is not None)]
+        buffers = []
+        for length in lengths:
+            offset = (offset + _shared_ring._align - 1) & ~(_shared_ring._align - 1)
+            # The frame keeps the array alive and its base view is released only after the frame is
+            buffer = np.frombuffer(slot[offset:(offset + length)], dtype=np.uint8)
+            self._views.append(weakref.ref(buffer.base))
+            buffers.append(buffer)
+            offset += length
+        return pickle.loads(header, buffers=buffers)
+
+    def close(self):
+        self._stamps = None
+        self._data.release()
+        _shared_memory_close(self._shm, [view for view in (reference() for reference in self._views) if (view is not None)])
+
+    def unlink(self):
+        # An attaching process sharing our resource tracker drops the registration
+        if (os.name != 'nt'):
+            mp.resource_tracker.register(self._shm._name, 'shared_memory')
+        self._shm.unlink()
+
+
+def _create_shared_ring(descriptor):
+    return None if (descriptor is None) else _shared_ring(*descriptor)
+
+
 #------------------------------------------------------------------------------
 # Source
 #------------------------------------------------------------------------------
 
 class _net_source:
-    def __init__(self, dout):
+    def __init__(self, dout, lead):
         self.dout = dout
+        self.lead = lead
 
 
 class _source:
-    def __init__(self, receiver, event_stop, source_wires, interconnect_wires):
+    def __init__(self, receiver, event_stop, source_wires, interconnect_wires, shared):
         self._source = receiver
         self._event_stop = event_stop
         self._source_wires = source_wires
         self._interconnect_wires = interconnect_wires
+        self._shared = shared
 
     def stop(self):
         self._event_stop.set()
 
+    def _wrap(self, data):
+        if (self._ring is None):
+            return data
+        self._ring.write(self._frame_stamp, data)
+        data = _shared_packet(data.timestamp, self._frame_stamp)
+        self._frame_stamp += 1
+        return data
+
     def run(self):
+        self._ring = _create_shared_ring(self._shared)
+        self._frame_stamp = 0
+        if (self._ring is not None):
+            self._ring.attach()
         try:
             with self._source as client:
                 while (not self._event_stop.is_set()):
-                    self._source_wires.dout.put(client.get_next_packet())
+                    # Stay at most SHARED_LEAD frames ahead of the interconnect so buffered frames are not overwritten
+                    if (self._source_wires.lead is not None):
+                        self._source_wires.lead.acquire()
+                    self._source_wires.dout.put(self._wrap(client.get_next_packet()))
                     self._interconnect_wires.semaphore.release()
         except:
             self._source_wires.dout.put(hl2ss._packet(None, traceback.format_exc(), None))
             self._interconnect_wires.semaphore.release()
             self._event_stop.wait()
         self._source_wires.dout.put(None)
+        if (self._ring is not None):
+            self._ring.close()
 
 
 class _mp_source(mp.Process):
-    def __init__(self, receiver, event_stop, source_wires, interconnect_wires):
+    def __init__(self, receiver, event_stop, source_wires, interconnect_wires, shared):
         super().__init__()
-        self._source = _source(receiver, event_stop, source_wires, interconnect_wires)
+        self._source = _source(receiver, event_stop, source_wires, interconnect_wires, shared)
 
     def stop(self):
         self._source.stop()
@@ -52,9 +226,9 @@ class _mp_source(mp.Process):
 
 
 class _mt_source(mt.Thread):
-    def __init__(self, receiver, event_stop, source_wires, interconnect_wires):
+    def __init__(self, receiver, event_stop, source_wires, interconnect_wires, shared):
         super().__init__()
-        self._source = _source(receiver, event_stop, source_wires, interconnect_wires)
+        self._source = _source(receiver, event_stop, source_wires, interconnect_wires, shared)
 
     def stop(self):
         self._source.stop()
@@ -63,12 +237,13 @@ class _mt_source(mt.Thread):
         self._source.run()
 
 
-def _create_interface_source(source_kind):
-    return _net_source(mp.Queue() if (source_kind == hl2ss_mx.SourceKind.MP) else queue.Queue() if (source_kind == hl2ss_mx.SourceKind.MT) else None)
+def _create_interface_source(source_kind, shared):
+    lead = None if (shared is None) else mp.Semaphore(_interconnect.SHARED_LEAD) if (source_kind == hl2ss_mx.SourceKind.MP) else mt.Semaphore(_interconnect.SHARED_LEAD) if (source_kind == hl2ss_mx.SourceKind.MT) else None
+    return _net_source(mp.Queue() if (source_kind == hl2ss_mx.SourceKind.MP) else queue.Queue() if (source_kind == hl2ss_mx.SourceKind.MT) else None, lead)
 
 
-def _create_source(receiver, source_wires, interconnect_wires, source_kind):
-    return _mp_source(receiver, mp.Event(), source_wires, interconnect_wires) if (source_kind == hl2ss_mx.SourceKind.MP) else _mt_source(receiver, mt.Event(), source_wires, interconnect_wires) if (source_kind == hl2ss_mx.SourceKind.MT) else None
+def _create_source(receiver, source_wires, interconnect_wires, source_kind, shared):
+    return _mp_source(receiver, mp.Event(), source_wires, interconnect_wires, shared) if (source_kind == hl2ss_mx.SourceKind.MP) else _mt_source(receiver, mt.Event(), source_wires, interconnect_wires, shared) if (source_kind == hl2ss_mx.SourceKind.MT) else None
 
 
 #------------------------------------------------------------------------------
@@ -90,8 +265,9 @@ class _interconnect(mp.Process):
     IPC_SINK_GET_NEAREST = 1
     IPC_SINK_GET_BUFFERED_FRAME = 2
     IPC_SINK_GET_SOURCE_STRING = 3
+    SHARED_LEAD = 8
     
-    def __init__(self, receiver, buffer_size, event_stop, source_kind, interconnect_wires, sink_wires):
+    def __init__(self, receiver, buffer_size, event_stop, source_kind, interconnect_wires, sink_wires, shared_slot_size):
         super().__init__()
         self._receiver = receiver
         self._buffer_size = buffer_size
@@ -99,6 +275,7 @@ class _interconnect(mp.Process):
         self._source_kind = source_kind
         self._interconnect_wires = interconnect_wires
         self._sink_wires = sink_wires
+        self._shared_slot_size = shared_slot_size
 
     def stop(self):
         self._interconnect_wires.din.put((_interconnect.IPC_CONTROL_STOP,))
@@ -115,23 +292,22 @@ class _interconnect(mp.Process):
             sink_wires.event.set()
             if (sink_wires.semaphore is not None):
                 sink_wires.semaphore.release()
-        sink_wires.din.put((self._key, self._frame_stamp))
+        sink_wires.din.put((self._key, self._frame_stamp, self._shared))
         
     def _detach(self, key):
         self._remove.append(key)
         return None
 
     def _get_nearest(self, timestamp, time_preference, tiebreak_right, select_data):
-        buffer = self._buffer.get()
-        index = hl2ss_mx.get_nearest_packet(buffer, timestamp, time_preference, tiebreak_right)
-        return (-1, None) if (index is None) else (self._frame_stamp - self._buffer.length() + 1 + index, buffer[index] if (select_data) else None)
+        index = hl2ss_mx.get_nearest_packet(self._buffer, timestamp, time_preference, tiebreak_right)
+        return (-1, None) if (index is None) else (self._frame_stamp - self._buffer.length() + 1 + index, self._buffer[index] if (select_data) else None)
 
     def _get_buffered_frame(self, frame_stamp, select_data):
         if (frame_stamp < 0):
             frame_stamp = self._frame_stamp + frame_stamp + 1
         n = self._buffer.length()
         index = n - 1 - self._frame_stamp + frame_stamp
-        return (hl2ss_mx.Status.DISCARDED, frame_stamp, None) if (index < 0) else (hl2ss_mx.Status.WAIT, frame_stamp, None) if (index >= n) else (hl2ss_mx.Status.OK, frame_stamp, self._buffer.get()[index] if (select_data) else None)
+        return (hl2ss_mx.Status.DISCARDED, frame_stamp, None) if (index < 0) else (hl2ss_mx.Status.WAIT, frame_stamp, None) if (index >= n) else (hl2ss_mx.Status.OK, frame_stamp, self._buffer[index] if (select_data) else None)
 
     def _get_source_status(self):
         return self._source_status
@@ -152,6 +328,7 @@ class _interconnect(mp.Process):
         else:
             self._frame_stamp += 1
             self._buffer.append(data)
+            self._release_lead()
         for sink_wires in self._sink.values():
             if (sink_wires.semaphore is not None):
                 sink_wires.semaphore.release()
@@ -190,16 +367,29 @@ class _interconnect(mp.Process):
         for key in self._remove:
             self._sink.pop(key)
 
+    def _release_lead(self):
+        if (self._source_wires.lead is not None):
+            self._source_wires.lead.release()
+
     def _process_flush(self):
         while (self._source_wires.dout.get() != None):
-            pass
+            self._release_lead()
 
     def run(self):
         self._source_status = True
         self._source_string = None
 
-        self._source_wires = _create_interface_source(self._source_kind)
-        self._source = _create_source(self._receiver, self._source_wires, self._interconnect_wires, self._source_kind)
+        if (self._shared_slot_size is not None):
+            # Buffered frames plus the frames the source may write ahead
+            self._ring = _shared_ring(None, self._buffer_size + _interconnect.SHARED_LEAD, self._shared_slot_size)
+            self._ring.create()
+            self._shared = self._ring.get_descriptor()
+        else:
+            self._ring = None
+            self._shared = None
+
+        self._source_wires = _create_interface_source(self._source_kind, self._shared)
+        self._source = _create_source(self._receiver, self._source_wires, self._interconnect_wires, self._source_kind, self._shared)
         self._source.start()
 
         self._buffer = hl2ss_mx.RingBuffer(self._buffer_size)
@@ -218,15 +408,19 @@ class _interconnect(mp.Process):
 
         self._source.stop()
         self._process_flush()
-        self._source.join()        
+        self._source.join()
+
+        if (self._ring is not None):
+            self._ring.close()
+            self._ring.unlink()
 
 
 def _create_interface_interconnect():
     return _net_interconnect(mp.Queue(), mp.Queue(), mp.Semaphore(_interconnect.IPC_SEMAPHORE_VALUE))
 
 
-def _create_interconnect(receiver, buffer_size, source_kind, interconnect_wires, sink_wires):
-    return _interconnect(receiver, buffer_size, mp.Event(), source_kind, interconnect_wires, sink_wires)
+def _create_interconnect(receiver, buffer_size, source_kind, interconnect_wires, sink_wires, shared_slot_size):
+    return _interconnect(receiver, buffer_size, mp.Event(), source_kind, interconnect_wires, sink_wires, shared_slot_size)
 
 
 #------------------------------------------------------------------------------
@@ -253,19 +447,32 @@ class _sink:
         self._sink_wires.semaphore.release()
 
     def get_attach_response(self):
-        self._key, frame_stamp = self._sink_wires.din.get()
+        self._key, frame_stamp, shared = self._sink_wires.din.get()
+        self._ring = _create_shared_ring(shared)
+        if (self._ring is not None):
+            self._ring.attach()
         return frame_stamp
         
     def detach(self):
         self._sink_wires.dout.put((_interconnect.IPC_SINK_DETACH, self._key))
         self._interconnect_wires.semaphore.release()
         self._sink_wires.din.get()
+        if (self._ring is not None):
+            self._ring.close()
+
+    def _load(self, data):
+        return self._ring.read(data.frame_stamp) if (isinstance(data, _shared_packet)) else data
+
+    def is_frame_valid(self, frame_stamp):
+        return (self._ring is None) or (self._ring.get_frame_stamp(frame_stamp) == frame_stamp)
 
     def get_nearest(self, timestamp, time_preference=hl2ss_mx.TimePreference.PREFER_NEAREST, tiebreak_right=False, select_data=True):
         self._sink_wires.dout.put((_interconnect.IPC_SINK_GET_NEAREST, timestamp, time_preference, tiebreak_right, select_data))
         self._interconnect_wires.semaphore.release()
         frame_stamp, data = self._sink_wires.din.get()
-        return frame_stamp, data
+        loaded = self._load(data)
+        # Overwritten after the interconnect replied, report as not found
+        return (-1, None) if (isinstance(data, _shared_packet) and (loaded is None)) else (frame_stamp, loaded)
 
     def get_frame_stamp(self):
         _, frame_stamp, _ = self.get_buffered_frame(-1, False)
@@ -279,7 +486,8 @@ class _sink:
         self._sink_wires.dout.put((_interconnect.IPC_SINK_GET_BUFFERED_FRAME, frame_stamp, select_data))
         self._interconnect_wires.semaphore.release()
         state, frame_stamp, data = self._sink_wires.din.get() 
-        return state, frame_stamp, data
+        data = self._load(data)
+        return (hl2ss_mx.Status.DISCARDED, frame_stamp, None) if ((state == hl2ss_mx.Status.OK) and select_data and (data is None)) else (state, frame_stamp, data)
     
     def get_nearest_frame_stamp(self, timestamp, time_preference=hl2ss_mx.TimePreference.PREFER_NEAREST, tiebreak_right=False):
         frame_stamp, _ = self.get_nearest(timestamp, time_preference, tiebreak_right, False)
@@ -312,10 +520,10 @@ def _create_sink(sink_wires, interconnect_wires):
 #------------------------------------------------------------------------------
 
 class _module:
-    def __init__(self, receiver, buffer_size, source_kind, default_sink_semaphore):
+    def __init__(self, receiver, buffer_size, source_kind, default_sink_semaphore, shared_slot_size):
         self._interconnect_wires = _create_interface_interconnect()
         self._default_sink_wires = _create_interface_sink_default(default_sink_semaphore)
-        self._interconnect = _create_interconnect(receiver, buffer_size, source_kind, self._interconnect_wires, self._default_sink_wires)
+        self._interconnect = _create_interconnect(receiver, buffer_size, source_kind, self._interconnect_wires, self._default_sink_wires, shared_slot_size)
         self._default_sink = _create_sink(self._default_sink_wires, self._interconnect_wires)
 
     def start(self):
@@ -347,8 +555,8 @@ class producer:
     def configure(self, port, receiver):
         self._rx[port] = receiver
 
-    def initialize(self, port, buffer_size=512, source_kind=hl2ss_mx.SourceKind.MP, default_sink_semaphore=None):
-        self._producer[port] = _module(self._rx[port], buffer_size, source_kind, default_sink_semaphore)
+    def initialize(self, port, buffer_size=512, source_kind=hl2ss_mx.SourceKind.MP, default_sink_semaphore=None, shared_slot_size=None):
+        self._producer[port] = _module(self._rx[port], buffer_size, source_kind, default_sink_semaphore, shared_slot_size)
 
     def start(self, port):        
         self._producer[port].start()
@@ -399,18 +607,19 @@ class consumer:
 #------------------------------------------------------------------------------
 
 class stream(hl2ss._context_manager):
-    def __init__(self, rx, buffer_size=512, source_kind=hl2ss_mx.SourceKind.MP, semaphore=None):
+    def __init__(self, rx, buffer_size=512, source_kind=hl2ss_mx.SourceKind.MP, semaphore=None, shared_slot_size=None):
         self.rx = rx
         self.buffer_size = buffer_size
         self.source_kind = source_kind
         self.semaphore = semaphore
+        self.shared_slot_size = shared_slot_size
 
     def open(self):
         self._tag = self.rx.port
 
         self._producer = producer()
         self._producer.configure(self._tag, self.rx)
-        self._producer.initialize(self._tag, self.buffer_size, self.source_kind, self.semaphore)
+        self._producer.initialize(self._tag, self.buffer_size, self.source_kind, self.semaphore, self.shared_slot_size)
         self._producer.start(self._tag)
 
         self._consumer = consumer()
@@ -453,6 +662,9 @@ class stream(hl2ss._context_manager):
     def get_source_string(self):
         return self._sink.get_source_string()
 
+    def is_frame_valid(self, frame_stamp):
+        return self._sink.is_frame_valid(frame_stamp)
+
     def close(self):
         self._sink.detach()
         self._producer.stop(self._tag)
@@ -1,4 +1,7 @@
 
+import numpy as np
+import collections
+import bisect
 import hl2ss
 
 
@@ -25,44 +28,56 @@ class SourceKind:
 
 class RingBuffer:
     '''
-    Implements a ring-buffer with the different processing after it becomes full.
-    Idea: https://www.oreilly.com/library/view/python-cookbook/0596001673/ch05s19.html
+    Implements a ring-buffer with O(1) logical indexing.
+    Items and their timestamps are written twice, at i and i + size_max, so the
+    buffered items are always the contiguous window [cur, cur + length).
+    Timestamps are kept as a list for scalar bisection and as an array for
+    batched queries.
     '''
 
     def __init__(self, size_max=64):
         self.max = size_max
-        self.data = []
-
-    class __Full:
-        def append(self, x):
-            self.data[self.cur] = x
-            self.cur = (self.cur + 1) % self.max
-
-        def get(self):
-            return self.data[self.cur:]+self.data[:self.cur]
-
-        def last(self):
-            return self.get()[-1]
-
-        def length(self):
-            return self.max
+        self.data = [None] * (2 * size_max)
+        self.keys = [0] * (2 * size_max)
+        self.timestamps = np.zeros(2 * size_max, dtype=np.int64)
+        self.cur = 0
+        self.count = 0
 
     def append(self, x):
-        self.data.append(x)
-        if (len(self.data) == self.max):
-            self.cur = 0
-            self.__class__ = self.__Full
+        if (self.count < self.max):
+            index = self.count
+            self.count += 1
+        else:
+            index = self.cur
+            self.cur = (self.cur + 1) % self.max
+        self.data[index] = x
+        self.data[index + self.max] = x
+        self.keys[index] = x.timestamp
+        self.keys[index + self.max] = x.timestamp
+        self.timestamps[index] = x.timestamp
+        self.timestamps[index + self.max] = x.timestamp
 
     def get(self):
-        return self.data
+        return self.data[self.cur:(self.cur + self.count)]
+
+    def get_timestamps(self):
+        return self.timestamps[self.cur:(self.cur + self.count)]
 
     def last(self):
-        if (len(self.data) == 0):
-            return None
-        return self.get()[-1]
+        return None if (self.count == 0) else self.data[self.cur + self.count - 1]
 
     def length(self):
-        return len(self.data)
+        return self.count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if (index < 0):
+            index += self.count
+        if ((index < 0) or (index >= self.count)):
+            raise IndexError('RingBuffer index out of range')
+        return self.data[self.cur + index]
 
 
 def _get_packet_interval(data, timestamp, l, r):
@@ -79,7 +94,46 @@ def _get_packet_interval(data, timestamp, l, r):
     return (l, r)
 
 
+def _get_nearest_index(t0, t1, i0, i1, timestamp, time_preference, tiebreak_right):
+    if (timestamp <= t0):
+        return i0
+    if (timestamp >= t1):
+        return i1
+    
+    if (time_preference == TimePreference.PREFER_PAST):
+        return i0
+    if (time_preference == TimePreference.PREFER_FUTURE):
+        return i1
+    
+    d0 = timestamp - t0
+    d1 = t1 - timestamp
+
+    if (d0 < d1):
+        return i0
+    if (d0 > d1):
+        return i1
+    
+    return i1 if (tiebreak_right) else i0
+
+
+def _get_nearest_key(keys, lo, n, timestamp, time_preference, tiebreak_right):
+    if (n <= 0):
+        return None
+
+    r = min(max(bisect.bisect_left(keys, timestamp, lo, lo + n) - lo, 1), n - 1)
+    l = max(r - 1, 0)
+
+    return _get_nearest_index(keys[lo + l], keys[lo + r], l, r, timestamp, time_preference, tiebreak_right)
+
+
+def get_nearest_timestamp(timestamps, timestamp, time_preference=TimePreference.PREFER_NEAREST, tiebreak_right=False):
+    return _get_nearest_key(timestamps, 0, len(timestamps), timestamp, time_preference, tiebreak_right)
+
+
 def get_nearest_packet(data, timestamp, time_preference=TimePreference.PREFER_NEAREST, tiebreak_right=False):
+    if (isinstance(data, RingBuffer)):
+        return _get_nearest_key(data.keys, data.cur, data.count, timestamp, time_preference, tiebreak_right)
+
     n = len(data)
 
     if (n <= 0):
@@ -90,28 +144,197 @@ def get_nearest_packet(data, timestamp, time_preference=TimePreference.PREFER_NE
     if (si[0] == si[1]):
         return si[0]
     
-    t0 = data[si[0]].timestamp
-    t1 = data[si[1]].timestamp
+    return _get_nearest_index(data[si[0]].timestamp, data[si[1]].timestamp, si[0], si[1], timestamp, time_preference, tiebreak_right)
+
+
+def get_nearest_packets(data, timestamps, time_preference=TimePreference.PREFER_NEAREST, tiebreak_right=False):
+    t = data.get_timestamps() if (isinstance(data, RingBuffer)) else np.array([packet.timestamp for packet in data], dtype=np.int64)
+    x = np.asarray(timestamps, dtype=np.int64)
+    n = len(t)
+
+    if (n <= 0):
+        return None
+
+    r = np.clip(np.searchsorted(t, x), 1, n - 1)
+    l = np.maximum(r - 1, 0)
+
+    t0 = t[l]
+    t1 = t[r]
 
-    if (timestamp <= t0):
-        return si[0]
-    if (timestamp >= t1):
-        return si[1]
-    
     if (time_preference == TimePreference.PREFER_PAST):
-        return si[0]
-    if (time_preference == TimePreference.PREFER_FUTURE):
-        return si[1]
-    
-    d0 = timestamp - t0
-    d1 = t1 - timestamp
+        select_right = np.zeros(x.shape, dtype=bool)
+    elif (time_preference == TimePreference.PREFER_FUTURE):
+        select_right = np.ones(x.shape, dtype=bool)
+    else:
+        d0 = x - t0
+        d1 = t1 - x
+        select_right = (d0 > d1) | ((d0 == d1) & tiebreak_right)
 
-    if (d0 < d1):
-        return si[0]
-    if (d0 > d1):
-        return si[1]
-    
-    return si[1 if (tiebreak_right) else 0] 
+    return np.where((select_right | (x >= t1)) & (x > t0), r, l)
+
+
+#------------------------------------------------------------------------------
+# Synchronizer
+#------------------------------------------------------------------------------
+
+class _sync_stream:
+    def __init__(self, source):
+        self.source = source
+        self.frame_stamp = None
+        self.discarded = 0
+
+    def next(self):
+        if (self.frame_stamp is None):
+            self.frame_stamp = max(self.source.get_frame_stamp(), 0)
+        while (True):
+            state, _, data = self.source.get_buffered_frame(self.frame_stamp)
+            if (state == Status.OK):
+                self.frame_stamp += 1
+                return (Status.OK, data)
+            if (state == Status.WAIT):
+                return (Status.WAIT if (self.source.get_source_status()) else None, None)
+            frame_stamp = self.source.get_frame_stamp()
+            self.discarded += frame_stamp - self.frame_stamp
+            self.frame_stamp = frame_stamp
+
+
+class _sync_sequencer:
+    def __init__(self, source):
+        self.source = source
+        self.discarded = 0
+
+    def next(self):
+        data = self.source.get_left()
+        if (data is None):
+            return (None, None)
+        self.source.advance()
+        return (Status.OK, data)
+
+
+class _sync_reader:
+    def __init__(self, source):
+        self.source = source
+        self.discarded = 0
+
+    def next(self):
+        data = self.source.get_next_packet()
+        return (None, None) if (data is None) else (Status.OK, data)
+
+
+def _create_sync_source(source):
+    return _sync_sequencer(source) if (hasattr(source, 'advance')) else _sync_stream(source) if (hasattr(source, 'get_buffered_frame')) else _sync_reader(source)
+
+
+def _get_sync_setting(setting, n):
+    return list(setting) if (isinstance(setting, (list, tuple))) else [setting] * n
+
+
+class synchronizer:
+    '''
+    Matches every frame of the reference source with the nearest frame of each
+    other source. Sources are hl2ss_mp streams or sinks, hl2ss_io sequencers or
+    hl2ss_io readers. Timestamps are assumed to be monotonic so each source
+    only keeps the frames bracketing the current reference timestamp.
+    '''
+
+    def __init__(self, sources, reference=0, tolerance=None, time_preference=TimePreference.PREFER_NEAREST, tiebreak_right=False):
+        n = len(sources)
+        self.sources = sources
+        self.reference = reference
+        self.tolerance = _get_sync_setting(tolerance, n)
+        self.time_preference = _get_sync_setting(time_preference, n)
+        self.tiebreak_right = _get_sync_setting(tiebreak_right, n)
+
+        self._cursors = [_create_sync_source(source) for source in sources]
+        self._windows = [collections.deque() for _ in range(n)]
+        self._ended = [False] * n
+        self._last = [None] * n
+        self._pending = None
+        self._dropped = [0] * n
+        self._missed = [0] * n
+        self._matched = 0
+
+    def _drop(self, index, data):
+        if (data is not self._last[index]):
+            self._dropped[index] += 1
+
+    def _match(self, index, timestamp):
+        window = self._windows[index]
+        cursor = self._cursors[index]
+
+        while (((len(window) <= 0) or (window[-1].timestamp < timestamp)) and (not self._ended[index])):
+            state, data = cursor.next()
+            if (state == Status.WAIT):
+                break
+            if (state is None):
+                self._ended[index] = True
+                break
+            window.append(data)
+
+        while ((len(window) >= 2) and (window[1].timestamp <= timestamp)):
+            self._drop(index, window.popleft())
+
+        if (len(window) <= 0):
+            return (None if (self._ended[index]) else Status.WAIT, None)
+
+        l = window[0]
+        if (l.timestamp >= timestamp):
+            r = l
+        elif (len(window) >= 2):
+            r = window[1]
+        elif ((self.time_preference[index] == TimePreference.PREFER_PAST) or self._ended[index]):
+            r = l
+        else:
+            return (Status.WAIT, None)
+
+        data = l if (_get_nearest_index(l.timestamp, r.timestamp, 0, 1, timestamp, self.time_preference[index], self.tiebreak_right[index]) == 0) else r
+        tolerance = self.tolerance[index]
+
+        return (Status.OK, data if ((tolerance is None) or (abs(data.timestamp - timestamp) <= tolerance)) else None)
+
+    def get_next_frames(self):
+        while (True):
+            if (self._pending is None):
+                state, data = self._cursors[self.reference].next()
+                if (state != Status.OK):
+                    return (state, None)
+                self._pending = data
+
+            timestamp = self._pending.timestamp
+            frames = []
+
+            for index in range(len(self.sources)):
+                if (index == self.reference):
+                    frames.append(self._pending)
+                    continue
+                state, data = self._match(index, timestamp)
+                if (state != Status.OK):
+                    return (state, None)
+                frames.append(data)
+
+            self._pending = None
+
+            if (None in frames):
+                for index, data in enumerate(frames):
+                    if (data is None):
+                        self._missed[index] += 1
+                self._dropped[self.reference] += 1
+                continue
+
+            for index, data in enumerate(frames):
+                self._last[index] = data
+            self._matched += 1
+
+            return (Status.OK, frames)
+
+    def get_matched_count(self):
+        return self._matched
+
+    def get_dropped_count(self):
+        return [dropped + cursor.discarded for dropped, cursor in zip(self._dropped, self._cursors)]
+
+    def get_missed_count(self):
+        return list(self._missed)
 
 
 #------------------------------------------------------------------------------
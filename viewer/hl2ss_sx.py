@@ -0,0 +1,88 @@
+import selectors
+import threading as mt
+import traceback
+import hl2ss
+
+
+#------------------------------------------------------------------------------
+# Sink
+#------------------------------------------------------------------------------
+
+def _create_dispatch(sink):
+    return sink if (callable(sink)) else sink.put
+
+
+#------------------------------------------------------------------------------
+# Multiplexer
+#------------------------------------------------------------------------------
+
+class _stream:
+    def __init__(self, rx, dispatch):
+        self.rx = rx
+        self.dispatch = dispatch
+
+
+class multiplexer(hl2ss._context_manager):
+    def __init__(self, timeout=0.1):
+        self.timeout = timeout
+        self._rx = dict()
+        self._sink = dict()
+
+    def configure(self, port, receiver, sink):
+        self._rx[port] = receiver
+        self._sink[port] = sink
+
+    def get_receiver(self, port):
+        return self._rx[port]
+
+    def _open_stream(self, port):
+        rx = self._rx[port]
+        rx.open()
+        self._streams[port] = _stream(rx, _create_dispatch(self._sink[port]))
+        self._selector.register(rx, selectors.EVENT_READ, port)
+
+    def _close_stream(self, port, source_string):
+        stream = self._streams.pop(port)
+        self._selector.unregister(stream.rx)
+        try:
+            stream.rx.close()
+        except:
+            pass
+        if (source_string is not None):
+            stream.dispatch(hl2ss._packet(None, source_string, None))
+        stream.dispatch(None)
+
+    def _process_stream(self, port):
+        stream = self._streams[port]
+        try:
+            while (True):
+                data = stream.rx.get_next_packet(False)
+                if (data is None):
+                    return
+                stream.dispatch(data)
+        except:
+            self._close_stream(port, traceback.format_exc())
+
+    def process(self, timeout=None):
+        for key, _ in self._selector.select(timeout):
+            self._process_stream(key.data)
+
+    def _run(self):
+        while ((not self._event_stop.is_set()) and (len(self._streams) > 0)):
+            self.process(self.timeout)
+
+    def open(self):
+        self._selector = selectors.DefaultSelector()
+        self._streams = dict()
+        for port in self._rx.keys():
+            self._open_stream(port)
+        self._event_stop = mt.Event()
+        self._thread = mt.Thread(target=self._run)
+        self._thread.start()
+
+    def close(self):
+        self._event_stop.set()
+        self._thread.join()
+        for port in list(self._streams.keys()):
+            self._close_stream(port, None)
+        self._selector.close()
@@ -55,11 +55,12 @@ if __name__ == '__main__':
     calibration_vlc = hl2ss_3dcv.get_calibration_rm(calibration_path, host, vlc_port)
     calibration_lt = hl2ss_3dcv.get_calibration_rm(calibration_path, host, hl2ss.StreamPort.RM_DEPTH_LONGTHROW)
     
+    # Derived geometry is cached in the calibration folder
     rotation = hl2ss_3dcv.rm_vlc_get_rotation(vlc_port)
-    calibration_vlc.intrinsics, calibration_vlc.extrinsics = hl2ss_3dcv.rm_vlc_rotate_calibration(calibration_vlc.intrinsics, calibration_vlc.extrinsics, rotation)
+    undistort_map_vlc = hl2ss_3dcv.get_undistort_map(calibration_path, vlc_port, calibration_vlc)
+    calibration_vlc.intrinsics, calibration_vlc.extrinsics = hl2ss_3dcv.get_rm_vlc_rotated_calibration(calibration_path, vlc_port, calibration_vlc)
 
-    uv2xy = calibration_lt.uv2xy
-    xy1, scale = hl2ss_3dcv.rm_depth_compute_rays(uv2xy, calibration_lt.scale)
+    xy1, scale = hl2ss_3dcv.get_rm_depth_rays(calibration_path, hl2ss.StreamPort.RM_DEPTH_LONGTHROW, calibration_lt, hl2ss.Parameters_RM_DEPTH_LONGTHROW.WIDTH, hl2ss.Parameters_RM_DEPTH_LONGTHROW.HEIGHT, lut=True)
 
     # Create visualizers ------------------------------------------------------
     cv2.namedWindow('Detections')
@@ -97,7 +98,7 @@ if __name__ == '__main__':
             continue
 
         # Preprocess frames ---------------------------------------------------
-        frame = hl2ss_3dcv.rm_vlc_undistort(data_vlc.payload.image, calibration_vlc.undistort_map)
+        frame = hl2ss_3dcv.rm_vlc_undistort(data_vlc.payload.image, undistort_map_vlc)
         frame = hl2ss_3dcv.rm_vlc_rotate_image(frame, rotation)
         frame = hl2ss_3dcv.rm_vlc_to_rgb(frame)
 
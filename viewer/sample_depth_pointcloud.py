@@ -41,7 +41,7 @@ if __name__ == '__main__':
     # Get calibration ---------------------------------------------------------
     # Calibration data will be downloaded if it's not in the calibration folder
     calibration = hl2ss_3dcv.get_calibration_rm(calibration_path, host, port)
-    xy1, scale = hl2ss_3dcv.rm_depth_compute_rays(calibration.uv2xy, calibration.scale)
+    xy1, scale = hl2ss_3dcv.get_rm_depth_rays(calibration_path, port, calibration, calibration.uv2xy.shape[1], calibration.uv2xy.shape[0], lut=True)
     max_depth = 7.5 if (port == hl2ss.StreamPort.RM_DEPTH_LONGTHROW) else (calibration.alias / calibration.scale) if (port == hl2ss.StreamPort.RM_DEPTH_AHAT) else None
 
     # Create Open3D visualizer ------------------------------------------------
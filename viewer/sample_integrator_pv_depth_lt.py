@@ -60,9 +60,6 @@ if __name__ == '__main__':
     uv2xy = calibration_lt.uv2xy
     xy1, scale = hl2ss_3dcv.rm_depth_compute_rays(uv2xy, calibration_lt.scale)
 
-    xy1_o = xy1[:-1, :-1, :]
-    xy1_d = xy1[1:, 1:, :]
-
     # Create Open3D integrator and visualizer ---------------------------------
     volume = o3d.pipelines.integration.ScalableTSDFVolume(voxel_length=voxel_length, sdf_trunc=sdf_trunc, color_type=o3d.pipelines.integration.TSDFVolumeColorType.RGB8)
     
@@ -134,41 +131,7 @@ if __name__ == '__main__':
         world_to_pv    = hl2ss_3dcv.world_to_reference(data_pv.pose) @ hl2ss_3dcv.rignode_to_camera(color_extrinsics)
         pv_to_pv_image = hl2ss_3dcv.camera_to_image(color_intrinsics)
 
-        lt_points_o    = hl2ss_3dcv.rm_depth_to_points(xy1_o, z[:-1, :-1, :])        
-        world_points_o = hl2ss_3dcv.transform(lt_points_o, lt_to_world)
-        pv_points_o    = hl2ss_3dcv.transform(world_points_o, world_to_pv)
-        pv_depth       = pv_points_o[:, :, 2:]
-        pv_uv_o        = hl2ss_3dcv.project(pv_points_o, pv_to_pv_image)
-
-        lt_points_d    = hl2ss_3dcv.rm_depth_to_points(xy1_d, z[:-1, :-1, :])
-        world_points_d = hl2ss_3dcv.transform(lt_points_d, lt_to_world)
-        pv_uv_d        = hl2ss_3dcv.project(world_points_d, world_to_pv @ pv_to_pv_image)
-
-        pv_list_o     = hl2ss_3dcv.block_to_list(pv_uv_o)
-        pv_list_d     = hl2ss_3dcv.block_to_list(pv_uv_d)
-        pv_list_depth = hl2ss_3dcv.block_to_list(pv_depth)
-
-        mask = (depth[:-1,:-1].reshape((-1,)) > 0)
-
-        pv_list = np.hstack((np.floor(pv_list_o[mask, :]), np.floor(pv_list_d[mask, :]) + 1, pv_list_depth[mask]))
-        pv_z    = np.zeros((pv_height, pv_width), dtype=np.float32)
-
-        for n in range(0, pv_list.shape[0]):
-            u0 = int(pv_list[n, 0])
-            v0 = int(pv_list[n, 1])
-            u1 = int(pv_list[n, 2])
-            v1 = int(pv_list[n, 3])
-
-            if ((u0 < 0) or (u0 >= pv_width)):
-                continue
-            if ((u1 < 0) or (u1 > pv_width)):
-                continue
-            if ((v0 < 0) or (v0 >= pv_height)):
-                continue
-            if ((v1 < 0) or (v1 > pv_height)):
-                continue
-
-            pv_z[v0:v1, u0:u1] = pv_list[n, 4]
+        pv_z = hl2ss_3dcv.rm_depth_register(z, xy1, lt_to_world, world_to_pv, pv_to_pv_image, pv_width, pv_height)
 
         # Convert to Open3D RGBD image ----------------------------------------
         color_image = o3d.geometry.Image(color)
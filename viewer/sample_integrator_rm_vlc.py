@@ -43,8 +43,10 @@ if __name__ == '__main__':
     calibration_vlc = hl2ss_3dcv.get_calibration_rm(calibration_path, host, vlc_port)
     calibration_lt = hl2ss_3dcv.get_calibration_rm(calibration_path, host, hl2ss.StreamPort.RM_DEPTH_LONGTHROW)
 
-    uv2xy = hl2ss_3dcv.compute_uv2xy(calibration_lt.intrinsics, hl2ss.Parameters_RM_DEPTH_LONGTHROW.WIDTH, hl2ss.Parameters_RM_DEPTH_LONGTHROW.HEIGHT)
-    xy1, scale = hl2ss_3dcv.rm_depth_compute_rays(uv2xy, calibration_lt.scale)
+    # Derived geometry is cached in the calibration folder
+    xy1, scale = hl2ss_3dcv.get_rm_depth_rays(calibration_path, hl2ss.StreamPort.RM_DEPTH_LONGTHROW, calibration_lt, hl2ss.Parameters_RM_DEPTH_LONGTHROW.WIDTH, hl2ss.Parameters_RM_DEPTH_LONGTHROW.HEIGHT)
+    undistort_map_lt = hl2ss_3dcv.get_undistort_map(calibration_path, hl2ss.StreamPort.RM_DEPTH_LONGTHROW, calibration_lt, nearest=True)
+    undistort_map_vlc = hl2ss_3dcv.get_undistort_map(calibration_path, vlc_port, calibration_vlc)
     
     # Create Open3D integrator and visualizer ---------------------------------
     volume = o3d.pipelines.integration.ScalableTSDFVolume(voxel_length=voxel_length, sdf_trunc=sdf_trunc, color_type=o3d.pipelines.integration.TSDFVolumeColorType.RGB8)
@@ -84,9 +86,9 @@ if __name__ == '__main__':
         last_fs = fs_depth
 
         # Preprocess frames ---------------------------------------------------
-        depth = hl2ss_3dcv.rm_depth_undistort(data_depth.payload.depth, calibration_lt.undistort_map)
+        depth = hl2ss_3dcv.rm_depth_undistort(data_depth.payload.depth, undistort_map_lt)
         depth = hl2ss_3dcv.rm_depth_normalize(depth, scale)
-        color = hl2ss_3dcv.rm_vlc_undistort(data_vlc.payload.image, calibration_vlc.undistort_map)
+        color = hl2ss_3dcv.rm_vlc_undistort(data_vlc.payload.image, undistort_map_vlc)
 
         # Generate aligned RGBD image -----------------------------------------
         lt_points          = hl2ss_3dcv.rm_depth_to_points(xy1, depth)
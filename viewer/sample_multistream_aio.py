@@ -0,0 +1,64 @@
+#------------------------------------------------------------------------------
+# This script receives several streams from the HoloLens using a single asyncio
+# event loop and prints the received frame rate of each stream. Receivers are
+# configured with hl2ss_lnm as usual and converted to their asyncio
+# counterparts with hl2ss_aio.create_rx_from_rx.
+# Press esc to stop.
+#------------------------------------------------------------------------------
+
+from pynput import keyboard
+
+import asyncio
+import time
+import hl2ss
+import hl2ss_lnm
+import hl2ss_aio
+import hl2ss_utilities
+
+# Settings --------------------------------------------------------------------
+
+# HoloLens address
+host = '192.168.1.7'
+
+# Receivers
+receivers = [
+    hl2ss_lnm.rx_rm_vlc(host, hl2ss.StreamPort.RM_VLC_LEFTFRONT),
+    hl2ss_lnm.rx_rm_vlc(host, hl2ss.StreamPort.RM_VLC_LEFTLEFT),
+    hl2ss_lnm.rx_rm_vlc(host, hl2ss.StreamPort.RM_VLC_RIGHTFRONT),
+    hl2ss_lnm.rx_rm_vlc(host, hl2ss.StreamPort.RM_VLC_RIGHTRIGHT),
+    hl2ss_lnm.rx_rm_depth_longthrow(host, hl2ss.StreamPort.RM_DEPTH_LONGTHROW),
+    hl2ss_lnm.rx_rm_imu(host, hl2ss.StreamPort.RM_IMU_ACCELEROMETER),
+    hl2ss_lnm.rx_rm_imu(host, hl2ss.StreamPort.RM_IMU_GYROSCOPE),
+    hl2ss_lnm.rx_rm_imu(host, hl2ss.StreamPort.RM_IMU_MAGNETOMETER),
+    hl2ss_lnm.rx_si(host, hl2ss.StreamPort.SPATIAL_INPUT),
+]
+
+#------------------------------------------------------------------------------
+
+async def receive(rx, listener, counts):
+    async with hl2ss_aio.create_rx_from_rx(rx) as client:
+        while (not listener.pressed()):
+            await client.get_next_packet()
+            counts[rx.port] += 1
+
+
+async def report(listener, counts):
+    start = time.perf_counter()
+    while (not listener.pressed()):
+        await asyncio.sleep(1)
+        elapsed = time.perf_counter() - start
+        print(' '.join([f'{hl2ss.get_port_name(port)}={count / elapsed:.1f}' for port, count in counts.items()]))
+
+
+async def main(listener):
+    counts = {rx.port : 0 for rx in receivers}
+    await asyncio.gather(report(listener, counts), *[receive(rx, listener, counts) for rx in receivers])
+
+
+if __name__ == '__main__':
+    listener = hl2ss_utilities.key_listener(keyboard.Key.esc)
+    listener.open()
+
+    asyncio.run(main(listener))
+
+    listener.close()
@@ -14,6 +14,7 @@ import hl2ss
 import hl2ss_lnm
 import hl2ss_mx
 import hl2ss_mp
+import hl2ss_io
 import hl2ss_ds
 import hl2ss_utilities
 
@@ -86,6 +87,12 @@ ez_stride_mask = 63
 # User data
 user_data = 'created by hl2ss simple recorder'.encode()
 
+# Segment rotation
+# Start a new file (at a keyframe) after this many bytes or seconds
+# None records a single file per port
+segment_size = None
+segment_duration = None
+
 #------------------------------------------------------------------------------
 
 if __name__ == '__main__':
@@ -183,11 +190,10 @@ if __name__ == '__main__':
             pass
         print(f'Started stream {hl2ss.get_port_name(port)}')
     
-    writers = {port : hl2ss_ds.wr(filenames[port], producer, port, user_data) for port in ports}
-
-    for port in ports:
-        writers[port].open()
-        print(f'Started writer {hl2ss.get_port_name(port)}')
+    # All ports are written by a single background process
+    writer = hl2ss_ds.wr_multi(filenames, producer, user_data, hl2ss_io.writer_config(segment_size=segment_size, segment_duration=segment_duration))
+    writer.open()
+    print('Started writer')
 
     # Wait for stop signal ----------------------------------------------------
     print('Recording started.')
@@ -203,9 +209,8 @@ if __name__ == '__main__':
     listener.close()
 
     # Stop writers and receivers ----------------------------------------------
-    for port in ports:
-        writers[port].close()
-        print(f'Stopped writer {hl2ss.get_port_name(port)}')
+    writer.close()
+    print('Stopped writer')
 
     for port in ports:
         sinks[port].detach()